@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import argparse
+import functools
+import logging
+import os
+import sys
+import tempfile
+
+from .backends import STATUS_OK, run_benchmark, select_benchmarks
+from .generator import CHURN_PATTERNS, CHURN_UNIFORM, LANGUAGES, RepositoryGenerator
+from .overhead import run_overhead, select_overhead_benchmarks
+from .parsers import load_output, run_parser, select_parsers, write_corpus
+from .results import DEFAULT_THRESHOLD, compare_results, format_comparison, load_results, save_results
+
+BENCHMARKS_LOG_FORMAT = "[%(asctime)s] - %(message)s"
+
+
+def generate(args):
+    """Generate a synthetic repository"""
+
+    generator = _generator(args)
+    generator.generate(args.path)
+
+    print("Repository generated in %s" % args.path)
+
+
+def backends(args):
+    """Time the analyses of the backends on a synthetic repository"""
+
+    exec_paths = dict(exec_path.split('=', 1) for exec_path in args.exec_paths)
+    run = functools.partial(run_benchmark, exec_paths=exec_paths, workers=args.workers, repeat=args.repeat)
+
+    _run_suite(args, 'backends', select_benchmarks(args.select), run)
+
+
+def overhead(args):
+    """Measure the overhead of the framework, running the backends with a no-op analysis"""
+
+    run = functools.partial(run_overhead, workers=args.workers, repeat=args.repeat)
+
+    _run_suite(args, 'overhead', select_overhead_benchmarks(args.select), run)
+
+
+def corpus(args):
+    """Write a corpus of outputs of the tools, to benchmark the parsers"""
+
+    write_corpus(args.path, select_parsers(args.select), scale=args.scale)
+
+    print("Corpus written in %s" % args.path)
+
+
+def parsers(args):
+    """Time the parsers of the outputs of the tools and measure their peak of memory"""
+
+    results = []
+    for parser in select_parsers(args.select):
+        output = load_output(parser, corpus_path=args.corpus, scale=args.scale)
+        result = run_parser(parser, output, repeat=args.repeat)
+        results.append(result)
+        print(_format_parser_result(result))
+
+    save_results(args.output, 'parsers', results, corpus=args.corpus, scale=args.scale)
+
+
+def compare(args):
+    """Compare two result files; the exit status is 1 when there are regressions"""
+
+    comparison = compare_results(load_results(args.old), load_results(args.new),
+                                 metric=args.metric, threshold=args.threshold)
+    print(format_comparison(comparison))
+
+    return 1 if any(c['regression'] for c in comparison) else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Benchmarks of Graal")
+    parser.add_argument('-g', '--debug', action='store_true',
+                        help="set debug mode on")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Generate
+    cmd = subparsers.add_parser('generate', help=generate.__doc__)
+    cmd.add_argument('path', help="path of the repository")
+    _add_generator_args(cmd)
+    cmd.set_defaults(func=generate)
+
+    # Backends
+    cmd = subparsers.add_parser('backends', help=backends.__doc__)
+    cmd.add_argument('--exec-path', dest='exec_paths', action='append', default=[],
+                     help="path of a tool passed as exec_path, as NAME=PATH (e.g., nomossa=/usr/bin/nomossa)")
+    _add_run_args(cmd)
+    _add_generator_args(cmd)
+    cmd.set_defaults(func=backends)
+
+    # Overhead
+    cmd = subparsers.add_parser('overhead', help=overhead.__doc__)
+    _add_run_args(cmd)
+    _add_generator_args(cmd)
+    cmd.set_defaults(func=overhead)
+
+    # Corpus
+    cmd = subparsers.add_parser('corpus', help=corpus.__doc__)
+    cmd.add_argument('path', help="directory of the corpus")
+    _add_parser_args(cmd)
+    cmd.set_defaults(func=corpus)
+
+    # Parsers
+    cmd = subparsers.add_parser('parsers', help=parsers.__doc__)
+    cmd.add_argument('-o', '--output', required=True,
+                     help="JSON file where the results are written")
+    cmd.add_argument('--corpus',
+                     help="directory of a corpus; the outputs not found there are generated")
+    cmd.add_argument('--repeat', type=int, default=5,
+                     help="number of runs of each parser; the fastest is kept")
+    _add_parser_args(cmd)
+    cmd.set_defaults(func=parsers)
+
+    # Compare
+    cmd = subparsers.add_parser('compare', help=compare.__doc__)
+    cmd.add_argument('old', help="JSON file with the baseline results")
+    cmd.add_argument('new', help="JSON file with the new results")
+    cmd.add_argument('--metric', default='wall',
+                     help="metric to compare; lower values are better")
+    cmd.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                     help="minimum relative change reported as a regression")
+    cmd.set_defaults(func=compare)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format=BENCHMARKS_LOG_FORMAT)
+
+    return args.func(args) or 0
+
+
+def _run_suite(args, suite, benchmarks, run):
+    """Run a list of benchmarks on a repository and save the results"""
+
+    generator = _generator(args)
+
+    with tempfile.TemporaryDirectory(prefix='graal_bench_', dir=args.work_dir) as work_dir:
+        repo_path = args.repository
+        if not repo_path:
+            repo_path = generator.generate(os.path.join(work_dir, 'repository'))
+
+        results = []
+        for benchmark in benchmarks:
+            result = run(benchmark, repo_path, work_dir)
+            results.append(result)
+            print(_format_result(result))
+
+    repository = {'path': args.repository} if args.repository else generator.params()
+    save_results(args.output, suite, results, repository=repository)
+
+
+def _add_run_args(parser):
+    parser.add_argument('-o', '--output', required=True,
+                        help="JSON file where the results are written")
+    parser.add_argument('--repository',
+                        help="analyze this repository instead of a synthetic one")
+    parser.add_argument('--select', nargs='*', default=[],
+                        help="run only the benchmarks whose name starts with these prefixes")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of workers of the backends")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="number of runs of each benchmark; the fastest is kept")
+    parser.add_argument('--work-dir',
+                        help="directory for the temporary data")
+
+
+def _add_parser_args(parser):
+    parser.add_argument('--select', nargs='*', default=[],
+                        help="use only the parsers whose name starts with these prefixes")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="factor applied to the default sizes of the generated outputs")
+
+
+def _add_generator_args(parser):
+    group = parser.add_argument_group('Synthetic repository')
+    group.add_argument('--commits', type=int, default=100,
+                       help="number of commits")
+    group.add_argument('--files', type=int, default=50,
+                       help="number of files added by the first commit")
+    group.add_argument('--file-size', type=int, default=200,
+                       help="approximate number of lines of the files")
+    group.add_argument('--languages', nargs='+', default=['python'], choices=list(LANGUAGES),
+                       help="languages of the files")
+    group.add_argument('--churn', type=float, default=0.1,
+                       help="ratio of files changed by each commit")
+    group.add_argument('--pattern', default=CHURN_UNIFORM, choices=CHURN_PATTERNS,
+                       help="pattern of churn")
+    group.add_argument('--seed', type=int, default=0,
+                       help="seed of the random generator")
+
+
+def _generator(args):
+    return RepositoryGenerator(commits=args.commits, files=args.files, file_size=args.file_size,
+                               languages=args.languages, churn=args.churn, pattern=args.pattern,
+                               seed=args.seed)
+
+
+def _format_result(result):
+    if result['status'] != STATUS_OK:
+        return "%s: %s (%s)" % (result['name'], result['status'], result['reason'])
+
+    msg = "%s: %s commits in %.3fs (%.2f commits/s)" % (result['name'], result['commits'],
+                                                        result['wall'], result['commits_per_second'])
+    if 'throughput' in result:
+        msg += '\n' + '\n'.join("    %-10s %12.2f commits/s" % (stage, throughput)
+                                for stage, throughput in result['throughput'].items())
+
+    return msg
+
+
+def _format_parser_result(result):
+    if result['status'] != STATUS_OK:
+        return "%s: %s (%s)" % (result['name'], result['status'], result['reason'])
+
+    return "%s: %.1f MB in %.3fs (%.2f MB/s), peak memory %.1f MB" % (
+        result['name'], result['output_bytes'] / 1000000, result['wall'],
+        result['megabytes_per_second'], result['peak_memory'] / 1000000)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import os
+import shutil
+import time
+
+from graal.backends.core.cocom import (CoCom,
+                                       CATEGORY_COCOM_LIZARD_FILE,
+                                       CATEGORY_COCOM_LIZARD_REPOSITORY,
+                                       CATEGORY_COCOM_SCC_FILE,
+                                       CATEGORY_COCOM_SCC_REPOSITORY,
+                                       LINE_COUNTER_CLOC,
+                                       LINE_COUNTER_LIZARD)
+from graal.backends.core.codep import (CoDep,
+                                       CATEGORY_CODEP_PYREVERSE,
+                                       CATEGORY_CODEP_JADOLINT)
+from graal.backends.core.colang import (CoLang,
+                                        CATEGORY_COLANG_CLOC,
+                                        CATEGORY_COLANG_LINGUIST)
+from graal.backends.core.colic import (CoLic,
+                                       CATEGORY_COLIC_NOMOS,
+                                       CATEGORY_COLIC_SCANCODE,
+                                       CATEGORY_COLIC_SCANCODE_CLI)
+from graal.backends.core.coqua import (CoQua,
+                                       CATEGORY_COQUA_PYLINT,
+                                       CATEGORY_COQUA_FLAKE8,
+                                       CATEGORY_COQUA_JADOLINT)
+from graal.backends.core.covuln import (CoVuln,
+                                        CATEGORY_COVULN)
+
+from .generator import ENTRYPOINT
+
+STATUS_OK = 'ok'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+# Stage of the serialization of the items, measured by the benchmarks
+STAGE_JSON = 'json'
+
+logger = logging.getLogger(__name__)
+
+
+class Benchmark:
+    """Analysis of a repository with a backend and a category.
+
+    :param backend_class: class of the backend
+    :param category: category of the analysis
+    :param params: arguments of the backend, besides the repository ones
+    :param tools: executables that must be in the PATH to run the analysis
+    :param exec_tool: name of the tool passed to the backend as `exec_path`
+    :param label: suffix of the name, to tell apart analyses with the same category
+    """
+    def __init__(self, backend_class, category, params=None, tools=None, exec_tool=None, label=None):
+        self.backend_class = backend_class
+        self.category = category
+        self.params = params or {}
+        self.tools = tools or []
+        self.exec_tool = exec_tool
+        self.label = label
+
+    @property
+    def backend(self):
+        return self.backend_class.__name__.lower()
+
+    @property
+    def name(self):
+        name = '%s:%s' % (self.backend, self.category)
+        return name + ':' + self.label if self.label else name
+
+
+BENCHMARKS = [
+    Benchmark(CoCom, CATEGORY_COCOM_LIZARD_FILE, params={'line_counter': LINE_COUNTER_LIZARD}),
+    Benchmark(CoCom, CATEGORY_COCOM_LIZARD_FILE, params={'line_counter': LINE_COUNTER_CLOC},
+              tools=['cloc'], label=LINE_COUNTER_CLOC),
+    Benchmark(CoCom, CATEGORY_COCOM_LIZARD_REPOSITORY, params={'line_counter': LINE_COUNTER_LIZARD}),
+    Benchmark(CoCom, CATEGORY_COCOM_SCC_FILE, tools=['scc']),
+    Benchmark(CoCom, CATEGORY_COCOM_SCC_REPOSITORY, tools=['scc']),
+    Benchmark(CoLic, CATEGORY_COLIC_NOMOS, exec_tool='nomossa'),
+    Benchmark(CoLic, CATEGORY_COLIC_SCANCODE, exec_tool='scancode'),
+    Benchmark(CoLic, CATEGORY_COLIC_SCANCODE_CLI, exec_tool='scancode-cli.py'),
+    Benchmark(CoQua, CATEGORY_COQUA_PYLINT, params={'entrypoint': ENTRYPOINT}, tools=['pylint']),
+    Benchmark(CoQua, CATEGORY_COQUA_FLAKE8, params={'entrypoint': ENTRYPOINT}, tools=['flake8']),
+    Benchmark(CoQua, CATEGORY_COQUA_JADOLINT, params={'in_paths': ['Dockerfile']}, exec_tool='jadolint.jar'),
+    Benchmark(CoDep, CATEGORY_CODEP_PYREVERSE, params={'entrypoint': ENTRYPOINT}, tools=['pyreverse']),
+    Benchmark(CoDep, CATEGORY_CODEP_JADOLINT, params={'in_paths': ['Dockerfile']}, exec_tool='jadolint.jar'),
+    Benchmark(CoLang, CATEGORY_COLANG_CLOC, tools=['cloc']),
+    Benchmark(CoLang, CATEGORY_COLANG_LINGUIST, tools=['github-linguist']),
+    Benchmark(CoVuln, CATEGORY_COVULN, params={'entrypoint': ENTRYPOINT}, tools=['bandit'])
+]
+
+
+def select_benchmarks(patterns=None):
+    """Select the benchmarks whose name starts with any of the patterns
+
+    :param patterns: list of prefixes of the names (e.g., `cocom` or
+        `coqua:code_quality_pylint`); if empty, all the benchmarks are selected
+    """
+    if not patterns:
+        return list(BENCHMARKS)
+
+    return [b for b in BENCHMARKS if any(b.name.startswith(p) for p in patterns)]
+
+
+def run_benchmark(benchmark, repo_path, work_dir, exec_paths=None, workers=1, repeat=1):
+    """Run the analysis of a benchmark on a repository.
+
+    The backend is run end to end, the same way the `graal` command
+    does (see `measure_backend`). Benchmarks whose tools are not
+    available are skipped.
+
+    :param benchmark: a Benchmark object
+    :param repo_path: path of the repository to analyze
+    :param work_dir: directory where the clones and worktrees are created
+    :param exec_paths: dict of the paths of the tools passed as `exec_path`;
+        when a tool is not found there, it is searched in the PATH
+    :param workers: number of workers of the backend
+    :param repeat: number of times the analysis is run
+
+    :returns: a dict with the results
+    """
+    result = {
+        'name': benchmark.name,
+        'backend': benchmark.backend,
+        'category': benchmark.category,
+        'params': benchmark.params,
+        'workers': workers
+    }
+
+    missing = [tool for tool in benchmark.tools if not shutil.which(tool)]
+    exec_path = None
+    if benchmark.exec_tool:
+        exec_path = (exec_paths or {}).get(benchmark.exec_tool) or shutil.which(benchmark.exec_tool)
+        if not exec_path:
+            missing.append(benchmark.exec_tool)
+
+    if missing:
+        result['status'] = STATUS_SKIPPED
+        result['reason'] = "missing tools: %s" % ', '.join(missing)
+        logger.info("Benchmark %s skipped, %s", benchmark.name, result['reason'])
+        return result
+
+    params = dict(benchmark.params)
+    if exec_path:
+        params['exec_path'] = exec_path
+
+    return measure_backend(result, benchmark.backend_class, benchmark.category, params,
+                           repo_path, work_dir, workers=workers, repeat=repeat)
+
+
+def measure_backend(result, backend_class, category, params, repo_path, work_dir, workers=1, repeat=1):
+    """Run a backend on a repository and add the measures to `result`.
+
+    The backend is run end to end, from the clone of the repository
+    to the serialization of the items as JSON, which is timed as the
+    `json` stage. The time spent on the other stages is obtained with
+    the stats of the backend (see `graal.stats`). When the analysis
+    is repeated, the measures of the fastest run are kept.
+
+    :param result: dict of the result, with the `name` of the benchmark
+    :param backend_class: class of the backend
+    :param category: category of the analysis
+    :param params: arguments of the backend, besides the repository ones
+    :param repo_path: path of the repository to analyze
+    :param work_dir: directory where the clones and worktrees are created
+    :param workers: number of workers of the backend
+    :param repeat: number of times the analysis is run
+
+    :returns: the result
+    """
+    runs = []
+    try:
+        for _ in range(repeat):
+            runs.append(_run(backend_class, category, params, repo_path, work_dir, workers))
+    except Exception as e:
+        result['status'] = STATUS_FAILED
+        result['reason'] = "%s: %s" % (type(e).__name__, e)
+        logger.warning("Benchmark %s failed, %s", result['name'], result['reason'])
+        return result
+
+    best = min(runs, key=lambda run: run['wall'])
+    result.update({
+        'status': STATUS_OK,
+        'commits': best['commits'],
+        'items': best['items'],
+        'wall': best['wall'],
+        'walls': [run['wall'] for run in runs],
+        'commits_per_second': best['commits'] / best['wall'] if best['wall'] else None,
+        'stages': best['stages']
+    })
+
+    logger.info("Benchmark %s: %s commits in %.3fs", result['name'], result['commits'], result['wall'])
+
+    return result
+
+
+def _run(backend_class, category, params, repo_path, work_dir, workers):
+    """Run an analysis from scratch, removing the data of the previous runs"""
+
+    run_dir = os.path.join(work_dir, 'run')
+    if os.path.exists(run_dir):
+        shutil.rmtree(run_dir)
+    os.makedirs(run_dir)
+
+    stats_path = os.path.join(run_dir, 'stats.json')
+    backend = backend_class(repo_path,
+                            os.path.join(run_dir, 'git'),
+                            worktreepath=os.path.join(run_dir, 'worktrees'),
+                            workers=workers,
+                            stats_path=stats_path,
+                            **params)
+
+    json_timer = {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'children_cpu': 0.0}
+    start = time.perf_counter()
+    for item in backend.fetch(category=category):
+        wall, cpu = time.perf_counter(), time.process_time()
+        json.dumps(item, indent=4, sort_keys=True)
+        json_timer['wall'] += time.perf_counter() - wall
+        json_timer['cpu'] += time.process_time() - cpu
+        json_timer['count'] += 1
+    wall = time.perf_counter() - start
+
+    with open(stats_path) as fd:
+        stats = json.load(fd)
+
+    shutil.rmtree(run_dir)
+
+    stats['stages'][STAGE_JSON] = json_timer
+
+    return {
+        'commits': stats['commits'],
+        'items': json_timer['count'],
+        'wall': wall,
+        'stages': stats['stages']
+    }
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import os
+import random
+import subprocess
+
+from graal.graal import GraalError
+
+# Directory containing the source code of the generated repositories,
+# to be used as entrypoint of the Python analyses
+ENTRYPOINT = 'synthetic'
+
+# Churn patterns
+CHURN_UNIFORM = 'uniform'
+CHURN_HOTSPOT = 'hotspot'
+CHURN_APPEND = 'append'
+CHURN_PATTERNS = [CHURN_UNIFORM, CHURN_HOTSPOT, CHURN_APPEND]
+
+# Share of the files which receive most of the changes with the hotspot pattern
+HOTSPOT_FILES = 0.2
+HOTSPOT_CHANGES = 0.8
+
+AUTHOR = 'Graal Benchmark <benchmark@example.com>'
+BASE_TIMESTAMP = 1546300800
+COMMIT_INTERVAL = 3600
+
+LICENSE_HEADER = [
+    'Copyright (C) 2015-2020 Bitergia',
+    '',
+    'This program is free software; you can redistribute it and/or modify',
+    'it under the terms of the GNU General Public License as published by',
+    'the Free Software Foundation; either version 3 of the License, or',
+    '(at your option) any later version.'
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _python_file(name, constants):
+    lines = ['# ' + line if line else '#' for line in LICENSE_HEADER]
+    lines += ['', '"""Synthetic module %s."""' % name, '']
+    for i, k in enumerate(constants):
+        lines += [
+            '',
+            'def function_%s(value):' % i,
+            '    """Compute a value."""',
+            '    # Comment of function %s' % i,
+            '    if value > %s:' % k,
+            '        return value - %s' % k,
+            '    elif value < 0:',
+            '        return -value',
+            '    for item in range(value):',
+            '        value += item',
+            '    return value',
+            ''
+        ]
+    return lines
+
+
+def _java_file(name, constants):
+    lines = ['/*'] + [' * ' + line if line else ' *' for line in LICENSE_HEADER] + [' */']
+    lines += ['package %s;' % ENTRYPOINT, '', '/** Synthetic class %s. */' % name,
+              'public class %s {' % name.capitalize()]
+    for i, k in enumerate(constants):
+        lines += [
+            '',
+            '    // Comment of method %s' % i,
+            '    public int method%s(int value) {' % i,
+            '        if (value > %s) {' % k,
+            '            return value - %s;' % k,
+            '        } else if (value < 0) {',
+            '            return -value;',
+            '        }',
+            '        for (int i = 0; i < value; i++) {',
+            '            value += i;',
+            '        }',
+            '        return value;',
+            '    }'
+        ]
+    lines += ['}']
+    return lines
+
+
+def _c_file(name, constants):
+    lines = ['/*'] + [' * ' + line if line else ' *' for line in LICENSE_HEADER] + [' */']
+    lines += ['', '/* Synthetic source %s. */' % name]
+    for i, k in enumerate(constants):
+        lines += [
+            '',
+            '/* Comment of function %s */' % i,
+            'int %s_function_%s(int value)' % (name, i),
+            '{',
+            '    int i;',
+            '    if (value > %s)' % k,
+            '        return value - %s;' % k,
+            '    else if (value < 0)',
+            '        return -value;',
+            '    for (i = 0; i < value; i++)',
+            '        value += i;',
+            '    return value;',
+            '}'
+        ]
+    return lines
+
+
+def _javascript_file(name, constants):
+    lines = ['/*'] + [' * ' + line if line else ' *' for line in LICENSE_HEADER] + [' */']
+    lines += ['', "'use strict';", '', '// Synthetic module %s' % name]
+    for i, k in enumerate(constants):
+        lines += [
+            '',
+            '// Comment of function %s' % i,
+            'function function%s(value) {' % i,
+            '    if (value > %s) {' % k,
+            '        return value - %s;' % k,
+            '    } else if (value < 0) {',
+            '        return -value;',
+            '    }',
+            '    for (let i = 0; i < value; i++) {',
+            '        value += i;',
+            '    }',
+            '    return value;',
+            '}'
+        ]
+    return lines
+
+
+def _dockerfile(name, constants):
+    lines = ['# ' + line if line else '#' for line in LICENSE_HEADER]
+    lines += ['', 'FROM debian:buster-slim', 'LABEL name="%s"' % name, '']
+    for i, k in enumerate(constants):
+        lines += [
+            '# Step %s' % i,
+            'ENV STEP_%s=%s' % (i, k),
+            'RUN apt-get update && apt-get install -y package-%s=%s' % (i, k),
+            'COPY file-%s /opt/file-%s' % (i, i),
+            ''
+        ]
+    lines += ['CMD ["/bin/sh"]']
+    return lines
+
+
+# Supported languages: extension of their files and function
+# to build the lines of a file, given its name and the constants
+# of its functions
+LANGUAGES = {
+    'python': ('.py', _python_file),
+    'java': ('.java', _java_file),
+    'c': ('.c', _c_file),
+    'javascript': ('.js', _javascript_file),
+    'dockerfile': ('Dockerfile', _dockerfile)
+}
+
+# Approximate number of lines of a function in the templates
+FUNCTION_LINES = 12
+
+
+class RepositoryGenerator:
+    """Generate synthetic Git repositories.
+
+    The repositories are built with `git fast-import`, so their
+    generation does not depend on the speed of the working tree. The
+    first commit adds `files` files, spread across `dirs` directories
+    of the `ENTRYPOINT` package and across the given `languages`. Each
+    of the following commits changes `churn` times the number of files
+    according to the `pattern` of churn:
+
+        - `uniform`: the files are picked at random
+        - `hotspot`: 80% of the changes are done on 20% of the files
+        - `append`: new files are added, the existing ones are not changed
+
+    A change updates a function of the file and, sometimes, adds a
+    new one at its end, so the files grow over the history. Given the
+    same parameters and `seed`, the generated repositories are equal,
+    commit hashes included.
+
+    :param commits: number of commits
+    :param files: number of files added by the first commit
+    :param file_size: approximate number of lines of the files
+    :param languages: list of languages of the files (see `LANGUAGES`)
+    :param churn: ratio of files changed (or added) by each commit
+    :param pattern: pattern of churn
+    :param dirs: number of directories; by default, one every 10 files
+    :param seed: seed of the random generator
+    """
+    def __init__(self, commits=100, files=50, file_size=200, languages=('python',),
+                 churn=0.1, pattern=CHURN_UNIFORM, dirs=None, seed=0):
+        if commits < 1 or files < 1 or file_size < 1:
+            raise GraalError(cause="commits, files and file size must be greater than 0")
+
+        unknown = [lang for lang in languages if lang not in LANGUAGES]
+        if not languages or unknown:
+            raise GraalError(cause="unknown languages %s, valid ones are %s" % (unknown, list(LANGUAGES)))
+
+        if pattern not in CHURN_PATTERNS:
+            raise GraalError(cause="unknown churn pattern %s, valid ones are %s" % (pattern, CHURN_PATTERNS))
+
+        if not 0 < churn <= 1:
+            raise GraalError(cause="churn must be in (0, 1]")
+
+        self.commits = commits
+        self.files = files
+        self.file_size = file_size
+        self.languages = list(languages)
+        self.churn = churn
+        self.pattern = pattern
+        self.dirs = dirs or max(1, files // 10)
+        self.seed = seed
+
+    def params(self):
+        """Return the parameters of the generator as a dict"""
+
+        return {
+            'commits': self.commits,
+            'files': self.files,
+            'file_size': self.file_size,
+            'languages': self.languages,
+            'churn': self.churn,
+            'pattern': self.pattern,
+            'dirs': self.dirs,
+            'seed': self.seed
+        }
+
+    def generate(self, path):
+        """Generate a repository in `path`
+
+        The history is written in the branch `master`, which is the
+        one checked out in `path`.
+
+        :param path: path of the repository; it must not exist
+
+        :returns: the path of the repository
+        """
+        if os.path.exists(path):
+            raise GraalError(cause="path %s already exists" % path)
+
+        os.makedirs(path)
+        subprocess.check_call(['git', 'init', '-q', path])
+        subprocess.check_call(['git', '-C', path, 'symbolic-ref', 'HEAD', 'refs/heads/master'])
+
+        proc = subprocess.Popen(['git', '-C', path, 'fast-import', '--quiet'], stdin=subprocess.PIPE)
+        try:
+            for chunk in self.stream():
+                proc.stdin.write(chunk)
+        finally:
+            proc.stdin.close()
+
+        if proc.wait() != 0:
+            raise GraalError(cause="git fast-import failed on %s" % path)
+
+        subprocess.check_call(['git', '-C', path, 'checkout', '-q', '-f', 'master'])
+
+        logger.debug("Repository %s generated with %s", path, self.params())
+
+        return path
+
+    def stream(self):
+        """Generate the commits as chunks of a `git fast-import` stream"""
+
+        rng = random.Random(self.seed)
+        sources = {}
+        functions = max(1, self.file_size // FUNCTION_LINES)
+
+        for ncommit in range(self.commits):
+            if ncommit == 0:
+                changed = [self.__add_file(sources, rng, functions) for _ in range(self.files)]
+                changed += self.__packages()
+            elif self.pattern == CHURN_APPEND:
+                changed = [self.__add_file(sources, rng, functions) for _ in range(self.__nchanges())]
+            else:
+                changed = [self.__change_file(sources, rng, path) for path in self.__pick_files(sources, rng)]
+
+            yield self.__commit(ncommit, changed)
+
+    def __commit(self, ncommit, changed):
+        timestamp = BASE_TIMESTAMP + ncommit * COMMIT_INTERVAL
+        message = 'Synthetic commit %s\n' % ncommit
+
+        lines = [
+            b'commit refs/heads/master',
+            b'mark :%d' % (ncommit + 1),
+            b'author %s %d +0000' % (AUTHOR.encode('utf-8'), timestamp),
+            b'committer %s %d +0000' % (AUTHOR.encode('utf-8'), timestamp),
+            _data(message)
+        ]
+        if ncommit > 0:
+            lines.append(b'from :%d' % ncommit)
+
+        for path, content in changed:
+            lines.append(b'M 100644 inline %s' % path.encode('utf-8'))
+            lines.append(_data(content))
+
+        return b'\n'.join(lines) + b'\n\n'
+
+    def __packages(self):
+        """Mark the directories as Python packages"""
+
+        paths = [os.path.join(ENTRYPOINT, '__init__.py')]
+        paths += [os.path.join(ENTRYPOINT, 'pkg%s' % d, '__init__.py') for d in range(self.dirs)]
+
+        return [(path, '') for path in paths]
+
+    def __nchanges(self):
+        return max(1, round(self.churn * self.files))
+
+    def __add_file(self, sources, rng, functions):
+        nfile = len(sources)
+        language = self.languages[nfile % len(self.languages)]
+        ext, _ = LANGUAGES[language]
+        directory = os.path.join(ENTRYPOINT, 'pkg%s' % (nfile % self.dirs))
+        name = 'module%s' % nfile
+
+        if ext == 'Dockerfile':
+            path = os.path.join(directory, name, ext)
+        else:
+            path = os.path.join(directory, name + ext)
+
+        sources[path] = (language, name, [rng.randint(1, 1000) for _ in range(functions)])
+
+        return path, self.__content(sources[path])
+
+    def __pick_files(self, sources, rng):
+        paths = list(sources)
+        nchanges = min(self.__nchanges(), len(paths))
+
+        if self.pattern == CHURN_UNIFORM:
+            return rng.sample(paths, nchanges)
+
+        nhot = max(1, round(len(paths) * HOTSPOT_FILES))
+        hot, cold = paths[:nhot], paths[nhot:]
+        picked = set()
+        while len(picked) < nchanges:
+            candidates = hot if not cold or rng.random() < HOTSPOT_CHANGES else cold
+            picked.add(rng.choice(candidates))
+
+        return sorted(picked)
+
+    def __change_file(self, sources, rng, path):
+        _, _, constants = sources[path]
+
+        constants[rng.randrange(len(constants))] = rng.randint(1, 1000)
+        if rng.random() < 0.3:
+            constants.append(rng.randint(1, 1000))
+
+        return path, self.__content(sources[path])
+
+    @staticmethod
+    def __content(source):
+        language, name, constants = source
+        _, template = LANGUAGES[language]
+
+        return '\n'.join(template(name, constants)) + '\n'
+
+
+def _data(content):
+    data = content.encode('utf-8')
+    return b'data %d\n%s' % (len(data), data)
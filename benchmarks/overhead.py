@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import stat
+
+from graal.graal import (Graal,
+                         CATEGORY_GRAAL,
+                         CHECKOUT_NONE,
+                         CHECKOUT_SPARSE)
+from graal.stats import (STAGE_CHECKOUT,
+                         STAGE_LOG,
+                         STAGE_METADATA,
+                         STAGE_OUTPUT,
+                         STAGE_POST)
+from graal.backends.core.cocom import (CoCom,
+                                       CATEGORY_COCOM_LIZARD_FILE,
+                                       CATEGORY_COCOM_LIZARD_REPOSITORY)
+from graal.backends.core.codep import CoDep, CATEGORY_CODEP_PYREVERSE
+from graal.backends.core.colang import CoLang, CATEGORY_COLANG_CLOC
+from graal.backends.core.colic import CoLic, CATEGORY_COLIC_NOMOS
+from graal.backends.core.coqua import CoQua, CATEGORY_COQUA_PYLINT
+from graal.backends.core.covuln import CoVuln, CATEGORY_COVULN
+
+from .backends import STAGE_JSON, STATUS_OK, Benchmark, measure_backend
+from .generator import ENTRYPOINT
+
+# Stages of the framework whose throughput is reported
+OVERHEAD_STAGES = [STAGE_LOG, STAGE_CHECKOUT, STAGE_POST, STAGE_METADATA, STAGE_OUTPUT, STAGE_JSON]
+
+STUB_TOOL = 'stub-tool'
+
+
+class NullAnalysis:
+    """Mixin that replaces the analysis of a backend with a no-op.
+
+    The rest of the backend, such as the checkout of the commits,
+    the post-processing of the items and the addition of the
+    metadata, is kept, so the backend measures the overhead of the
+    framework without the time spent on the tools.
+    """
+    def _analyze(self, commit):
+        return {}
+
+
+class NullGraal(NullAnalysis, Graal):
+    pass
+
+
+class NullCoCom(NullAnalysis, CoCom):
+    pass
+
+
+class NullCoDep(NullAnalysis, CoDep):
+    pass
+
+
+class NullCoLang(NullAnalysis, CoLang):
+    pass
+
+
+class NullCoLic(NullAnalysis, CoLic):
+    pass
+
+
+class NullCoQua(NullAnalysis, CoQua):
+    pass
+
+
+class NullCoVuln(NullAnalysis, CoVuln):
+    pass
+
+
+# The backends requiring an `exec_path` get a stub tool, set with `exec_tool`
+OVERHEAD_BENCHMARKS = [
+    Benchmark(NullGraal, CATEGORY_GRAAL),
+    Benchmark(NullCoCom, CATEGORY_COCOM_LIZARD_FILE),
+    Benchmark(NullCoCom, CATEGORY_COCOM_LIZARD_FILE, params={'checkout_mode': CHECKOUT_SPARSE},
+              label=CHECKOUT_SPARSE),
+    Benchmark(NullCoCom, CATEGORY_COCOM_LIZARD_FILE, params={'checkout_mode': CHECKOUT_NONE},
+              label=CHECKOUT_NONE),
+    Benchmark(NullCoCom, CATEGORY_COCOM_LIZARD_REPOSITORY),
+    Benchmark(NullCoDep, CATEGORY_CODEP_PYREVERSE, params={'entrypoint': ENTRYPOINT}),
+    Benchmark(NullCoLang, CATEGORY_COLANG_CLOC),
+    Benchmark(NullCoLic, CATEGORY_COLIC_NOMOS, exec_tool=STUB_TOOL),
+    Benchmark(NullCoQua, CATEGORY_COQUA_PYLINT, params={'entrypoint': ENTRYPOINT}),
+    Benchmark(NullCoVuln, CATEGORY_COVULN, params={'entrypoint': ENTRYPOINT})
+]
+
+
+def select_overhead_benchmarks(patterns=None):
+    """Select the overhead benchmarks whose name starts with any of the patterns
+
+    :param patterns: list of prefixes of the names (e.g., `nullcocom`);
+        if empty, all the benchmarks are selected
+    """
+    if not patterns:
+        return list(OVERHEAD_BENCHMARKS)
+
+    return [b for b in OVERHEAD_BENCHMARKS if any(b.name.startswith(p) for p in patterns)]
+
+
+def run_overhead(benchmark, repo_path, work_dir, workers=1, repeat=1):
+    """Measure the overhead of the framework on a repository.
+
+    The backend of the benchmark, whose analysis does nothing, is run
+    end to end (see `measure_backend`). Besides the usual measures,
+    the result includes the throughput of the stages of the framework,
+    in commits per second of the time spent on each of them.
+
+    :param benchmark: a Benchmark object with a backend using `NullAnalysis`
+    :param repo_path: path of the repository to analyze
+    :param work_dir: directory where the clones and worktrees are created
+    :param workers: number of workers of the backend
+    :param repeat: number of times the analysis is run
+
+    :returns: a dict with the results
+    """
+    result = {
+        'name': benchmark.name,
+        'backend': benchmark.backend,
+        'category': benchmark.category,
+        'params': benchmark.params,
+        'workers': workers
+    }
+
+    params = dict(benchmark.params)
+    if benchmark.exec_tool:
+        params['exec_path'] = _stub_tool(work_dir)
+
+    measure_backend(result, benchmark.backend_class, benchmark.category, params,
+                    repo_path, work_dir, workers=workers, repeat=repeat)
+
+    if result['status'] == STATUS_OK:
+        stages = result['stages']
+        result['throughput'] = {
+            stage: result['commits'] / stages[stage]['wall']
+            for stage in OVERHEAD_STAGES if stage in stages and stages[stage]['wall']
+        }
+
+    return result
+
+
+def _stub_tool(work_dir):
+    """Create an executable that does nothing, to be used as `exec_path`"""
+
+    path = os.path.join(work_dir, STUB_TOOL)
+    with open(path, 'w') as fd:
+        fd.write('#!/bin/sh\nexit 0\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+    return path
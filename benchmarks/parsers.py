@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import json
+import logging
+import os
+import time
+import tracemalloc
+import types
+from unittest import mock
+
+from graal.backends.core.analyzers.bandit import Bandit
+from graal.backends.core.analyzers.cloc import Cloc
+from graal.backends.core.analyzers.flake8 import Flake8
+from graal.backends.core.analyzers.nomos import Nomos
+from graal.backends.core.analyzers.pylint import PyLint
+from graal.backends.core.analyzers.scancode import ScanCode
+from graal.backends.core.analyzers.scc import SCC
+
+from .backends import STATUS_FAILED, STATUS_OK
+
+# Path of the analyzed repository in the outputs of the corpus
+REPOSITORY_PATH = '/tmp/graal-benchmark'
+
+CORPUS_SUFFIX = '.out'
+
+LANGUAGES = ['Python', 'Java', 'C', 'JavaScript', 'Go']
+
+logger = logging.getLogger(__name__)
+
+
+def _file_path(i, ext='py'):
+    return '%s/synthetic/pkg%s/module%s.%s' % (REPOSITORY_PATH, i % 100, i, ext)
+
+
+def _cloc_repository_output(size):
+    rule = '-' * 79
+    lines = ['github.com/AlDanial/cloc v 1.90  T=0.50 s (2000.0 files/s, 200000.0 lines/s)',
+             rule,
+             'Language                     files          blank        comment           code',
+             rule]
+    for i in range(size):
+        lines.append('%-24s %9d %14d %14d %14d' % ('Language %s' % i, i + 1, i * 10, i * 5, i * 100))
+    lines += [rule,
+              'SUM: %24d %14d %14d %14d' % (size, size * 10, size * 5, size * 100),
+              rule]
+
+    return '\n'.join(lines) + '\n'
+
+
+def _cloc_files_output(size):
+    document = {'header': {'cloc_url': 'github.com/AlDanial/cloc', 'cloc_version': '1.90',
+                           'n_files': size, 'n_lines': size * 115}}
+    for i in range(size):
+        document[_file_path(i)] = {'blank': 10, 'comment': 5, 'code': 100, 'language': 'Python'}
+    document['SUM'] = {'blank': size * 10, 'comment': size * 5, 'code': size * 100, 'nFiles': size}
+
+    return json.dumps(document, indent=2) + '\n'
+
+
+def _scc_output(size):
+    languages = []
+    for n, name in enumerate(LANGUAGES):
+        files = []
+        for i in range(n, size, len(LANGUAGES)):
+            files.append({'Language': name, 'PossibleLanguages': [name], 'Filename': 'module%s' % i,
+                          'Extension': 'ext', 'Location': _file_path(i, 'ext'), 'Symlocation': '',
+                          'Bytes': 4000, 'Lines': 115, 'Code': 100, 'Comment': 5, 'Blank': 10,
+                          'Complexity': 12, 'WeightedComplexity': 0, 'Hash': None, 'Binary': False,
+                          'Minified': False, 'Generated': False, 'EndPoint': 0})
+        languages.append({'Name': name, 'Bytes': 4000 * len(files), 'CodeBytes': 0, 'Lines': 115 * len(files),
+                          'Code': 100 * len(files), 'Comment': 5 * len(files), 'Blank': 10 * len(files),
+                          'Complexity': 12 * len(files), 'Count': len(files), 'WeightedComplexity': 0,
+                          'Files': files})
+
+    return json.dumps(languages) + '\n'
+
+
+def _bandit_output(size):
+    lines = ['Run started:2020-01-01 00:00:00.000000', '', 'Test results:']
+    for i in range(size):
+        lines += ['>> Issue: [B101:assert_used] Use of assert detected. The enclosed code will be removed '
+                  'when compiling to optimised byte code.',
+                  '   Severity: %s   Confidence: High' % ['Low', 'Medium', 'High'][i % 3],
+                  '   CWE: CWE-703 (https://cwe.mitre.org/data/definitions/703.html)',
+                  '   More Info: https://bandit.readthedocs.io/en/latest/plugins/b101_assert_used.html',
+                  '   Location: %s:%s' % (_file_path(i % 1000), i % 500 + 1),
+                  '%s\t    value = compute(value)' % (i % 500),
+                  '%s\t    assert value > 0' % (i % 500 + 1),
+                  '%s\t    return value' % (i % 500 + 2),
+                  '',
+                  '-' * 50]
+    lines += ['',
+              'Code scanned:',
+              '\tTotal lines of code: %s' % (size * 50),
+              '\tTotal lines skipped (#nosec): 0',
+              '',
+              'Run metrics:',
+              '\tTotal issues (by severity):',
+              '\t\tUndefined: 0',
+              '\t\tLow: %s' % size,
+              'Files skipped (0):']
+
+    return '\n'.join(lines) + '\n'
+
+
+def _pylint_output(size):
+    lines = []
+    for i in range(size):
+        if i % 20 == 0:
+            lines.append('************* Module synthetic.pkg%s.module%s' % (i % 100, i // 20))
+        lines.append('%s:%s:0: C0116: Missing function or method docstring (missing-function-docstring)'
+                     % (_file_path(i // 20), i % 500 + 1))
+    lines += ['',
+              '-' * 66,
+              'Your code has been rated at 7.50/10',
+              '']
+
+    return '\n'.join(lines) + '\n'
+
+
+def _flake8_output(size):
+    lines = ["'%s::%s::80::E501::line too long (100 > 79 characters)'" % (_file_path(i // 20), i % 500 + 1)
+             for i in range(size)]
+
+    return '\n'.join(lines) + '\n'
+
+
+def _nomos_output(size):
+    licenses = ','.join('License-%s' % i for i in range(size))
+
+    return 'File module0.py contains license(s) %s\n' % licenses
+
+
+def _scancode_cli_output(size):
+    documents = []
+    for i in range(size):
+        license = {'key': 'gpl-3.0-plus', 'score': 100.0, 'name': 'GNU General Public License 3.0 or later',
+                   'short_name': 'GPL 3.0 or later', 'category': 'Copyleft', 'is_exception': False,
+                   'owner': 'Free Software Foundation (FSF)', 'homepage_url': 'http://www.gnu.org/licenses/gpl-3.0.html',
+                   'spdx_license_key': 'GPL-3.0-or-later', 'start_line': 6, 'end_line': 17,
+                   'matched_rule': {'identifier': 'gpl-3.0-plus_117.RULE', 'license_expression': 'gpl-3.0-plus',
+                                    'licenses': ['gpl-3.0-plus'], 'is_license_notice': True,
+                                    'matcher': '2-aho', 'rule_length': 102, 'matched_length': 102,
+                                    'match_coverage': 100.0, 'rule_relevance': 100}}
+        file_info = {'path': _file_path(i), 'type': 'file', 'licenses': [license],
+                     'license_expressions': ['gpl-3.0-plus'],
+                     'copyrights': [{'value': 'Copyright (c) 2015-2020 Bitergia', 'start_line': 4, 'end_line': 4}],
+                     'holders': [{'value': 'Bitergia', 'start_line': 4, 'end_line': 4}],
+                     'authors': [], 'scan_errors': []}
+        document = [{'headers': [{'tool_name': 'scancode-toolkit', 'tool_version': '3.1.1'}]},
+                    {'files': [file_info]}]
+        documents.append(json.dumps(document, indent=2))
+
+    return '\n\n'.join(documents) + '\n'
+
+
+class RecordedProcess:
+    """Process whose standard output is a recorded output, read as from a pipe.
+
+    :param data: the output, as bytes
+    :param encoding: encoding of the output; if not set, it is read as bytes
+    """
+    def __init__(self, data, encoding=None):
+        self.stdout = io.BytesIO(data)
+        if encoding:
+            self.stdout = io.TextIOWrapper(self.stdout, encoding=encoding)
+        self.returncode = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stdout.close()
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+class Parser:
+    """Parser of the output of a tool, benchmarked with a recorded output.
+
+    :param name: name of the parser
+    :param output: function returning an output of the tool with the given
+        number of records (e.g., issues, files, or languages)
+    :param size: default number of records of the output
+    :param analyzer: function returning the analyzer that runs the parser
+    :param params: function returning the arguments of the method `analyze`
+        for a given output
+    """
+    def __init__(self, name, output, size, analyzer, params):
+        self.name = name
+        self.output = output
+        self.size = size
+        self.analyzer = analyzer
+        self.params = params
+
+
+def _cloc_files_params(output):
+    document = json.loads(output[output.find('{'):])
+    file_paths = [k for k in document if k not in ['header', 'SUM']]
+
+    return {'file_paths': file_paths}
+
+
+PARSERS = [
+    Parser('cloc_repository', _cloc_repository_output, 1000, Cloc,
+           lambda output: {'file_paths': [REPOSITORY_PATH], 'repository_level': True}),
+    Parser('cloc_files', _cloc_files_output, 20000, Cloc, _cloc_files_params),
+    Parser('scc_repository', _scc_output, 20000, SCC,
+           lambda output: {'repository_path': REPOSITORY_PATH, 'repository_level': True}),
+    Parser('scc_repository_files', _scc_output, 20000, SCC,
+           lambda output: {'repository_path': REPOSITORY_PATH, 'repository_level': True, 'by_file': True,
+                           'files_affected': ['synthetic/pkg%s/module%s.ext' % (i, i) for i in range(10)]}),
+    Parser('bandit', _bandit_output, 20000, Bandit,
+           lambda output: {'folder_path': REPOSITORY_PATH, 'details': True}),
+    Parser('pylint', _pylint_output, 50000, PyLint,
+           lambda output: {'module_path': REPOSITORY_PATH + '/synthetic', 'details': True}),
+    Parser('flake8', _flake8_output, 50000, Flake8,
+           lambda output: {'module_path': REPOSITORY_PATH + '/synthetic', 'worktree_path': REPOSITORY_PATH,
+                           'details': True}),
+    Parser('nomos', _nomos_output, 5000, lambda: Nomos(__file__),
+           lambda output: {'file_path': _file_path(0)}),
+    Parser('scancode_cli', _scancode_cli_output, 5000, lambda: ScanCode(__file__, cli=True),
+           lambda output: {'file_paths': [_file_path(0)]})
+]
+
+
+def select_parsers(patterns=None):
+    """Select the parsers whose name starts with any of the patterns
+
+    :param patterns: list of prefixes of the names; if empty, all
+        the parsers are selected
+    """
+    if not patterns:
+        return list(PARSERS)
+
+    return [p for p in PARSERS if any(p.name.startswith(pattern) for pattern in patterns)]
+
+
+def write_corpus(path, parsers=None, scale=1.0):
+    """Write a corpus of outputs of the tools.
+
+    Each output is written in the file `<parser name>.out`. These
+    files can be replaced with outputs recorded from real runs of
+    the tools, as long as they are consistent with the parameters
+    of the parsers (e.g., the paths of the repository).
+
+    :param path: directory of the corpus
+    :param parsers: list of parsers; by default, all of them
+    :param scale: factor applied to the default sizes of the outputs
+    """
+    os.makedirs(path, exist_ok=True)
+
+    for parser in parsers or PARSERS:
+        size = max(1, int(parser.size * scale))
+        with open(os.path.join(path, parser.name + CORPUS_SUFFIX), 'w') as fd:
+            fd.write(parser.output(size))
+
+
+def load_output(parser, corpus_path=None, scale=1.0):
+    """Get the output to benchmark a parser.
+
+    :param parser: a Parser object
+    :param corpus_path: directory of a corpus; if not set or the output
+        of the parser is not there, the output is generated
+    :param scale: factor applied to the default size of the output, when
+        it is generated
+    """
+    if corpus_path:
+        output_path = os.path.join(corpus_path, parser.name + CORPUS_SUFFIX)
+        if os.path.exists(output_path):
+            with open(output_path) as fd:
+                return fd.read()
+
+    return parser.output(max(1, int(parser.size * scale)))
+
+
+def run_parser(parser, output, repeat=5):
+    """Measure the time and the peak of memory spent by a parser on an output.
+
+    The tool is not executed: the call to the tool made by the
+    analyzer returns the given output, either at once or through
+    a pipe, so only the parsing is measured, together with the
+    decoding of the output. The time
+    is the one of the fastest of `repeat` runs. The peak of memory
+    is measured on another run, with `tracemalloc`.
+
+    :param parser: a Parser object
+    :param output: the output of the tool, as a string
+    :param repeat: number of timed runs
+
+    :returns: a dict with the results
+    """
+    data = output.encode('utf-8')
+    result = {
+        'name': parser.name,
+        'output_bytes': len(data),
+        'output_lines': output.count('\n')
+    }
+
+    try:
+        with mock.patch('subprocess.check_output', return_value=data), \
+                mock.patch('subprocess.Popen', side_effect=lambda *args, **kwargs: _recorded_process(data, kwargs)):
+            analyzer = parser.analyzer()
+            params = parser.params(output)
+
+            walls = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _consume(analyzer.analyze(**params))
+                walls.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            try:
+                _consume(analyzer.analyze(**params))
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        result['status'] = STATUS_FAILED
+        result['reason'] = "%s: %s" % (type(e).__name__, e)
+        logger.warning("Parser %s failed, %s", parser.name, result['reason'])
+        return result
+
+    wall = min(walls)
+    result.update({
+        'status': STATUS_OK,
+        'wall': wall,
+        'walls': walls,
+        'megabytes_per_second': len(data) / wall / 1000000 if wall else None,
+        'peak_memory': peak_memory
+    })
+
+    logger.info("Parser %s: %s bytes in %.3fs", parser.name, len(data), wall)
+
+    return result
+
+
+def _consume(result):
+    """Read the results of the analyzers which return them as a generator"""
+
+    if isinstance(result, types.GeneratorType):
+        for _ in result:
+            pass
+
+
+def _recorded_process(data, kwargs):
+    encoding = kwargs.get('encoding') or ('utf-8' if kwargs.get('text') or kwargs.get('universal_newlines') else None)
+    return RecordedProcess(data, encoding=encoding)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import platform
+
+from grimoirelab_toolkit.datetime import datetime_utcnow
+
+from graal._version import __version__
+
+# Changes of the wall time below this ratio are not reported as regressions
+DEFAULT_THRESHOLD = 0.1
+
+
+def save_results(path, suite, results, **extra):
+    """Save the results of a suite of benchmarks as a JSON document.
+
+    Besides the results, the document includes the versions of Graal
+    and Python and the platform where the benchmarks were run, so
+    results of different versions can be compared.
+
+    :param path: path of the file
+    :param suite: name of the suite of benchmarks
+    :param results: list of results, as dicts with a unique `name`
+    :param extra: other data of the suite, such as the parameters
+        of the repository analyzed
+    """
+    document = {
+        'suite': suite,
+        'graal_version': __version__,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime_utcnow().isoformat(),
+        'results': results
+    }
+    document.update(extra)
+
+    with open(path, 'w') as fd:
+        json.dump(document, fd, indent=4, sort_keys=True)
+
+
+def load_results(path):
+    """Load the results saved with `save_results`"""
+
+    with open(path) as fd:
+        return json.load(fd)
+
+
+def compare_results(old, new, metric='wall', threshold=DEFAULT_THRESHOLD):
+    """Compare the results of two runs of a suite of benchmarks.
+
+    The results are matched by name; those which are not in both
+    runs or which were not run successfully are ignored.
+
+    :param old: document with the baseline results
+    :param new: document with the new results
+    :param metric: name of the metric to compare; lower values are better
+    :param threshold: minimum relative change reported as a regression
+        or as an improvement
+
+    :returns: a list of dicts with the name, the old and new values,
+        the relative change and whether it is a regression
+    """
+    old_results = {r['name']: r for r in old['results'] if r.get(metric) is not None}
+
+    comparison = []
+    for result in new['results']:
+        baseline = old_results.get(result['name'])
+        if not baseline or result.get(metric) is None:
+            continue
+
+        old_value = baseline[metric]
+        new_value = result[metric]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+
+        comparison.append({
+            'name': result['name'],
+            'old': old_value,
+            'new': new_value,
+            'change': change,
+            'regression': change > threshold,
+            'improvement': change < -threshold
+        })
+
+    return comparison
+
+
+def format_comparison(comparison):
+    """Format a comparison as a text table"""
+
+    width = max([len(c['name']) for c in comparison] + [len('benchmark')])
+    lines = ['%-*s %12s %12s %9s' % (width, 'benchmark', 'old', 'new', 'change')]
+
+    for c in comparison:
+        flag = ' <' if c['regression'] else ''
+        lines.append('%-*s %12.4f %12.4f %+8.1f%%%s' % (width, c['name'], c['old'], c['new'],
+                                                        c['change'] * 100, flag))
+
+    return '\n'.join(lines)
@@ -21,6 +21,13 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import contextlib
+import functools
+import types
+
+from graal.stats import (STAGE_ANALYZER,
+                         measure)
+
 
 class Analyzer:
     """Abstract class for analyzer.
@@ -28,12 +35,42 @@ class Analyzer:
     Base class to perform analysis on software artifacts.
 
     Derivated classes have to implement the method
-    `analyze(self, **kwargs)`.
+    `analyze(self, **kwargs)`. Its executions are measured
+    as the stage `analyzer:<class name>` when the stats of
+    the analysis are enabled (see `graal.stats`). When `analyze`
+    returns a generator, the stage lasts until the generator
+    is exhausted or closed.
 
     :raises NotImplementedError: raised when `analyze`
         is not defined
     """
     version = '0.1.0'
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if 'analyze' in cls.__dict__:
+            cls.analyze = _measure_analyze(cls.analyze, STAGE_ANALYZER + cls.__name__)
+
     def analyze(self, **kwargs):
         raise NotImplementedError
+
+
+def _measure_analyze(analyze, stage):
+    @functools.wraps(analyze)
+    def wrapper(self, *args, **kwargs):
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(measure(stage))
+            result = analyze(self, *args, **kwargs)
+
+            if isinstance(result, types.GeneratorType):
+                return _measure_generator(result, stack.pop_all())
+
+            return result
+
+    return wrapper
+
+
+def _measure_generator(results, stage_context):
+    with stage_context:
+        yield from results
@@ -40,15 +40,23 @@ class Bandit(Analyzer):
         """Add security issue data using Bandit.
 
         :param folder_path: folder path
+        :param file_paths: list of files of the folder to analyze; if set, only
+            these files are analyzed, instead of the whole folder
         :param details: if True, it returns information about single vulnerabilities
 
         :returns result: dict of the results of the analysis
         """
         folder_path = kwargs['folder_path']
+        file_paths = kwargs.get('file_paths', None)
         details = kwargs['details']
 
+        if file_paths is not None:
+            bandit_command = ['bandit'] + file_paths
+        else:
+            bandit_command = ['bandit', '-r', folder_path]
+
         try:
-            msg = subprocess.check_output(['bandit', '-r', folder_path]).decode("utf-8")
+            msg = subprocess.check_output(bandit_command).decode("utf-8")
         except subprocess.CalledProcessError as e:
             msg = e.output.decode("utf-8")
             if not msg.startswith("Run started:"):
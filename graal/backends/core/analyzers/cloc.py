@@ -21,7 +21,10 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import json
+import os
 import subprocess
+import tempfile
 
 from graal.graal import (GraalError,
                          GraalRepository)
@@ -35,6 +38,9 @@ class Cloc(Analyzer):
 
     This class allows to call Cloc over a file, parses
     the result of the analysis and returns it as a dict.
+    A list of files can be analyzed with a single call to
+    Cloc, which returns the results of each file or, at
+    repository level, the results of each language.
 
     :param diff_timeout: max time to compute diffs of a given file
     """
@@ -73,6 +79,31 @@ class Cloc(Analyzer):
 
         return results
 
+    def __analyze_files(self, message, file_paths):
+        """Add information about LOC, blank and commented lines using CLOC for a list of files
+
+        :param message: JSON document from standard output after execution of cloc
+        :param file_paths: list of the file paths analyzed
+
+        :returns result: dict of the results of the analysis for each file path
+        """
+        start = message.find('{')
+        by_file = json.loads(message[start:]) if start >= 0 else {}
+        by_file = {os.path.normpath(k): v for k, v in by_file.items() if k not in ['header', 'SUM']}
+
+        results = {}
+        for file_path in file_paths:
+            # files whose language is not recognized are not reported
+            file_info = by_file.get(os.path.normpath(file_path), {})
+            results[file_path] = {
+                "blanks": file_info.get("blank", 0),
+                "comments": file_info.get("comment", 0),
+                "loc": file_info.get("code", 0),
+                "ext": GraalRepository.extension(file_path)
+            }
+
+        return results
+
     def __analyze_repository(self, message):
         """Add information LOC, total files, blank and commented lines using CLOC for the entire repository
 
@@ -106,21 +137,99 @@ class Cloc(Analyzer):
 
         return results
 
+    def __run_files(self, file_paths, by_file=True):
+        """Run CLOC once over a list of files, passing them through a list file"""
+
+        list_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
+        try:
+            with list_file:
+                for file_path in file_paths:
+                    list_file.write(file_path + '\n')
+
+            if by_file:
+                cloc_command = ['cloc', '--list-file=' + list_file.name, '--by-file', '--json',
+                                '--skip-uniqueness', '--quiet', '--diff-timeout', str(self.diff_timeout)]
+            else:
+                cloc_command = ['cloc', '--list-file=' + list_file.name, '--diff-timeout', str(self.diff_timeout)]
+            message = subprocess.check_output(cloc_command).decode("utf-8")
+        except subprocess.CalledProcessError as e:
+            raise GraalError(cause="Cloc failed at %s, %s" % (list_file.name, e.output.decode("utf-8")))
+        finally:
+            os.remove(list_file.name)
+            subprocess._cleanup()
+
+        return message
+
+    def __analyze_contents(self, file_paths, contents):
+        """Run CLOC once over the contents of a list of files, writing them
+        to a temporary directory with the name of each file, which is used
+        by CLOC to detect the language. The files without content are read
+        from their path."""
+
+        with tempfile.TemporaryDirectory(prefix='graal_cloc_') as dir_path:
+            paths = []
+            for i, (file_path, content) in enumerate(zip(file_paths, contents)):
+                if content is None:
+                    paths.append(file_path)
+                    continue
+
+                path = os.path.join(dir_path, str(i), os.path.basename(file_path))
+                os.mkdir(os.path.dirname(path))
+                with open(path, 'wb') as fd:
+                    fd.write(content)
+                paths.append(path)
+
+            # the list file cannot contain paths with line breaks
+            to_analyze = [f for f in paths if '\n' not in f]
+            message = self.__run_files(to_analyze) if to_analyze else ''
+            results = self.__analyze_files(message, paths)
+
+        # the extension of the files without one is their path
+        return {file_path: dict(results[path], ext=GraalRepository.extension(file_path))
+                for file_path, path in zip(file_paths, paths)}
+
     def analyze(self, **kwargs):
         """Add information using CLOC
 
+        When `file_paths` is set, CLOC is executed once over all the
+        files and the results are returned for each one of them, or
+        for each language if `repository_level` is set.
+
         :param file_path: file path
+        :param file_paths: list of file paths, to analyze them at once
+        :param contents: list of the contents of `file_paths` as bytes (None for the
+            files to read from disk), which are written to a temporary directory
+        :param content: the content of the file as bytes; if set, it is passed to CLOC
+            through the standard input and `file_path` is only used to detect the language
         :param repository_level: set to True if analysis has to be performed on a repository
 
         :returns result: dict of the results of the analysis
         """
 
-        file_path = kwargs['file_path']
+        file_paths = kwargs.get('file_paths', None)
         repository_level = kwargs.get('repository_level', False)
 
+        if file_paths is not None:
+            contents = kwargs.get('contents', None)
+            if contents is not None:
+                return self.__analyze_contents(file_paths, contents)
+
+            # the list file cannot contain paths with line breaks
+            to_analyze = [f for f in file_paths if '\n' not in f]
+            message = self.__run_files(to_analyze, by_file=not repository_level) if to_analyze else ''
+            if repository_level:
+                return self.__analyze_repository(message)
+            return self.__analyze_files(message, file_paths)
+
+        file_path = kwargs['file_path']
+        content = kwargs.get('content', None)
+
         try:
-            cloc_command = ['cloc', file_path, '--diff-timeout', str(self.diff_timeout)]
-            message = subprocess.check_output(cloc_command).decode("utf-8")
+            if content is not None:
+                cloc_command = ['cloc', '--stdin-name=' + file_path, '-', '--diff-timeout', str(self.diff_timeout)]
+            else:
+                cloc_command = ['cloc', file_path, '--diff-timeout', str(self.diff_timeout)]
+            message = subprocess.check_output(cloc_command, input=content).decode("utf-8")
         except subprocess.CalledProcessError as e:
             raise GraalError(cause="Cloc failed at %s, %s" % (file_path, e.output.decode("utf-8")))
         finally:
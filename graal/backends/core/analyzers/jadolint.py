@@ -20,6 +20,7 @@
 #     Valerio Cosentino <valcos@bitergia.com>
 #
 
+import os
 import subprocess
 
 from graal.graal import (GraalError,
@@ -72,3 +73,34 @@ class Jadolint(Analyzer):
                 results.append(res)
 
         return result
+
+
+def analyze_cached(jadolint, file_path, cache=None, worktree_path=None):
+    """Analyze a Dockerfile with Jadolint, reusing the results of identical files.
+
+    Jadolint results may include the path of the file, so the key of the
+    cache uses its path relative to the worktree, which is replaced in
+    the results stored in the cache.
+
+    :param jadolint: a Jadolint object
+    :param file_path: path of the target file
+    :param cache: an AnalysisCache to reuse the results obtained on identical files
+    :param worktree_path: worktree path
+
+    :returns: the results of the analysis
+    """
+    kwargs = {'file_path': file_path}
+
+    if not cache:
+        return jadolint.analyze(**kwargs)
+
+    name = os.path.relpath(file_path, worktree_path) if worktree_path else file_path
+    key = cache.key(GraalRepository.blob_hash(file_path), name,
+                    jadolint.__class__.__name__, jadolint.version, jadolint.analysis)
+    analysis = cache.get(key, worktree_path)
+
+    if analysis is None:
+        analysis = jadolint.analyze(**kwargs)
+        cache.set(key, analysis, worktree_path)
+
+    return analysis
@@ -21,12 +21,63 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import multiprocessing
 import warnings
 
-import lizard
 from graal.backends.core.analyzers.cloc import Cloc
 from .analyzer import Analyzer
 
+DEFAULT_THREADS = 1
+
+# Min number of files per process to analyze them with a pool of
+# processes, since starting the pool costs more than analyzing a few
+# files (e.g., the ones changed by a commit, when the rest are reused)
+MIN_FILES_PER_PROCESS = 8
+
+
+def _lizard():
+    """Get the module `lizard`, which is slow to load, so it is
+    imported the first time it is needed"""
+
+    import lizard
+
+    return lizard
+
+
+def count_lines_extension(tokens, reader):
+    """Lizard extension to classify the lines of a file.
+
+    It receives the tokens before any other extension and records,
+    in the file information, the lines containing code and the ones
+    containing comments, as well as the total number of lines.
+    Following CLOC, Python triple-quoted strings are considered
+    comments.
+    """
+    fileinfo = reader.context.fileinfo
+    fileinfo.code_lines = set()
+    fileinfo.comment_lines = set()
+    fileinfo.lines = 0
+
+    docstrings = 'python' in getattr(reader, 'language_names', [])
+    line = 1
+
+    for token in tokens:
+        if not token.isspace():
+            if reader.get_comment_from_token(token) is not None or \
+                    (docstrings and token.startswith(('"""', "'''"))):
+                lines = fileinfo.comment_lines
+            else:
+                lines = fileinfo.code_lines
+
+            # lines of multi-line tokens containing only spaces are blank
+            for i, segment in enumerate(token.split('\n')):
+                if segment.strip():
+                    lines.add(line + i)
+
+        line += token.count('\n')
+        fileinfo.lines = line - 1 if token.endswith('\n') else line
+        yield token
+
 
 class Lizard(Analyzer):
     """A wrapper for Lizard, a code complexity analyzer, which is able
@@ -45,10 +96,22 @@ class Lizard(Analyzer):
         GDScript
         Golang
         Lua
+
+    The results of the last repository-level analysis are kept,
+    so that the files with the same content in the next analysis
+    are not analyzed again.
+
+    When `count_lines` is passed to `analyze`, the blank and comment
+    lines are counted while Lizard processes the tokens of the files
+    (see `count_lines_extension`), instead of running CLOC.
     """
     version = '0.3.1'
 
-    def __analyze_file(self, file_path, details):
+    def __init__(self):
+        # results of the files of the last repository analysis, by path
+        self.last_analysis = {}
+
+    def __analyze_file(self, file_path, details, content=None, count_lines=False):
         """Add code complexity information for a file using Lizard.
 
         Current information includes cyclomatic complexity (ccn),
@@ -58,15 +121,22 @@ class Lizard(Analyzer):
 
         :param file_path: file path
         :param details: if True, it returns information about single functions
+        :param content: the content of the file as bytes; if set, the file
+            is not read from disk and `file_path` is only used to detect the language
+        :param count_lines: if True, it returns also the number of blank and comment lines
 
         :returns  result: dict of the results of the analysis
         """
         result = {}
+        file_analyzer = self.__file_analyzer(count_lines)
 
-        # Filter DeprecationWarning from lizard_ext/auto_open.py line 26
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", category=DeprecationWarning)
-            analysis = lizard.analyze_file(file_path)
+        if content is not None:
+            analysis = self.__analyze_source_code(file_analyzer, file_path, content)
+        else:
+            # Filter DeprecationWarning from lizard_ext/auto_open.py line 26
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=DeprecationWarning)
+                analysis = file_analyzer(file_path)
 
         result['ccn'] = analysis.CCN
         result['avg_ccn'] = analysis.average_cyclomatic_complexity
@@ -77,49 +147,121 @@ class Lizard(Analyzer):
         result['tokens'] = analysis.token_count
         result['ext'] = file_path.split(".")[-1]
 
-        if not details:
-            return result
-
-        funs_data = []
-        for fun in analysis.function_list:
-            fun_data = {'ccn': fun.cyclomatic_complexity,
-                        'tokens': fun.token_count,
-                        'loc': fun.nloc,
-                        'lines': fun.length,
-                        'name': fun.name,
-                        'args': fun.parameter_count,
-                        'start': fun.start_line,
-                        'end': fun.end_line}
-            funs_data.append(fun_data)
-
-        result['funs'] = funs_data
+        if details:
+            funs_data = []
+            for fun in analysis.function_list:
+                fun_data = {'ccn': fun.cyclomatic_complexity,
+                            'tokens': fun.token_count,
+                            'loc': fun.nloc,
+                            'lines': fun.length,
+                            'name': fun.name,
+                            'args': fun.parameter_count,
+                            'start': fun.start_line,
+                            'end': fun.end_line}
+                funs_data.append(fun_data)
+
+            result['funs'] = funs_data
+
+        if count_lines:
+            result['blanks'], result['comments'] = self.__blanks_comments(analysis)
+
         return result
 
-    def __analyze_repository(self, repository_path, files_affected, details):
+    @staticmethod
+    def __file_analyzer(count_lines=False):
+        lizard = _lizard()
+
+        if not count_lines:
+            return lizard.analyze_file
+
+        return lizard.FileAnalyzer([count_lines_extension] + lizard.get_extensions([]))
+
+    @staticmethod
+    def __blanks_comments(analysis):
+        """Get the number of blank and comment lines recorded by `count_lines_extension`.
+        Lines containing both code and comments are code lines."""
+
+        if not hasattr(analysis, 'lines'):
+            # the file could not be read
+            return 0, 0
+
+        comments = analysis.comment_lines - analysis.code_lines
+        blanks = analysis.lines - len(analysis.comment_lines | analysis.code_lines)
+
+        return blanks, len(comments)
+
+    @staticmethod
+    def __analyze_source_code(file_analyzer, file_path, content):
+        """Analyze the content of a file already in memory, decoding
+        it as `lizard.analyze_file` does when reading it from disk"""
+
+        lizard = _lizard()
+
+        try:
+            code = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return lizard.FileInformation(file_path, 0, [])
+
+        # universal newlines, as done when opening the file in text mode
+        code = code.replace('\r\n', '\n').replace('\r', '\n')
+
+        return file_analyzer.analyze_source_code(file_path, code)
+
+    def __analyze_repository(self, repository_path, files_affected, details,
+                             file_hashes=None, threads=DEFAULT_THREADS, count_lines=False):
         """Add code complexity information for a given repository
         using Lizard and CLOC.
 
         Current information includes cyclomatic complexity (ccn),
         lines of code, number of functions, tokens, blanks and comments.
 
+        When the hashes of the files are given, the results of the files
+        whose hash did not change since the last analysis are reused.
+
         :param repository_path: repository path
+        :param files_affected: the files of the repository modified by the commit
         :param details: if True, it returns fine-grained results
+        :param file_hashes: dict with the Git blob hash of the files, by path
+            relative to `repository_path`
+        :param threads: number of processes used to run Lizard
+        :param count_lines: if True, blank and comment lines are counted by Lizard instead of CLOC
 
         :returns  result: list of the results of the analysis
         """
-        analysis_result = []
+        lizard = _lizard()
+
+        file_hashes = file_hashes or {}
+        last_analysis = {}
+
+        source_files = list(lizard.get_all_source_files([repository_path], [], None))
+        file_paths = [f.replace(repository_path + "/", '') for f in source_files]
+
+        to_analyze = []
+        for source_file, file_path in zip(source_files, file_paths):
+            file_hash = file_hashes.get(file_path, None)
+            last_hash, result = self.last_analysis.get(file_path, (None, None))
 
-        repository_analysis = lizard.analyze(
-            paths=[repository_path],
-            threads=1,
-            exts=lizard.get_extensions([]),
-        )
-        cloc = Cloc()
+            if file_hash and file_hash == last_hash:
+                last_analysis[file_path] = (file_hash, result)
+            else:
+                to_analyze.append((source_file, file_path, file_hash))
 
-        for analysis in repository_analysis:
-            cloc_analysis = cloc.analyze(file_path=analysis.filename)
-            file_path = analysis.filename.replace(repository_path + "/", '')
-            in_commit = True if file_path in files_affected else False
+        repository_analysis = self.__analyze_files([f[0] for f in to_analyze], threads, count_lines)
+
+        if count_lines:
+            cloc_analyses = {}
+            for (source_file, _, _), analysis in zip(to_analyze, repository_analysis):
+                blanks, comments = self.__blanks_comments(analysis)
+                cloc_analyses[source_file] = {'blanks': blanks, 'comments': comments}
+        elif to_analyze:
+            # CLOC is executed once for all the files analyzed by Lizard
+            cloc = Cloc()
+            cloc_analyses = cloc.analyze(file_paths=[f[0] for f in to_analyze])
+        else:
+            cloc_analyses = {}
+
+        for (source_file, file_path, file_hash), analysis in zip(to_analyze, repository_analysis):
+            cloc_analysis = cloc_analyses[source_file]
 
             result = {
                 'loc': analysis.nloc,
@@ -127,21 +269,55 @@ class Lizard(Analyzer):
                 'tokens': analysis.token_count,
                 'num_funs': len(analysis.function_list),
                 'file_path': file_path,
-                'in_commit': in_commit,
+                'in_commit': False,
                 'blanks': cloc_analysis['blanks'],
                 'comments': cloc_analysis['comments']
             }
+            last_analysis[file_path] = (file_hash, result)
+
+        analysis_result = []
+        for file_path in file_paths:
+            _, result = last_analysis[file_path]
+
+            result = dict(result)
+            result['in_commit'] = True if file_path in files_affected else False
             analysis_result.append(result)
 
+        # only the results of files with a known hash can be reused
+        self.last_analysis = {k: v for k, v in last_analysis.items() if v[0]}
+
         # TODO: implement details option
 
         return analysis_result
 
+    @staticmethod
+    def __analyze_files(file_paths, threads, count_lines=False):
+        """Run Lizard on a list of files, returning the results in the same order"""
+
+        lizard = _lizard()
+
+        exts = lizard.get_extensions([])
+        if count_lines:
+            exts = [count_lines_extension] + exts
+
+        if threads > 1 and len(file_paths) >= threads * MIN_FILES_PER_PROCESS:
+            chunksize = max(1, len(file_paths) // (threads * 4))
+            with multiprocessing.Pool(processes=threads) as pool:
+                return pool.map(lizard.FileAnalyzer(exts), file_paths, chunksize=chunksize)
+
+        return list(lizard.analyze_files(file_paths, threads=1, exts=exts))
+
     def analyze(self, **kwargs):
         """Add code complexity information using Lizard.
 
         :param file_path: file path
+        :param content: the content of the file as bytes, to analyze it without reading `file_path`
         :param repository_path: repository path
+        :param files_affected: the files of the repository modified by the commit
+        :param file_hashes: the Git blob hash of the files of the repository, to reuse
+            the results of the unchanged files
+        :param threads: number of processes used to analyze the repository
+        :param count_lines: if True, the blank and comment lines are counted by Lizard
         :param details: if True, it returns detailed information about an analysis
 
         :returns  result: the results of the analysis
@@ -151,8 +327,12 @@ class Lizard(Analyzer):
 
         if kwargs.get('repository_level', False):
             files_affected = kwargs['files_affected']
-            result = self.__analyze_repository(kwargs["repository_path"], files_affected, details)
+            result = self.__analyze_repository(kwargs["repository_path"], files_affected, details,
+                                               file_hashes=kwargs.get('file_hashes', None),
+                                               threads=kwargs.get('threads', DEFAULT_THREADS),
+                                               count_lines=kwargs.get('count_lines', False))
         else:
-            result = self.__analyze_file(kwargs['file_path'], details)
+            result = self.__analyze_file(kwargs['file_path'], details, kwargs.get('content', None),
+                                         count_lines=kwargs.get('count_lines', False))
 
         return result
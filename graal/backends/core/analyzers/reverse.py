@@ -25,10 +25,6 @@ import os
 import subprocess
 import tempfile
 
-import networkx as nx
-from networkx.drawing.nx_pydot import read_dot
-from networkx.readwrite import json_graph
-
 from graal.graal import GraalError
 from .analyzer import Analyzer
 
@@ -75,6 +71,11 @@ class Reverse(Analyzer):
         return result
 
     def __dotfile2json(self, dot_file):
+        # networkx is slow to import, it is loaded only when needed
+        import networkx as nx
+        from networkx.drawing.nx_pydot import read_dot
+        from networkx.readwrite import json_graph
+
         g = nx.Graph(read_dot(dot_file))
         json_data = json_graph.node_link_data(g)
 
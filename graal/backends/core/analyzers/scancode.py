@@ -23,6 +23,7 @@
 
 import json
 import subprocess
+import tempfile
 from graal.graal import (GraalError,
                          GraalRepository)
 from .analyzer import Analyzer
@@ -79,43 +80,49 @@ class ScanCode(Analyzer):
         return result
 
     def __analyze_scancode_cli(self, file_paths):
-        """Add information about license using scancode-cli
+        """Run scancode-cli and yield the results of each file as soon as they are read.
+
+        scancode-cli writes a JSON document for each file, followed by
+        a blank line. The output is read line by line from the pipe, so
+        only the lines of the current document are kept in memory. The
+        exit status of scancode-cli is checked once the generator is
+        exhausted.
 
         :param file_paths: file paths (in case of scancode_cli for concurrent execution on files)
-        :returns result: list of the results of the analysis
         """
-        result = []
-
-        try:
-            cmd_scancli = ['python3', self.exec_path]
-            cmd_scancli.extend(file_paths)
-            msg = subprocess.check_output(cmd_scancli).decode("utf-8")
-        except subprocess.CalledProcessError as e:
-            raise GraalError(cause="Scancode failed at %s, %s" % (file_paths,
-                                                                  e.output.decode("utf-8")))
-        finally:
-            subprocess._cleanup()
-
-        output_content = ''
-        outputs_json = []
-        for line in msg.split('\n'):
-            if line == '':
-                if output_content:
-                    output_json = json.loads(output_content)[1:]
-                    outputs_json.append(output_json)
-                    output_content = ''
-            else:
-                output_content += line
-
-        if output_content:
-            output_json = json.loads(output_content)[1:]
-            outputs_json.append(output_json)
-
-        for output_json in outputs_json:
-            file_info = output_json[0]['files'][0]
-            result.append(file_info)
-
-        return result
+        cmd_scancli = ['python3', self.exec_path]
+        cmd_scancli.extend(file_paths)
+
+        lines = []
+        # stderr goes to a file, so it cannot fill a pipe while stdout is read
+        with tempfile.TemporaryFile() as stderr, \
+                subprocess.Popen(cmd_scancli, stdout=subprocess.PIPE, stderr=stderr, encoding='utf-8') as proc:
+            try:
+                for line in proc.stdout:
+                    line = line.rstrip('\n')
+                    if line:
+                        lines.append(line)
+                    elif lines:
+                        yield self.__parse_scancode_cli(lines)
+                        lines = []
+
+                if proc.wait() != 0:
+                    stderr.seek(0)
+                    error = stderr.read().decode('utf-8', errors='replace')
+                    raise GraalError(cause="Scancode failed at %s, %s" % (file_paths, error))
+            except BaseException:
+                proc.kill()
+                raise
+
+        if lines:
+            yield self.__parse_scancode_cli(lines)
+
+    @staticmethod
+    def __parse_scancode_cli(lines):
+        """Get the results of a file from the lines of a JSON document of scancode-cli"""
+
+        output_json = json.loads(''.join(lines))[1:]
+        return output_json[0]['files'][0]
 
     def analyze(self, **kwargs):
         """Add information about license
@@ -123,7 +130,8 @@ class ScanCode(Analyzer):
         :param file_path: file path (in case of scancode)
         :param file_paths: file paths ( in case of scancode_cli for concurrent execution on files )
 
-        :returns result: the results of the analysis
+        :returns result: the results of the analysis; in case of scancode_cli,
+            a generator of the results of each file
         """
         if self.cli:
             result = self.__analyze_scancode_cli(kwargs['file_paths'])
@@ -20,112 +20,172 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import json
+import os
 import subprocess
 
 from graal.graal import GraalRepository
 from .analyzer import Analyzer
 
+MAX_FILES_PER_RUN = 500
+
 
 class SCC(Analyzer):
     """A wrapper for SCC.
 
-    This class allows to call SCC over a file, parses
-    the result of the analysis and returns it as a dict.
+    This class allows to call SCC over a file, a list of files
+    or a repository, parses the JSON result of the analysis and
+    returns it as a dict. A list of files is analyzed with a single
+    call to SCC, which returns the results of each file. In the
+    case of a repository, the results can be obtained per language
+    or per file.
     """
-    version = '0.1.0'
+    version = '0.2.0'
 
     def __init__(self):
         pass
 
-    def __analyze_file(self, message):
-        """Add information about LOC, blank and commented lines using SCC for a given file
+    def __analyze_files(self, languages, file_paths):
+        """Add information about LOC, blank and commented lines and code complexity
+        using SCC for a list of files
+
+        :param languages: list of languages from the JSON output of SCC
+        :param file_paths: list of the file paths analyzed
 
-        :param message: message from standard output after execution of SCC
-        :returns result: dict of the results of the analysis over a file
+        :returns result: dict of the results of the analysis for each file path
         """
-        flag = False
-        results = {
-            "blanks": 0,
-            "comments": 0,
-            "loc": 0,
-            "ccn": 0
-        }
-
-        for line in message.strip().split("\n"):
-            if flag:
-                if not line.startswith("────────"):
-                    file_info = line.split()[-4:]
-                    blank_lines, commented_lines, loc, complexity = map(int, file_info)
-                    results["blanks"] = blank_lines
-                    results["comments"] = commented_lines
-                    results["loc"] = loc
-                    results["ccn"] = complexity
-                    break
-
-            if line.lower().startswith("language"):
-                flag = True
+        by_file = {os.path.normpath(file_info['Location']): file_info
+                   for language in languages for file_info in (language['Files'] or [])}
+
+        results = {}
+        for file_path in file_paths:
+            # files whose language is not recognized are not reported
+            file_info = by_file.get(os.path.normpath(file_path), {})
+            results[file_path] = {
+                "blanks": file_info.get("Blank", 0),
+                "comments": file_info.get("Comment", 0),
+                "loc": file_info.get("Code", 0),
+                "ccn": file_info.get("Complexity", 0),
+                "ext": GraalRepository.extension(file_path)
+            }
 
         return results
 
-    def __analyze_repository(self, message):
+    def __analyze_repository(self, languages):
         """Add information LOC, total files, blank, commented lines and code complexity using SCC for
            the entire repository
 
-        :param message: message from standard output after execution of SCC
+        :param languages: list of languages from the JSON output of SCC
         :returns result: dict of the results of the analysis over a repository
         """
         results = {}
-        flag = False
-
-        for line in message.strip().split("\n"):
-            if flag:
-                if line.lower().startswith("total"):
-                    break
-                elif not line.startswith("────────"):
-                    digested_split = line.split()
-                    langauge, files_info = digested_split[:-6], digested_split[-6:]
-                    language = " ".join(langauge)
-                    total_files, total_lines, blank_lines, commented_lines, loc, complexity = map(int, files_info)
-                    language_result = {
-                        "total_files": total_files,
-                        "blanks": blank_lines,
-                        "comments": commented_lines,
-                        "loc": loc,
-                        "ccn": complexity
-                    }
-                    results[language] = language_result
-
-            if line.lower().startswith("language"):
-                flag = True
+
+        for language in languages:
+            # a language may be reported by more than one execution of SCC
+            language_result = results.setdefault(language['Name'], {
+                "total_files": 0,
+                "blanks": 0,
+                "comments": 0,
+                "loc": 0,
+                "ccn": 0
+            })
+            language_result["total_files"] += language['Count']
+            language_result["blanks"] += language['Blank']
+            language_result["comments"] += language['Comment']
+            language_result["loc"] += language['Code']
+            language_result["ccn"] += language['Complexity']
 
         return results
 
-    def analyze(self, **kwargs):
-        """Add information using SCC
+    def __analyze_repository_files(self, languages, repository_path, files_affected):
+        """Add information LOC, blank, commented lines and code complexity using SCC for
+           each file of the repository
 
-        :param file_path: file path
-        :param repository_level: set to True if analysis has to be performed on a repository
-        :returns result: dict of the results of the analysis
+        :param languages: list of languages from the JSON output of SCC
+        :param repository_path: repository path
+        :param files_affected: the files modified by the commit
+
+        :returns result: list of the results of the analysis of each file, sorted by path
         """
-        repository_level = kwargs.get('repository_level', False)
+        results = []
+
+        for language in languages:
+            for file_info in (language['Files'] or []):
+                file_path = os.path.relpath(file_info['Location'], repository_path)
+                results.append({
+                    "blanks": file_info['Blank'],
+                    "comments": file_info['Comment'],
+                    "loc": file_info['Code'],
+                    "ccn": file_info['Complexity'],
+                    "language": language['Name'],
+                    "file_path": file_path,
+                    "in_commit": file_path in files_affected
+                })
+
+        results.sort(key=lambda r: r['file_path'])
+        return results
 
-        if repository_level:
-            file_path = kwargs['repository_path']
-        else:
-            file_path = kwargs['file_path']
+    def __run(self, paths, by_file=False):
+        """Run SCC over a list of paths and return the languages found in the JSON output"""
+
+        scc_command = ['scc', '--format', 'json']
+        if by_file:
+            scc_command.append('--by-file')
+        scc_command.extend(paths)
 
         try:
-            scc_command = ['scc', file_path]
             message = subprocess.check_output(scc_command).decode("utf-8")
         except subprocess.CalledProcessError as e:
             message = e.output.decode("utf-8")
         finally:
             subprocess._cleanup()
 
+        start = message.find('[')
+        return json.loads(message[start:]) if start >= 0 else []
+
+    def analyze(self, **kwargs):
+        """Add information using SCC
+
+        When `file_paths` is set, SCC is executed once over all the
+        files and the results are returned for each one of them. If
+        `repository_level` is set too, the results of the files are
+        returned as the ones of a repository.
+
+        :param file_path: file path
+        :param file_paths: list of file paths, to analyze them at once
+        :param repository_path: repository path
+        :param repository_level: set to True if analysis has to be performed on a repository
+        :param by_file: set to True to obtain the results of each file of a repository,
+            instead of the ones of each language
+        :param files_affected: the files modified by the commit, used when `by_file` is set
+
+        :returns result: dict of the results of the analysis
+        """
+        file_paths = kwargs.get('file_paths', None)
+        repository_level = kwargs.get('repository_level', False)
+
+        if file_paths is not None:
+            languages = []
+            for i in range(0, len(file_paths), MAX_FILES_PER_RUN):
+                languages.extend(self.__run(file_paths[i:i + MAX_FILES_PER_RUN], by_file=True))
+
+            if not repository_level:
+                return self.__analyze_files(languages, file_paths)
+
         if repository_level:
-            results = self.__analyze_repository(message)
+            repository_path = kwargs['repository_path']
+            by_file = kwargs.get('by_file', False)
+            if file_paths is None:
+                languages = self.__run([repository_path], by_file=by_file)
+
+            if by_file:
+                files_affected = kwargs.get('files_affected', None) or []
+                results = self.__analyze_repository_files(languages, repository_path, files_affected)
+            else:
+                results = self.__analyze_repository(languages)
         else:
-            results = self.__analyze_file(message)
-            results['ext'] = GraalRepository.extension(file_path)
+            file_path = kwargs['file_path']
+            languages = self.__run([file_path], by_file=True)
+            results = self.__analyze_files(languages, [file_path])[file_path]
 
         return results
@@ -22,14 +22,22 @@
 #
 
 import logging
+import os
 
 from graal.graal import (Graal,
                          GraalError,
                          GraalRepository,
                          GraalCommand,
-                         DEFAULT_WORKTREE_PATH)
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL,
+                         CHECKOUT_SPARSE,
+                         CHECKOUT_NONE)
+from graal.incremental import (SubtreeAnalyzer,
+                               merge_analyses)
 from graal.backends.core.analyzers.cloc import Cloc
-from graal.backends.core.analyzers.lizard import Lizard
+from graal.backends.core.analyzers.lizard import (Lizard,
+                                                  DEFAULT_THREADS)
 from graal.backends.core.analyzers.scc import SCC
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
@@ -45,6 +53,11 @@ CATEGORY_COCOM_LIZARD_REPOSITORY = 'code_complexity_' + LIZARD_REPOSITORY
 CATEGORY_COCOM_SCC_FILE = 'code_complexity_' + SCC_FILE
 CATEGORY_COCOM_SCC_REPOSITORY = 'code_complexity_' + SCC_REPOSITORY
 
+# Tools used to count the blank and comment lines in the Lizard categories
+LINE_COUNTER_CLOC = 'cloc'
+LINE_COUNTER_LIZARD = 'lizard'
+LINE_COUNTERS = [LINE_COUNTER_CLOC, LINE_COUNTER_LIZARD]
+
 logger = logging.getLogger(__name__)
 
 
@@ -70,6 +83,28 @@ class CoCom(Graal):
         Golang
         Lua
 
+    The file categories can be fetched with the checkout mode `sparse`,
+    which checks out only the files of each commit. The category
+    `code_complexity_lizard_file` also supports the checkout mode `none`.
+    In that case, the content of the files is read from the mirror and
+    passed to Lizard without touching the disk; CLOC is executed once
+    per commit over the contents written to a temporary directory.
+
+    In the category `code_complexity_lizard_repository`, the files are
+    analyzed by `threads` processes, and only the files that changed
+    since the previous commit analyzed are processed again. When the
+    commits are analyzed by several `workers`, the processes are split
+    among them, so no more than `threads` run at the same time.
+
+    In the Lizard categories, the blank and comment lines are obtained
+    with CLOC. Setting `line_counter` to `lizard`, they are counted while
+    Lizard processes the source files, thus avoiding to run CLOC on them.
+
+    SCC is executed once per commit over the files analyzed. In the
+    category `code_complexity_scc_repository`, the results are grouped
+    by language, unless `by_file` is set. With the incremental analysis,
+    SCC is executed only on the directories changed by each commit.
+
     :param uri: URI of the Git repository
     :param git_path: path to the repository or to the log file
     :param worktreepath: the directory where to store the working tree
@@ -78,13 +113,28 @@ class CoCom(Graal):
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
     :param details: if enable, it returns complexity data about each single function found
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param threads: number of processes used by Lizard to analyze a repository
+    :param line_counter: tool used to count blank and comment lines (`cloc` or `lizard`)
+    :param by_file: if enabled, SCC returns the results of each file of the repository
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
     :raises RepositoryError: raised when there was an error cloning or
         updating the repository.
     """
-    version = '0.5.1'
+    version = '0.6.0'
 
     CATEGORIES = [CATEGORY_COCOM_LIZARD_FILE,
                   CATEGORY_COCOM_LIZARD_REPOSITORY,
@@ -93,13 +143,30 @@ class CoCom(Graal):
 
     def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
-                 tag=None, archive=None):
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 threads=DEFAULT_THREADS, line_counter=LINE_COUNTER_CLOC, by_file=False,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
         super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
                          entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths, details=details,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
                          tag=tag, archive=archive)
 
+        if threads < 1:
+            raise GraalError(cause="number of threads must be greater than 0, %s given" % threads)
+        self.threads = threads
+
+        if line_counter not in LINE_COUNTERS:
+            raise GraalError(cause="Unknown line counter %s" % line_counter)
+        self.line_counter = line_counter
+        self.by_file = by_file
+
         self.analyzer = None
         self.analyzer_kind = None
+        self.subtree_analyzer = None
 
     def fetch(self, category=CATEGORY_COCOM_LIZARD_FILE, paths=None,
               from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
@@ -121,9 +188,18 @@ class CoCom(Graal):
             raise GraalError(cause="Unknown category %s" % category)
 
         if "_file" in category:
-            self.analyzer = FileAnalyzer(self.details, self.analyzer_kind)
+            self.analyzer = FileAnalyzer(self.details, self.analyzer_kind, cache=self.cache,
+                                         line_counter=self.line_counter)
         else:
-            self.analyzer = RepositoryAnalyzer(self.details, self.analyzer_kind)
+            # the workers share the processes of Lizard
+            threads = max(1, self.threads // self.workers)
+            self.analyzer = RepositoryAnalyzer(self.details, self.analyzer_kind, threads=threads,
+                                               line_counter=self.line_counter, by_file=self.by_file)
+
+        self.subtree_analyzer = None
+        if self.incremental and self.analyzer_kind == SCC_REPOSITORY:
+            self.subtree_analyzer = SubtreeAnalyzer(self.analyzer.analyze_files, self.analyzer.merge,
+                                                    file_filter=RepositoryAnalyzer.is_visible_file)
 
         return items
 
@@ -148,6 +224,33 @@ class CoCom(Graal):
         else:
             raise GraalError(cause="Unknown analyzer %s" % item['analyzer'])
 
+    def _checkout_modes(self, category):
+        """Return the checkout modes supported by a category"""
+
+        if category == CATEGORY_COCOM_LIZARD_FILE:
+            return [CHECKOUT_FULL, CHECKOUT_SPARSE, CHECKOUT_NONE]
+        elif category == CATEGORY_COCOM_SCC_FILE:
+            return [CHECKOUT_FULL, CHECKOUT_SPARSE]
+
+        return [CHECKOUT_FULL]
+
+    def _supports_incremental(self, category):
+        """Check whether a category can analyze only the changed directories.
+
+        The category `code_complexity_lizard_repository` always reuses
+        the results of the files not changed by the commit.
+        """
+        return category in [CATEGORY_COCOM_LIZARD_REPOSITORY, CATEGORY_COCOM_SCC_REPOSITORY]
+
+    def _run_options(self):
+        """Add the line counter and the file results to the options of the run"""
+
+        options = super()._run_options()
+        options['line_counter'] = self.line_counter
+        options['by_file'] = self.by_file
+
+        return options
+
     def _filter_commit(self, commit):
         """Filter a commit according to its data (e.g., author, sha, etc.)
 
@@ -174,6 +277,9 @@ class CoCom(Graal):
         analysis = []
 
         if self.analyzer_kind in [LIZARD_FILE, SCC_FILE]:
+            # the files are analyzed at once, after visiting all of them
+            to_analyze = []
+
             for committed_file in commit['files']:
 
                 file_path = committed_file['file']
@@ -182,8 +288,8 @@ class CoCom(Graal):
                     if not found:
                         continue
 
-                local_path = self.worktreepath + '/' + file_path
-                if not GraalRepository.exists(local_path):
+                local_path, content, exists = self.__get_file(commit, file_path)
+                if not exists:
                     file_info = {
                         'blanks': None,
                         'comments': None,
@@ -201,7 +307,7 @@ class CoCom(Graal):
 
                     if committed_file.get("newfile", None):
                         file_path = committed_file["newfile"]
-                        local_path = self.worktreepath + '/' + file_path
+                        local_path, content, _ = self.__get_file(commit, file_path)
                         analysis.append(file_info)
                     elif committed_file.get("action", None) == "D":
                         analysis.append(file_info)
@@ -209,12 +315,42 @@ class CoCom(Graal):
                     else:
                         continue
 
-                file_info = self.analyzer.analyze(local_path)
-                file_info.update({'file_path': file_path})
-                analysis.append(file_info)
+                to_analyze.append((len(analysis), local_path, file_path, content))
+                analysis.append(None)
+
+            if to_analyze:
+                # the contents are set only when the files are read from the mirror
+                files_info = self.analyzer.analyze_files([local_path for _, local_path, _, _ in to_analyze],
+                                                         contents=[content for _, _, _, content in to_analyze])
+                for (pos, _, file_path, _), file_info in zip(to_analyze, files_info):
+                    file_info.update({'file_path': file_path})
+                    analysis[pos] = file_info
         else:
             files_affected = [file_info['file'] for file_info in commit['files']]
-            analysis = self.analyzer.analyze(self.worktreepath, files_affected)
+
+            analyzer = self.analyzer
+            if self.subtree_analyzer:
+                def analyze():
+                    files_analysis = self.subtree_analyzer.analyze(self.graalRepo, commit['commit'], self.worktreepath)
+                    if isinstance(files_analysis, list):
+                        files_analysis.sort(key=lambda file_info: file_info['file_path'])
+                    return files_analysis
+            else:
+                def analyze():
+                    file_hashes = None
+                    if self.analyzer_kind == LIZARD_REPOSITORY:
+                        # used to reuse the results of the files not changed since the last commit
+                        file_hashes = self.graalRepo.ls_tree(commit['commit'])
+
+                    return analyzer.analyze(self.worktreepath, files_affected, file_hashes=file_hashes)
+
+            analysis = self._analyze_tree(commit, analyze, [analyzer.analyzer],
+                                          options=[self.analyzer_kind, self.details, self.line_counter, self.by_file])
+
+            if isinstance(analysis, list):
+                # the results may come from a commit with the same tree but different changes
+                for file_info in analysis:
+                    file_info['in_commit'] = file_info['file_path'] in files_affected
 
         return analysis
 
@@ -223,23 +359,54 @@ class CoCom(Graal):
 
         :param commit: a Graal commit item
         """
-        commit['files'] = [f.replace(self.worktreepath + '/', '') for f in GraalRepository.files(self.worktreepath)]
+        # the files are sorted, so the items do not depend on the checkout mode
+        if self.checkout_mode != CHECKOUT_FULL:
+            # same files listed when the whole working tree is checked out
+            commit['files'] = sorted(f for f in self.graalRepo.ls_tree(commit['commit'])
+                                     if not any(p.startswith('.') for p in f.split('/')))
+        else:
+            commit['files'] = sorted(f.replace(self.worktreepath + '/', '')
+                                     for f in GraalRepository.files(self.worktreepath))
         commit.pop('refs', None)
         commit['analyzer'] = self.analyzer_kind
 
         return commit
 
+    def __get_file(self, commit, file_path):
+        """Get the local path of a file, its content and whether it exists.
+
+        The content is read from the mirror when the working tree is not
+        checked out, otherwise it is None and the file is read by the
+        analyzers from the local path.
+        """
+        local_path = self.worktreepath + '/' + file_path
+
+        if self.checkout_mode == CHECKOUT_NONE:
+            content = self.graalRepo.read_blob(commit['commit'], file_path)
+            return local_path, content, content is not None
+
+        return local_path, None, GraalRepository.exists(local_path)
+
 
 class FileAnalyzer:
-    """Class to analyse the content of files"""
+    """Class to analyse the content of files
+
+    :param details: if enable, it returns complexity data about each single function found
+    :param kind: the analyzer kind (e.g., LIZARD_FILE, SCC_FILE)
+    :param cache: an AnalysisCache to reuse the results obtained on identical files
+    :param line_counter: tool used to count blank and comment lines of the files
+        supported by Lizard (LINE_COUNTER_CLOC or LINE_COUNTER_LIZARD)
+    """
 
     ALLOWED_EXTENSIONS = ['java', 'py', 'php', 'scala', 'js', 'rb', 'cs', 'cpp', 'c', 'lua', 'go', 'swift']
     FORBIDDEN_EXTENSIONS = ['tar', 'bz2', "gz", "lz", "apk", "tbz2",
                             "lzma", "tlz", "war", "xar", "zip", "zipx"]
 
-    def __init__(self, details=False, kind=LIZARD_FILE):
+    def __init__(self, details=False, kind=LIZARD_FILE, cache=None, line_counter=LINE_COUNTER_CLOC):
         self.details = details
         self.kind = kind
+        self.cache = cache
+        self.line_counter = line_counter
 
         if self.kind == LIZARD_FILE:
             self.cloc = Cloc()
@@ -247,10 +414,12 @@ class FileAnalyzer:
         else:
             self.scc = SCC()
 
-    def analyze(self, file_path):
+    def analyze(self, file_path, content=None):
         """Analyze the content of a file using CLOC, Lizard and SCC
 
         :param file_path: file path
+        :param content: the content of the file as bytes; if set, the file is not
+            read from disk and `file_path` is only used to detect the language
 
         :returns a dict containing the results of the analysis, like the one below
         {
@@ -266,46 +435,149 @@ class FileAnalyzer:
           'funs': [..]
         }
         """
+        if not self.cache or (content is None and not os.path.isfile(file_path)):
+            return self.__analyze(file_path, content)
+
+        key = self.__cache_key(file_path, content)
+        file_analysis = self.cache.get(key)
+
+        if file_analysis is None:
+            file_analysis = self.__analyze(file_path, content)
+            self.cache.set(key, file_analysis)
+
+        return file_analysis
+
+    def analyze_files(self, file_paths, contents=None):
+        """Analyze a list of files. CLOC (with LIZARD_FILE) or SCC (with
+        SCC_FILE) is executed once for all the files not found in the cache.
+
+        :param file_paths: list of file paths
+        :param contents: list of the contents of the files as bytes, to analyze
+            them without reading `file_paths` (None for the files to read)
+
+        :returns a list containing the results of the analysis of each file,
+            in the same order of `file_paths` (see `analyze`)
+        """
+        contents = contents or [None] * len(file_paths)
+        results = [None] * len(file_paths)
+        keys = {}
+
+        if self.cache:
+            for i, (file_path, content) in enumerate(zip(file_paths, contents)):
+                if content is not None or os.path.isfile(file_path):
+                    keys[i] = self.__cache_key(file_path, content)
+                    results[i] = self.cache.get(keys[i])
+
+        to_analyze = [i for i, result in enumerate(results) if result is None]
+
+        batch_analyses = {}
+        if self.kind == LIZARD_FILE:
+            to_count = [i for i in to_analyze if self.__requires_cloc(file_paths[i])]
+            if to_count:
+                kwargs = {'file_paths': [file_paths[i] for i in to_count]}
+                if any(contents[i] is not None for i in to_count):
+                    kwargs['contents'] = [contents[i] for i in to_count]
+                batch_analyses = self.cloc.analyze(**kwargs)
+        elif to_analyze:
+            batch_analyses = self.scc.analyze(file_paths=[file_paths[i] for i in to_analyze])
+
+        for i in to_analyze:
+            batch_analysis = batch_analyses.get(file_paths[i], None)
+            results[i] = self.__analyze(file_paths[i], contents[i],
+                                        batch_analysis=dict(batch_analysis) if batch_analysis else None)
+
+            if i in keys:
+                self.cache.set(keys[i], results[i])
+
+        return results
+
+    def __analyze(self, file_path, content=None, batch_analysis=None):
+        """Analyze a file, reusing the results of CLOC or SCC when they
+        were already obtained for a list of files (`batch_analysis`)"""
+
         kwargs = {'file_path': file_path}
+        if content is not None:
+            if self.kind != LIZARD_FILE:
+                raise GraalError(cause="Analyzer %s cannot analyze contents in memory" % self.kind)
+            kwargs['content'] = content
 
         if self.kind == LIZARD_FILE:
-            cloc_analysis = self.cloc.analyze(**kwargs)
+            cloc_analysis = batch_analysis
+            if cloc_analysis is None and self.__requires_cloc(file_path):
+                cloc_analysis = self.cloc.analyze(**kwargs)
 
             if GraalRepository.extension(file_path) not in self.ALLOWED_EXTENSIONS:
                 return cloc_analysis
 
             kwargs['details'] = self.details
+            if self.line_counter == LINE_COUNTER_LIZARD:
+                kwargs['count_lines'] = True
+                return self.lizard.analyze(**kwargs)
+
             file_analysis = self.lizard.analyze(**kwargs)
             # the LOC returned by CLOC is replaced by the one obtained with Lizard
             # for consistency purposes
 
             file_analysis['blanks'] = cloc_analysis['blanks']
             file_analysis['comments'] = cloc_analysis['comments']
+        elif batch_analysis is not None:
+            file_analysis = batch_analysis
         else:
             file_analysis = self.scc.analyze(**kwargs)
 
         return file_analysis
 
+    def __requires_cloc(self, file_path):
+        """Check whether the blank and comment lines of a file are counted with CLOC"""
+
+        if self.kind != LIZARD_FILE:
+            return False
+
+        return self.line_counter == LINE_COUNTER_CLOC or \
+            GraalRepository.extension(file_path) not in self.ALLOWED_EXTENSIONS
+
+    def __cache_key(self, file_path, content=None):
+        """The results depend on the content of the file and on its name,
+        which is used by the tools to detect the programming language"""
+
+        if self.kind == LIZARD_FILE:
+            analyzers = [(a.__class__.__name__, a.version) for a in [self.cloc, self.lizard]]
+        else:
+            analyzers = [(self.scc.__class__.__name__, self.scc.version)]
+
+        return self.cache.key(GraalRepository.blob_hash(file_path, content), os.path.basename(file_path),
+                              self.kind, analyzers, self.details, self.line_counter)
+
 
 class RepositoryAnalyzer:
     """Class to analyse the content of a repository
 
     param kind: the analyzer kind (e.g., Lizard, SCC)
+    :param threads: number of processes used by Lizard
+    :param line_counter: tool used by Lizard to count blank and comment lines
+    :param by_file: if enabled, SCC returns the results of each file instead of each language
     """
 
-    def __init__(self, details=False, kind=LIZARD_REPOSITORY):
+    def __init__(self, details=False, kind=LIZARD_REPOSITORY, threads=DEFAULT_THREADS,
+                 line_counter=LINE_COUNTER_CLOC, by_file=False):
         self.details = details
         self.kind = kind
+        self.threads = threads
+        self.line_counter = line_counter
+        self.by_file = by_file
 
         if kind == LIZARD_REPOSITORY:
             self.analyzer = Lizard()
         else:
             self.analyzer = SCC()
 
-    def analyze(self, repository_path, files_affected):
+    def analyze(self, repository_path, files_affected, file_hashes=None):
         """Analyze the content of a repository using SCC or Lizard.
 
         :param repository_path: repository path
+        :param files_affected: the files modified by the commit
+        :param file_hashes: the Git blob hash of the files of the repository, used
+            by Lizard to reuse the results of the files analyzed in the previous call
 
         :returns a list containing the results of the analysis
         [ {
@@ -327,11 +599,52 @@ class RepositoryAnalyzer:
             'files_affected': files_affected,
             'details': self.details
         }
+        if self.kind == LIZARD_REPOSITORY:
+            kwargs['file_hashes'] = file_hashes
+            kwargs['threads'] = self.threads
+            kwargs['count_lines'] = self.line_counter == LINE_COUNTER_LIZARD
+        else:
+            kwargs['by_file'] = self.by_file
 
         repository_analysis = self.analyzer.analyze(**kwargs)
 
         return repository_analysis
 
+    def analyze_files(self, repository_path, file_paths):
+        """Analyze a list of files of a repository using SCC.
+
+        :param repository_path: repository path
+        :param file_paths: paths of the files to analyze
+
+        :returns the results of the analysis of the files, grouped as
+            the ones of a repository (see `analyze`)
+        """
+        kwargs = {
+            'repository_path': repository_path,
+            'repository_level': True,
+            'file_paths': file_paths,
+            'by_file': self.by_file,
+            'details': self.details
+        }
+        files_analysis = self.analyzer.analyze(**kwargs)
+
+        return files_analysis
+
+    def merge(self, analyses):
+        """Merge the results of the analyses of different lists of files"""
+
+        merged = merge_analyses(analyses)
+        if merged is None:
+            merged = [] if self.by_file else {}
+
+        return merged
+
+    @staticmethod
+    def is_visible_file(file_path):
+        """Check whether a file is analyzed by SCC when scanning a repository"""
+
+        return not any(part.startswith('.') for part in file_path.split('/'))
+
 
 class CoComCommand(GraalCommand):
     """Class to run CoCom backend from the command line."""
@@ -344,4 +657,16 @@ class CoComCommand(GraalCommand):
 
         parser = GraalCommand.setup_cmd_parser(cls.BACKEND)
 
+        # CoCom options
+        group = parser.parser.add_argument_group('CoCom arguments')
+        group.add_argument('--threads', dest='threads',
+                           type=int, default=DEFAULT_THREADS,
+                           help="Number of processes used by Lizard to analyze a repository")
+        group.add_argument('--line-counter', dest='line_counter',
+                           choices=LINE_COUNTERS, default=LINE_COUNTER_CLOC,
+                           help="Tool used to count blank and comment lines in the Lizard categories")
+        group.add_argument('--by-file', dest='by_file',
+                           action='store_true',
+                           help="Return the results of each file in the SCC repository category")
+
         return parser
@@ -28,9 +28,14 @@ from graal.graal import (Graal,
                          GraalCommand,
                          GraalError,
                          GraalRepository,
-                         DEFAULT_WORKTREE_PATH)
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL,
+                         CHECKOUT_SPARSE)
 from graal.backends.core.analyzers.analyzer import Analyzer
-from graal.backends.core.analyzers.jadolint import Jadolint, DEPENDENCIES
+from graal.backends.core.analyzers.jadolint import (Jadolint,
+                                                    DEPENDENCIES,
+                                                    analyze_cached)
 from graal.backends.core.analyzers.reverse import Reverse
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
@@ -57,6 +62,18 @@ class CoDep(Graal):
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
     :param details: if enable, it returns fine-grained results
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
@@ -69,9 +86,15 @@ class CoDep(Graal):
 
     def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
-                 tag=None, archive=None):
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
         super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
                          entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths, details=details,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
                          tag=tag, archive=archive)
 
         self.analyzer_kind = None
@@ -93,7 +116,7 @@ class CoDep(Graal):
             self.analyzer = PyreverseAnalyzer()
         elif category == CATEGORY_CODEP_JADOLINT:
             self.analyzer_kind = JADOLINT
-            self.analyzer = JadolintAnalyzer(self.exec_path, analysis=DEPENDENCIES)
+            self.analyzer = JadolintAnalyzer(self.exec_path, analysis=DEPENDENCIES, cache=self.cache)
         else:
             raise GraalError(cause="Unknown category %s" % category)
 
@@ -118,6 +141,14 @@ class CoDep(Graal):
         else:
             raise GraalError(cause="Unknown analyzer %s" % item['analyzer'])
 
+    def _checkout_modes(self, category):
+        """Return the checkout modes supported by a category"""
+
+        if category == CATEGORY_CODEP_JADOLINT:
+            return [CHECKOUT_FULL, CHECKOUT_SPARSE]
+
+        return [CHECKOUT_FULL]
+
     def _filter_commit(self, commit):
         """Filter a commit according to its data (e.g., author, sha, etc.)
 
@@ -150,7 +181,9 @@ class CoDep(Graal):
                                % (module_path, commit['commit']))
                 return analysis
 
-            analysis = self.analyzer.analyze(module_path)
+            analysis = self._analyze_tree(commit, lambda: self.analyzer.analyze(module_path),
+                                          [self.analyzer.analyzer], path=self.entrypoint,
+                                          options=[self.analyzer_kind])
         else:
             for committed_file in commit['files']:
                 file_path = committed_file['file']
@@ -164,7 +197,7 @@ class CoDep(Graal):
                     analysis.update({file_path: {DEPENDENCIES: []}})
                     continue
 
-                dependencies = self.analyzer.analyze(local_path)
+                dependencies = self.analyzer.analyze(local_path, self.worktreepath)
                 analysis.update({file_path: dependencies})
 
         return analysis
@@ -212,23 +245,22 @@ class PyreverseAnalyzer(Analyzer):
 class JadolintAnalyzer(Analyzer):
     """Class to obtain a list of dependencies extracted from Dockerfiles."""
 
-    def __init__(self, exec_path, analysis=DEPENDENCIES):
+    def __init__(self, exec_path, analysis=DEPENDENCIES, cache=None):
         self.analyzer = Jadolint(exec_path, analysis=analysis)
+        self.cache = cache
 
-    def analyze(self, file_path):
+    def analyze(self, file_path, worktree_path=None):
         """Analyze the content of a Python project using Jadolint
 
         :param file_path: path of the target file
+        :param worktree_path: worktree path
 
         :returns a dict containing the results of the analysis, like the one below
         {
           'image_path': ..
         }
         """
-        kwargs = {'file_path': file_path}
-        analysis = self.analyzer.analyze(**kwargs)
-
-        return analysis
+        return analyze_cached(self.analyzer, file_path, cache=self.cache, worktree_path=worktree_path)
 
 
 class CoDepCommand(GraalCommand):
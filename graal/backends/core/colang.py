@@ -25,7 +25,11 @@ import logging
 from graal.graal import (Graal,
                          GraalCommand,
                          GraalError,
-                         DEFAULT_WORKTREE_PATH)
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL)
+from graal.incremental import (SubtreeAnalyzer,
+                               merge_analyses)
 from graal.backends.core.analyzers.linguist import Linguist
 from graal.backends.core.analyzers.cloc import Cloc
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
@@ -45,6 +49,11 @@ class CoLang(Graal):
     This class extends the Graal backend. It extracts
     code language distribution from repository using Linguist
 
+    The category `code_language_cloc` supports the incremental
+    analysis, which runs CLOC only on the directories changed
+    by each commit. Note that files with the same content are
+    counted once per directory instead of once per repository.
+
     :param uri: URI of the Git repository
     :param gitpath: path to the repository or to the log file
     :param worktreepath: the directory where to store the working tree
@@ -53,6 +62,18 @@ class CoLang(Graal):
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
     :param details: if enable, it returns fine-grained results
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
@@ -65,14 +86,21 @@ class CoLang(Graal):
 
     def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
-                 tag=None, archive=None):
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
         super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
                          entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths, details=details,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
                          tag=tag, archive=archive)
 
         self.repository_path = self.worktreepath
         self.analyzer_kind = None
         self.analyzer = None
+        self.subtree_analyzer = None
 
     def fetch(self, category=CATEGORY_COLANG_LINGUIST, paths=None,
               from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
@@ -87,6 +115,10 @@ class CoLang(Graal):
             raise GraalError(cause="Unknown category %s" % category)
 
         self.repository_analyzer = RepositoryAnalyzer(self.details, self.analyzer_kind)
+        self.subtree_analyzer = None
+        if self.incremental:
+            self.subtree_analyzer = SubtreeAnalyzer(self.repository_analyzer.analyze_files,
+                                                    RepositoryAnalyzer.merge)
 
         items = super().fetch(category, branches=branches, latest_items=latest_items)
 
@@ -115,6 +147,11 @@ class CoLang(Graal):
         """
         return False
 
+    def _supports_incremental(self, category):
+        """Check whether a category can analyze only the changed directories"""
+
+        return category == CATEGORY_COLANG_CLOC
+
     def _analyze(self, commit):
         """Analyse a snapshot and the corresponding
         checkout version of the repository
@@ -122,10 +159,26 @@ class CoLang(Graal):
         :param commit: a Perceval commit item
         """
 
-        analysis = self.repository_analyzer.analyze(self.repository_path)
+        analyzer = self.repository_analyzer
+        if self.subtree_analyzer:
+            def analyze():
+                return self.subtree_analyzer.analyze(self.graalRepo, commit['commit'], self.repository_path)
+        else:
+            def analyze():
+                return analyzer.analyze(self.repository_path)
+
+        analysis = self._analyze_tree(commit, analyze, [analyzer.analyzer], options=[self.analyzer_kind, self.details])
 
         return analysis
 
+    def _set_worktree(self, graal_repo):
+        """Make the backend work on the working tree of `graal_repo`
+
+        :param graal_repo: a GraalRepository with a working tree
+        """
+        super()._set_worktree(graal_repo)
+        self.repository_path = self.worktreepath
+
     def _post(self, commit):
         """Remove attributes of the Graal item obtained
 
@@ -177,6 +230,31 @@ class RepositoryAnalyzer:
 
         return analysis
 
+    def analyze_files(self, repository_path, file_paths):
+        """Analyze a list of files of a repository using CLOC
+
+        :param repository_path: repository path
+        :param file_paths: paths of the files to analyze
+
+        :returns a dict containing the results of the analysis of each
+            language found in the files (see `analyze`)
+        """
+        kwargs = {
+            'repository_path': repository_path,
+            'file_paths': file_paths,
+            'repository_level': True,
+            'details': self.details
+        }
+        analysis = self.analyzer.analyze(**kwargs)
+
+        return analysis
+
+    @staticmethod
+    def merge(analyses):
+        """Merge the results of the analyses of different lists of files"""
+
+        return merge_analyses(analyses) or {}
+
 
 class CoLangCommand(GraalCommand):
     """Class to run CoLang backend from the command line."""
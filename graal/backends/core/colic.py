@@ -28,7 +28,10 @@ from graal.graal import (Graal,
                          GraalError,
                          GraalRepository,
                          GraalCommand,
-                         DEFAULT_WORKTREE_PATH)
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL,
+                         CHECKOUT_SPARSE)
 from graal.backends.core.analyzers.nomos import Nomos
 from graal.backends.core.analyzers.scancode import ScanCode
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
@@ -57,6 +60,18 @@ class CoLic(Graal):
     :param entrypoint: the entrypoint of the analysis
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
@@ -71,9 +86,15 @@ class CoLic(Graal):
 
     def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None,
-                 tag=None, archive=None):
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
         super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
                          entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
                          tag=tag, archive=archive)
 
         if not GraalRepository.exists(exec_path):
@@ -96,7 +117,7 @@ class CoLic(Graal):
         else:
             raise GraalError(cause="Unknown category %s" % category)
 
-        self.analyzer = LicenseAnalyzer(self.exec_path, self.analyzer_kind)
+        self.analyzer = LicenseAnalyzer(self.exec_path, self.analyzer_kind, cache=self.cache)
 
         items = super().fetch(category,
                               from_date=from_date, to_date=to_date,
@@ -122,6 +143,11 @@ class CoLic(Graal):
         else:
             raise GraalError(cause="Unknown analyzer %s" % item['analyzer'])
 
+    def _checkout_modes(self, category):
+        """Return the checkout modes supported by a category"""
+
+        return [CHECKOUT_FULL, CHECKOUT_SPARSE]
+
     def _filter_commit(self, commit):
         """Filter a commit according to its data (e.g., author, sha, etc.)
 
@@ -162,7 +188,7 @@ class CoLic(Graal):
                 continue
 
             if self.analyzer_kind == NOMOS or self.analyzer_kind == SCANCODE:
-                license_info = self.analyzer.analyze(local_path)
+                license_info = self.analyzer.analyze(local_path, self.worktreepath)
                 license_info.update({'file_path': file_path})
                 analysis.append(license_info)
             elif self.analyzer_kind == SCANCODE_CLI:
@@ -170,9 +196,16 @@ class CoLic(Graal):
 
         if files_to_process:
             local_paths = [path[1] for path in files_to_process]
-            analysis = self.analyzer.analyze(local_paths)
-            for i in range(len(analysis)):
-                analysis[i]['file_path'] = files_to_process[i][0]
+            # the results are read from scancode-cli while it runs
+            n_results = 0
+            for license_info in self.analyzer.analyze(local_paths, self.worktreepath):
+                license_info['file_path'] = files_to_process[n_results][0]
+                analysis.append(license_info)
+                n_results += 1
+
+            if n_results < len(files_to_process):
+                lost = [path[0] for path in files_to_process[n_results:]]
+                raise GraalError(cause="Scancode returned no results for %s" % lost)
 
         return analysis
 
@@ -193,10 +226,12 @@ class LicenseAnalyzer:
 
     :param exec_path: path of the license analyzer executable
     :param kind: the analyzer kind (e.g., NOMOS, SCANCODE, SCANCODE_CLI)
+    :param cache: an AnalysisCache to reuse the results obtained on identical files
     """
 
-    def __init__(self, exec_path, kind=NOMOS):
+    def __init__(self, exec_path, kind=NOMOS, cache=None):
         self.kind = kind
+        self.cache = cache
         if kind == SCANCODE:
             self.analyzer = ScanCode(exec_path)
         elif kind == SCANCODE_CLI:
@@ -204,18 +239,60 @@ class LicenseAnalyzer:
         else:
             self.analyzer = Nomos(exec_path)
 
-    def analyze(self, file_path):
+    def analyze(self, file_path, worktree_path=None):
         """Analyze the content of a file using Nomos/Scancode
 
         :param file_path: file path (in case of scancode)
         :param file_paths: file paths ( in case of scancode_cli for concurrent execution on files )
+        :param worktree_path: worktree path
 
         :returns a dict containing the results of the analysis, like the one below
         {
           'licenses': [..],
           'copyrights': [..]
         }
+        or, in case of scancode_cli, a generator of these dicts
         """
+        if not self.cache:
+            return self.__analyze(file_path)
+
+        if self.kind != SCANCODE_CLI:
+            key = self.__cache_key(file_path, worktree_path)
+            analysis = self.cache.get(key, worktree_path)
+
+            if analysis is None:
+                analysis = self.__analyze(file_path)
+                self.cache.set(key, analysis, worktree_path)
+
+            return analysis
+
+        return self.__analyze_cached_files(file_path, worktree_path)
+
+    def __analyze_cached_files(self, file_paths, worktree_path):
+        """Yield the results of scancode_cli, which analyzes many files at
+        once, so only the files not found in the cache are passed to it"""
+
+        keys = [self.__cache_key(path, worktree_path) for path in file_paths]
+        cached = [self.cache.get(key, worktree_path) for key in keys]
+
+        missing = [path for path, file_info in zip(file_paths, cached) if file_info is None]
+        results = self.__analyze(missing) if missing else iter([])
+
+        for i, (key, file_info) in enumerate(zip(keys, cached)):
+            if file_info is None:
+                file_info = next(results, None)
+                if file_info is None:
+                    lost = [path for path, info in zip(file_paths[i:], cached[i:]) if info is None]
+                    raise GraalError(cause="Scancode returned no results for %s" % lost)
+                self.cache.set(key, file_info, worktree_path)
+
+            yield file_info
+
+        # the output is read until the end, thus the exit status of scancode_cli is checked
+        for _ in results:
+            pass
+
+    def __analyze(self, file_path):
         if self.kind == SCANCODE_CLI:
             kwargs = {'file_paths': file_path}
         else:
@@ -225,6 +302,21 @@ class LicenseAnalyzer:
 
         return analysis
 
+    def __cache_key(self, file_path, worktree_path):
+        """Scancode results include the path of the file, thus its path
+        relative to the worktree is part of the key together with the
+        content of the file"""
+
+        if self.kind == NOMOS:
+            name = os.path.basename(file_path)
+        elif worktree_path:
+            name = os.path.relpath(file_path, worktree_path)
+        else:
+            name = file_path
+
+        return self.cache.key(GraalRepository.blob_hash(file_path), name, self.kind,
+                              self.analyzer.__class__.__name__, self.analyzer.version)
+
 
 class CoLicCommand(GraalCommand):
     """Class to run CoLic backend from the command line."""
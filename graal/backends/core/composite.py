@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+
+from grimoirelab_toolkit.introspect import find_signature_parameters
+
+import graal.backends
+from graal.graal import (Graal,
+                         GraalCommand,
+                         GraalError,
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL,
+                         CHECKOUT_MODES,
+                         find_backend)
+from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
+
+CATEGORY_COMPOSITE = 'composite'
+
+# Key of the items of each category, when they are split
+ITEMS_KEY = 'items'
+
+# Parameters of the composite backend shared with the backends of the analyses
+SHARED_PARAMS = ['exec_path', 'entrypoint', 'in_paths', 'out_paths', 'details', 'checkout_mode', 'incremental']
+
+logger = logging.getLogger(__name__)
+
+
+class Composite(Graal):
+    """Composite backend.
+
+    This class extends the Graal backend. It runs the analyses of
+    several backends on a single checkout of each commit, so the Git
+    log is read and the working tree is checked out once for all
+    of them.
+
+    The `analyses` are set as strings with the name of a backend and
+    one of its categories, optionally followed by parameters of the
+    backend which override the ones of this class (e.g.,
+    `colic:code_license_nomos:exec_path=/usr/bin/nomossa` or
+    `cocom:code_complexity_lizard_file:line_counter=lizard,threads=2`).
+    The values of the parameters are read as JSON, falling back to
+    strings. The parameters `exec_path`, `entrypoint`, `in_paths`,
+    `out_paths`, `details`, `checkout_mode` and `incremental` are
+    passed to the backends, which share the cache of this one.
+
+    By default, a single item is returned for each commit, where
+    `analysis` holds the results of each category. When `split`
+    is set, an item is returned for each category instead, as the
+    backend of the analysis would do, with its `backend_name`,
+    `backend_version` and `category`. In this case, the timings of
+    the commit are added to the first of its items.
+
+    A commit is skipped when it is filtered by all the backends.
+
+    :param uri: URI of the Git repository
+    :param git_path: path to the repository or to the log file
+    :param worktreepath: the directory where to store the working tree
+    :param analyses: list of analyses (e.g., `cocom:code_complexity_lizard_file`)
+    :param split: if enabled, an item is returned for each category
+    :param exec_path: path of the executable to perform the analysis
+    :param entrypoint: the entrypoint of the analysis
+    :param in_paths: the target paths of the analysis
+    :param out_paths: the paths to be excluded from the analysis
+    :param details: if enable, it returns fine-grained results
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
+    :param tag: label used to mark the data
+    :param archive: archive to store/retrieve items
+
+    :raises RepositoryError: raised when there was an error cloning or
+        updating the repository.
+    """
+    version = '0.1.0'
+
+    CATEGORIES = [CATEGORY_COMPOSITE]
+
+    def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, analyses=None, split=False,
+                 exec_path=None, entrypoint=None, in_paths=None, out_paths=None, details=False,
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
+        super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
+                         entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths, details=details,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
+                         tag=tag, archive=archive)
+
+        if not analyses:
+            raise GraalError(cause="Analyses cannot be empty")
+
+        self.analyses = analyses
+        self.split = split
+        self.delegates = []
+        self._item_delegate = None
+
+        for analysis in analyses:
+            backend, category, params = parse_analysis(analysis)
+            if category in [c for c, _ in self.delegates]:
+                raise GraalError(cause="Category %s set more than once" % category)
+
+            self.delegates.append((category, self.__create_delegate(uri, git_path, worktreepath,
+                                                                    backend, category, params)))
+
+    def fetch(self, category=CATEGORY_COMPOSITE, paths=None,
+              from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
+              branches=None, latest_items=False):
+        """Fetch commits and add the results of several analyses."""
+
+        items = super().fetch(category,
+                              from_date=from_date, to_date=to_date,
+                              branches=branches, latest_items=latest_items)
+
+        # the backends set up their analyzers in `fetch`, whose items are not consumed
+        for delegate_category, delegate in self.delegates:
+            delegate.cache = self.cache
+            delegate.fetch(category=delegate_category)
+
+        return items
+
+    def fetch_items(self, category, **kwargs):
+        """Fetch the commits and add the results of the analyses
+
+        :param category: the category of items to fetch
+        :param kwargs: backend arguments
+
+        :returns: a generator of items
+        """
+        for commit in super().fetch_items(category, **kwargs):
+            if not self.split:
+                yield commit
+                continue
+
+            for delegate, item in commit[ITEMS_KEY]:
+                # `metadata` is called on each item as soon as it is yielded
+                self._item_delegate = delegate
+                yield item
+
+            self._item_delegate = None
+
+    def metadata(self, item, filter_classified=False):
+        """Add metadata to an item.
+
+        When the items are split, the name and version of the backend
+        and the category are the ones of the analysis of the item.
+
+        :param item: an item fetched by a backend
+        :param filter_classified: sets if classified fields were filtered
+        """
+        item = super().metadata(item, filter_classified=filter_classified)
+
+        if self._item_delegate:
+            category, delegate = self._item_delegate
+            item['backend_name'] = delegate.__class__.__name__
+            item['backend_version'] = delegate.version
+            item['category'] = category
+
+        return item
+
+    @staticmethod
+    def metadata_category(item):
+        """Extracts the category from a Composite item.
+
+        This backend only generates one type of item which is
+        'composite'; when the items are split, their category is
+        set by `metadata`.
+        """
+        return CATEGORY_COMPOSITE
+
+    def _checkout_modes(self, category):
+        """Return the checkout modes supported by all the analyses"""
+
+        return [mode for mode in CHECKOUT_MODES
+                if all(mode in delegate._checkout_modes(c) for c, delegate in self.delegates)]
+
+    def _supports_incremental(self, category):
+        """Check whether a category can analyze only the changed directories.
+
+        The backends of the analyses check it for their own categories.
+        """
+        return True
+
+    def _run_options(self):
+        """Add the analyses and whether the items are split to the options of the run"""
+
+        options = super()._run_options()
+        options['analyses'] = self.analyses
+        options['split'] = self.split
+
+        return options
+
+    def _filter_commit(self, commit):
+        """Filter a commit when all the analyses filter it
+
+        :param commit: a Perceval commit item
+
+        :returns: a boolean value
+        """
+        return all(delegate._filter_commit(commit) for _, delegate in self.delegates)
+
+    def _analyze(self, commit):
+        """Run the analyses on the checkout version of the repository
+
+        :param commit: a Perceval commit item
+
+        :returns: a dict with the results of each category
+        """
+        analysis = {}
+
+        for category, delegate in self.delegates:
+            if delegate._filter_commit(commit):
+                continue
+
+            delegate._set_worktree(self.graalRepo)
+            analysis[category] = delegate._analyze(commit)
+
+        return analysis
+
+    def _post(self, commit):
+        """Build the item of each category or remove attributes of the
+        Graal item obtained
+
+        :param commit: a Graal commit item
+        """
+        if not self.split:
+            commit.pop('refs', None)
+            return commit
+
+        items = []
+        for category, delegate in self.delegates:
+            if category not in commit['analysis']:
+                continue
+
+            item = dict(commit, analysis=commit['analysis'][category])
+            items.append(((category, delegate), delegate._post(item)))
+
+        return {'commit': commit['commit'], ITEMS_KEY: items}
+
+    def __create_delegate(self, uri, git_path, worktreepath, backend, category, params):
+        """Create the backend of an analysis"""
+
+        backend_class, _ = find_backend(graal.backends, backend)
+        if not backend_class or backend_class is Composite:
+            raise GraalError(cause="Unknown backend %s" % backend)
+        if category not in backend_class.CATEGORIES:
+            raise GraalError(cause="Unknown category %s for backend %s" % (category, backend))
+
+        candidates = {param: getattr(self, param) for param in SHARED_PARAMS}
+        candidates.update(params)
+        candidates.update({'uri': uri, 'git_path': git_path, 'worktreepath': worktreepath})
+
+        try:
+            init_args = find_signature_parameters(backend_class.__init__, candidates)
+        except AttributeError as e:
+            raise GraalError(cause="Invalid parameters of %s, %s" % (backend, str(e)))
+
+        unknown = set(params) - set(init_args)
+        if unknown:
+            raise GraalError(cause="Unknown parameters of %s: %s" % (backend, ', '.join(sorted(unknown))))
+
+        return backend_class(**init_args)
+
+
+def parse_analysis(analysis):
+    """Parse the specification of an analysis.
+
+    :param analysis: a string like `backend:category[:param=value,...]`
+
+    :returns: a tuple with the backend, the category and a dict of parameters
+    """
+    fields = analysis.split(':', 2)
+    if len(fields) < 2 or not all(fields[:2]):
+        raise GraalError(cause="Invalid analysis %s, expected backend:category[:param=value,...]" % analysis)
+
+    params = {}
+    if len(fields) == 3:
+        for param in fields[2].split(','):
+            name, sep, value = param.partition('=')
+            if not sep or not name:
+                raise GraalError(cause="Invalid parameter %s of analysis %s" % (param, analysis))
+
+            try:
+                params[name] = json.loads(value)
+            except ValueError:
+                params[name] = value
+
+    return fields[0], fields[1], params
+
+
+class CompositeCommand(GraalCommand):
+    """Class to run Composite backend from the command line."""
+
+    BACKEND = Composite
+
+    @classmethod
+    def setup_cmd_parser(cls):
+        """Returns the Composite argument parser."""
+
+        parser = GraalCommand.setup_cmd_parser(cls.BACKEND)
+
+        # Composite options
+        group = parser.parser.add_argument_group('Composite arguments')
+        group.add_argument('--analyses', dest='analyses',
+                           nargs='+', type=str, required=True,
+                           help="Analyses run on each commit, as backend:category[:param=value,...] "
+                                "(e.g., cocom:code_complexity_lizard_file)")
+        group.add_argument('--split', dest='split',
+                           action='store_true', default=False,
+                           help="Return an item for each category instead of a single one")
+
+        return parser
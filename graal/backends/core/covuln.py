@@ -28,7 +28,11 @@ from graal.graal import (Graal,
                          GraalCommand,
                          GraalError,
                          GraalRepository,
-                         DEFAULT_WORKTREE_PATH)
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
+                         CHECKOUT_FULL)
+from graal.incremental import (SubtreeAnalyzer,
+                               merge_analyses)
 from graal.backends.core.analyzers.bandit import Bandit
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
@@ -43,6 +47,9 @@ class CoVuln(Graal):
     This class extends the Graal backend. It gathers
     insights about security vulnerabilities in Python code.
 
+    With the incremental analysis, Bandit is executed only on the
+    Python files of the directories changed by each commit.
+
     :param uri: URI of the Git repository
     :param gitpath: path to the repository or to the log file
     :param worktreepath: the directory where to store the working tree
@@ -51,6 +58,18 @@ class CoVuln(Graal):
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
     :param details: if enable, it returns fine-grained results
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
@@ -63,15 +82,25 @@ class CoVuln(Graal):
 
     def __init__(self, uri, git_path, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
-                 tag=None, archive=None):
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False, tag=None, archive=None):
         super().__init__(uri, git_path, worktreepath, exec_path=exec_path,
                          entrypoint=entrypoint, in_paths=in_paths, out_paths=out_paths, details=details,
+                         workers=workers, cache_path=cache_path, checkout_mode=checkout_mode,
+                         incremental=incremental, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, reuse_worktree=reuse_worktree,
                          tag=tag, archive=archive)
 
         if not self.entrypoint:
             raise GraalError(cause="Entrypoint cannot be null")
 
         self.vuln_analyzer = VulnAnalyzer(self.details)
+        self.subtree_analyzer = None
+        if self.incremental:
+            self.subtree_analyzer = SubtreeAnalyzer(self.vuln_analyzer.analyze, self.vuln_analyzer.merge,
+                                                    file_filter=VulnAnalyzer.is_python_file)
 
     def fetch(self, category=CATEGORY_COVULN, paths=None,
               from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
@@ -102,6 +131,11 @@ class CoVuln(Graal):
         """
         return False
 
+    def _supports_incremental(self, category):
+        """Check whether a category can analyze only the changed directories"""
+
+        return True
+
     def _analyze(self, commit):
         """Analyse a snapshot and the corresponding
         checkout version of the repository
@@ -117,7 +151,16 @@ class CoVuln(Graal):
                                % (module_path, commit['commit']))
                 return {}
 
-        analysis = self.vuln_analyzer.analyze(module_path)
+        if self.subtree_analyzer:
+            def analyze():
+                return self.subtree_analyzer.analyze(self.graalRepo, commit['commit'], self.worktreepath,
+                                                     path=self.entrypoint)
+        else:
+            def analyze():
+                return self.vuln_analyzer.analyze(module_path)
+
+        analysis = self._analyze_tree(commit, analyze, [self.vuln_analyzer.bandit],
+                                      path=self.entrypoint, options=[self.details])
 
         return analysis
 
@@ -141,10 +184,11 @@ class VulnAnalyzer:
         self.details = details
         self.bandit = Bandit()
 
-    def analyze(self, folder_path):
+    def analyze(self, folder_path, file_paths=None):
         """Analyze the content of a folder using Bandit
 
         :param folder_path: folder path
+        :param file_paths: if set, only these files of the folder are analyzed
 
         :returns a dict containing the results of the analysis, like the one below
         {
@@ -154,12 +198,34 @@ class VulnAnalyzer:
         """
         kwargs = {
             'folder_path': folder_path,
+            'file_paths': file_paths,
             'details': self.details
         }
         analysis = self.bandit.analyze(**kwargs)
 
         return analysis
 
+    def merge(self, analyses):
+        """Merge the results of the analyses of different lists of files"""
+
+        ranks = {'undefined': 0, 'low': 0, 'medium': 0, 'high': 0}
+        empty = {
+            'loc_analyzed': 0,
+            'num_vulns': 0,
+            'by_severity': dict(ranks),
+            'by_confidence': dict(ranks)
+        }
+        if self.details:
+            empty['vulns'] = []
+
+        return merge_analyses([empty] + analyses)
+
+    @staticmethod
+    def is_python_file(file_path):
+        """Check whether a file is analyzed by Bandit when scanning a folder"""
+
+        return GraalRepository.extension(file_path) in ['py', 'pyw']
+
 
 class CoVulnCommand(GraalCommand):
     """Class to run CoVuln backend from the command line."""
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+
+import graal.backends
+from .graal import (DEFAULT_WORKTREE_PATH,
+                    GraalError,
+                    GraalRepository,
+                    fetch,
+                    find_backend)
+
+BATCH_COMMAND = 'batch'
+DEFAULT_BATCH_WORKERS = os.cpu_count() or 1
+DEFAULT_FETCHERS = 4
+SUMMARY_FILE = 'summary.json'
+
+# Max number of mirrors per worker being prepared or
+# waiting to be analyzed
+BATCH_BUFFER_SIZE = 2
+
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJob:
+    """Analysis of a repository with a backend, as `graal <backend> <uri>` does.
+
+    :param uri: URI of the Git repository
+    :param backend: name of the backend (e.g., `cocom`)
+    :param category: category of the items to fetch
+    :param options: list of arguments of the backend command (e.g., `['--details']`)
+    :param output: path of the file where the items are written, as JSON lines
+    """
+    def __init__(self, uri, backend, category=None, options=None, output=None):
+        self.uri = uri
+        self.backend = backend
+        self.category = category
+        self.options = options or []
+        self.output = output
+
+    def args(self, git_path, worktree_path):
+        """Arguments of the backend command of the job.
+
+        The paths of the mirror and of the working trees are
+        used unless they are set in the options of the job.
+
+        :param git_path: path of the mirror of the repository
+        :param worktree_path: directory where the working trees are created
+        """
+        args = [self.uri, '--git-path', git_path]
+        if self.category:
+            args.extend(['--category', self.category])
+
+        paths = _parse_paths(self.options)
+        if not paths.worktree_path:
+            args.extend(['--worktree-path', worktree_path])
+
+        return args + self.options
+
+
+def load_manifest(path):
+    """Read the jobs of a manifest.
+
+    The manifest is a file with a JSON document per line, which
+    sets the `uri`, the `backend` and, optionally, the `category`,
+    the `options` and the `output` of a job (see `BatchJob`).
+
+    :param path: path of the manifest
+
+    :returns: a list of BatchJob objects
+
+    :raises GraalError: when a job is not valid
+    """
+    jobs = []
+
+    with open(path, 'r') as fd:
+        for nline, line in enumerate(fd, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                job = json.loads(line)
+                jobs.append(BatchJob(job['uri'], job['backend'], category=job.get('category'),
+                                     options=job.get('options'), output=job.get('output')))
+            except (ValueError, KeyError, TypeError) as e:
+                raise GraalError(cause="Invalid job at line %s of %s, %s" % (nline, path, str(e)))
+
+    return jobs
+
+
+class Batch:
+    """Run the jobs of a manifest over a shared pool.
+
+    The jobs are grouped by the mirror of their repository (see
+    `GraalCommand.default_git_path`), so each repository is cloned
+    or updated once and the jobs sharing a mirror run one after
+    the other. Mirrors are prepared by a pool of `fetchers` threads,
+    while the analyses run on a pool of `workers` processes; thus,
+    the next repositories are being cloned while the previous ones
+    are analyzed. At most `BATCH_BUFFER_SIZE` mirrors per worker are
+    prepared ahead of their analysis.
+
+    The items of each job are written to its `output` or to a file
+    in `output_path` named after the position of the job in the
+    manifest. The results of the jobs are saved in `output_path`
+    too, in `SUMMARY_FILE`.
+
+    :param jobs: list of BatchJob objects
+    :param output_path: directory where the items and the summary are written
+    :param workers: number of processes analyzing the repositories
+    :param fetchers: number of threads cloning or updating the repositories
+    :param worktree_path: directory where the working trees are created
+    """
+    def __init__(self, jobs, output_path, workers=DEFAULT_BATCH_WORKERS, fetchers=DEFAULT_FETCHERS,
+                 worktree_path=DEFAULT_WORKTREE_PATH):
+        if workers < 1:
+            raise GraalError(cause="number of workers must be greater than 0, %s given" % workers)
+        if fetchers < 1:
+            raise GraalError(cause="number of fetchers must be greater than 0, %s given" % fetchers)
+
+        self.jobs = jobs
+        self.output_path = output_path
+        self.workers = workers
+        self.fetchers = fetchers
+        self.worktree_path = worktree_path
+
+    def run(self):
+        """Run the jobs.
+
+        :returns: a list with the result of each job, in the order of
+            the manifest, which holds its status, the number of items
+            written, the seconds spent preparing the mirror and running
+            the analysis, and the error, if any
+        """
+        os.makedirs(self.output_path, exist_ok=True)
+
+        mirrors = self.__group_by_mirror()
+        results = [None] * len(self.jobs)
+        logger.info("Running %s jobs on %s repositories", len(self.jobs), len(mirrors))
+
+        # the processes are spawned, since the threads of the fetchers may hold locks
+        mp_context = multiprocessing.get_context('spawn')
+        max_running = self.workers * BATCH_BUFFER_SIZE
+        pending = collections.deque(mirrors)
+        running = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.fetchers) as fetchers, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as workers:
+            while pending or running:
+                while pending and len(running) < max_running:
+                    mirror = pending.popleft()
+                    future = fetchers.submit(_prepare_mirror, mirror['uri'], mirror['git_path'],
+                                             mirror['worktree_path'])
+                    running[future] = mirror
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    mirror = running.pop(future)
+
+                    if 'prepare' not in mirror:
+                        try:
+                            mirror['prepare'] = future.result()
+                        except Exception as e:
+                            logger.error("Preparation of %s failed, %s", mirror['uri'], str(e))
+                            for i, *_ in mirror['jobs']:
+                                results[i] = self.__result(i, STATUS_FAILED, error=str(e))
+                            continue
+
+                        future = workers.submit(_run_jobs, mirror['jobs'], mirror['worktree_path'])
+                        running[future] = mirror
+                    else:
+                        try:
+                            job_results = future.result()
+                        except Exception as e:
+                            logger.error("Jobs of %s failed, %s", mirror['uri'], str(e))
+                            for i, *_ in mirror['jobs']:
+                                results[i] = self.__result(i, STATUS_FAILED, prepare=mirror['prepare'], error=str(e))
+                            continue
+
+                        for job, (status, nitems, elapsed, error) in zip(mirror['jobs'], job_results):
+                            results[job[0]] = self.__result(job[0], status, nitems, mirror['prepare'], elapsed, error)
+
+        with open(os.path.join(self.output_path, SUMMARY_FILE), 'w') as fd:
+            json.dump(results, fd, indent=4, sort_keys=True)
+
+        nfailed = len([r for r in results if r['status'] == STATUS_FAILED])
+        logger.info("Batch completed: %s jobs, %s failed", len(results), nfailed)
+
+        return results
+
+    def __group_by_mirror(self):
+        """Group the jobs by the path of their mirror, keeping the order of the manifest"""
+
+        mirrors = {}
+
+        for i, job in enumerate(self.jobs):
+            git_path = _parse_paths(job.options).git_path
+            if not git_path:
+                _, command_class = find_backend(graal.backends, job.backend)
+                if not command_class:
+                    raise GraalError(cause="Unknown backend %s" % job.backend)
+                git_path = command_class.default_git_path(job.uri)
+
+            if git_path not in mirrors:
+                # each mirror gets its own directory of working trees, since the
+                # names of the working trees of different mirrors may be the same
+                mirrors[git_path] = {
+                    'uri': job.uri,
+                    'git_path': git_path,
+                    'worktree_path': os.path.join(self.worktree_path, str(len(mirrors))),
+                    'jobs': []
+                }
+
+            mirror = mirrors[git_path]
+            job.output = job.output or os.path.join(self.output_path, '%s-%s.json' % (i, job.backend))
+            args = job.args(git_path, mirror['worktree_path'])
+            mirror['jobs'].append((i, job.backend, job.output, args))
+
+        return list(mirrors.values())
+
+    def __result(self, i, status, nitems=0, prepare=None, analyze=None, error=None):
+        job = self.jobs[i]
+
+        return {
+            'uri': job.uri,
+            'backend': job.backend,
+            'category': job.category,
+            'output': job.output,
+            'status': status,
+            'items': nitems,
+            'prepare': prepare,
+            'analyze': analyze,
+            'error': error
+        }
+
+
+class BatchCommand:
+    """Class to run the jobs of a manifest from the command line"""
+
+    def __init__(self, *args):
+        self.parsed_args = self.setup_cmd_parser().parse_args(args)
+
+    def run(self):
+        """Run the jobs of the manifest"""
+
+        jobs = load_manifest(self.parsed_args.manifest)
+        batch = Batch(jobs, self.parsed_args.output_path,
+                      workers=self.parsed_args.workers,
+                      fetchers=self.parsed_args.fetchers,
+                      worktree_path=self.parsed_args.worktree_path)
+
+        return batch.run()
+
+    @staticmethod
+    def setup_cmd_parser():
+        """Returns the batch argument parser."""
+
+        parser = argparse.ArgumentParser(prog='graal ' + BATCH_COMMAND)
+        parser.add_argument('manifest',
+                            help="File with a job per line, as a JSON document with the 'uri', the 'backend' "
+                                 "and, optionally, the 'category', the 'options' and the 'output' of the job")
+        parser.add_argument('-o', '--output-path', dest='output_path', required=True,
+                            help="Directory where the items and the summary of the jobs are written")
+        parser.add_argument('--workers', dest='workers',
+                            type=int, default=DEFAULT_BATCH_WORKERS,
+                            help="Number of processes analyzing the repositories")
+        parser.add_argument('--fetchers', dest='fetchers',
+                            type=int, default=DEFAULT_FETCHERS,
+                            help="Number of threads cloning or updating the repositories")
+        parser.add_argument('--worktree-path', dest='worktree_path',
+                            default=DEFAULT_WORKTREE_PATH,
+                            help="Path where to save the working trees")
+
+        return parser
+
+
+def _parse_paths(options):
+    """Obtain the paths of the mirror and of the working trees set in the options of a job"""
+
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--git-path', dest='git_path')
+    parser.add_argument('--worktree-path', dest='worktree_path')
+
+    paths, _ = parser.parse_known_args(options)
+
+    return paths
+
+
+def _prepare_mirror(uri, git_path, worktree_path):
+    """Clone or update the mirror of a repository and create the directory
+    of its working trees, returning the seconds spent"""
+
+    start = time.perf_counter()
+
+    if not GraalRepository.exists(git_path):
+        GraalRepository.clone(uri, git_path)
+    elif os.path.isdir(git_path):
+        GraalRepository(uri, git_path).update()
+
+    os.makedirs(worktree_path, exist_ok=True)
+
+    return time.perf_counter() - start
+
+
+def _run_jobs(jobs, worktree_path):
+    """Run the jobs of a mirror one after the other.
+
+    :param jobs: list of tuples with the index, the backend,
+        the output and the command arguments of each job
+    :param worktree_path: directory of the working trees of the mirror,
+        which is removed when it is empty
+
+    :returns: a list with the status, the number of items, the
+        seconds spent and the error, if any, of each job
+    """
+    results = []
+
+    for _, backend, output, args in jobs:
+        start = time.perf_counter()
+        nitems = 0
+
+        try:
+            _, command_class = find_backend(graal.backends, backend)
+            cmd = command_class(*args)
+
+            backend_args = vars(cmd.parsed_args)
+            category = backend_args.pop('category', None)
+
+            with open(output, 'w') as fd:
+                for item in fetch(command_class.BACKEND, backend_args, category):
+                    fd.write(json.dumps(item, separators=(',', ':'), sort_keys=True))
+                    fd.write('\n')
+                    nitems += 1
+
+            results.append((STATUS_OK, nitems, time.perf_counter() - start, None))
+        except Exception:
+            results.append((STATUS_FAILED, nitems, time.perf_counter() - start, traceback.format_exc()))
+
+    try:
+        os.rmdir(worktree_path)
+    except OSError as e:
+        # the directory is kept when some working trees are left in it
+        logger.debug("Directory %s not removed, %s", worktree_path, str(e))
+
+    return results
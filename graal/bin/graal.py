@@ -28,6 +28,7 @@ import sys
 
 import graal.graal
 import graal.backends.core
+from graal.batch import BATCH_COMMAND, BatchCommand
 
 
 GRAAL_USAGE_MSG = """%(prog)s [-g] <backend> [<args>] | --help | --version"""
@@ -40,9 +41,14 @@ Repositories are reached using specific backends, which are:
     codep            Fetch package and class dependencies of Python modules
     colang           Fetch code language distribution
     colic            Fetch license & copyright information
+    composite        Run several analyses on a single checkout of each commit
     coqua            Fetch code quality data of Python code
     covuln           Fetch security vulnerabilities in Python code
 
+Several repositories can be analyzed at once, sharing a pool of processes:
+
+    batch            Run the jobs of a manifest
+
 optional arguments:
   -h, --help            show this help message and exit
   -v, --version         show version
@@ -62,16 +68,19 @@ GRAAL_DEBUG_LOG_FORMAT = "[%(asctime)s - %(name)s - %(levelname)s] - %(message)s
 def main():
     args = parse_args()
 
-    _, GRAAL_CMDS = graal.graal.find_backends(graal.backends)
+    if args.backend == BATCH_COMMAND:
+        klass = BatchCommand
+    else:
+        # only the module of the backend requested is imported
+        _, klass = graal.graal.find_backend(graal.backends, args.backend)
 
-    if args.backend not in GRAAL_CMDS:
+    if not klass:
         raise RuntimeError("Unknown backend %s" % args.backend)
 
     configure_logging(args.debug)
 
     logging.info("Starting the quest for the Graal.")
 
-    klass = GRAAL_CMDS[args.backend]
     cmd = klass(*args.backend_args)
     cmd.run()
 
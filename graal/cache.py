@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import json
+import logging
+import sqlite3
+
+MEMORY_CACHE = ':memory:'
+
+CACHE_TIMEOUT = 60
+
+# Placeholder of the worktree in the results which include it
+WORKTREE_PLACEHOLDER = '<graal:worktree>'
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """Store the results of analyses addressed by their content.
+
+    Results are saved as JSON documents in a SQLite database, so
+    they can be shared among processes and runs. When `path` is
+    set to `:memory:`, the results are kept in memory and lost once
+    the process ends.
+
+    Keys are built with the method `key`, using the data that
+    identifies the analysis such as the hash of the analyzed
+    content, the analyzer and its version, and the options used.
+    Results which include paths of the files analyzed are stored
+    with the worktree replaced by a placeholder, which is set back
+    to the worktree of the reader, so worktrees of workers and
+    branches share them.
+
+    :param path: path of the SQLite database
+    """
+    def __init__(self, path=MEMORY_CACHE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @staticmethod
+    def key(*parts):
+        """Build a cache key from a list of JSON serializable parts
+
+        :param parts: data identifying the analysis
+
+        :returns: a string
+        """
+        data = json.dumps(parts, sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def get(self, key, worktree_path=None):
+        """Get the result stored with `key`
+
+        :param key: the key of the result
+        :param worktree_path: worktree set in the paths of the result
+
+        :returns: the result or None when the key is not found
+        """
+        cursor = self.connection.execute("SELECT value FROM analysis WHERE key = ?", (key,))
+        row = cursor.fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        data = row[0]
+        if worktree_path:
+            data = data.replace(WORKTREE_PLACEHOLDER, _json_escape(worktree_path))
+
+        return json.loads(data)
+
+    def set(self, key, value, worktree_path=None):
+        """Store a result with `key`
+
+        :param key: the key of the result
+        :param value: a JSON serializable result
+        :param worktree_path: worktree replaced in the paths of the result
+        """
+        data = json.dumps(value, sort_keys=True)
+        if worktree_path:
+            data = data.replace(_json_escape(worktree_path), WORKTREE_PLACEHOLDER)
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO analysis (key, value) VALUES (?, ?)",
+                                    (key, data))
+
+    def close(self):
+        """Close the connection to the database"""
+
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+        logger.debug("Analysis cache %s closed: %s hits, %s misses",
+                     self.path, self.hits, self.misses)
+
+    @property
+    def connection(self):
+        if not self._conn:
+            self._conn = sqlite3.connect(self.path, timeout=CACHE_TIMEOUT)
+            if self.path != MEMORY_CACHE:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS analysis "
+                                   "(key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._conn
+
+
+def _json_escape(path):
+    """Get a path, without trailing separators, as written in a JSON string"""
+
+    return json.dumps(path.rstrip('/'))[1:-1]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import json
+import logging
+import sqlite3
+
+CHECKPOINT_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Store the commits already analyzed by a run.
+
+    The hashes of the commits are saved in a SQLite database
+    together with the identifier of the run, which is built
+    with the method `run_id` using the data that identifies the
+    items generated, such as the backend, the category and the
+    options of the analysis. This way, a run interrupted by an
+    error can be resumed skipping the commits already analyzed.
+
+    :param path: path of the SQLite database
+    """
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @staticmethod
+    def run_id(*parts):
+        """Build the identifier of a run from a list of JSON serializable parts
+
+        :param parts: data identifying the run
+
+        :returns: a string
+        """
+        data = json.dumps(parts, sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def analyzed(self, run_id):
+        """Get the commits analyzed by a run
+
+        :param run_id: the identifier of the run
+
+        :returns: a set with the hashes of the commits
+        """
+        cursor = self.connection.execute("SELECT hash FROM checkpoint WHERE run_id = ?", (run_id,))
+        return {row[0] for row in cursor}
+
+    def add(self, run_id, hash):
+        """Record a commit analyzed by a run
+
+        :param run_id: the identifier of the run
+        :param hash: the hash of the commit
+        """
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO checkpoint (run_id, hash) VALUES (?, ?)",
+                                    (run_id, hash))
+
+    def close(self):
+        """Close the connection to the database"""
+
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+        logger.debug("Checkpoint store %s closed", self.path)
+
+    @property
+    def connection(self):
+        if not self._conn:
+            self._conn = sqlite3.connect(self.path, timeout=CHECKPOINT_TIMEOUT)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS checkpoint "
+                                   "(run_id TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (run_id, hash))")
+        return self._conn
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetter:
+    """Failure of the analysis of a commit.
+
+    :param hash: the hash of the commit
+    :param stage: the stage where the analysis failed (`checkout`, `analyze` or `post`)
+    :param error: the exception raised
+    :param traceback: the formatted traceback of the exception
+    :param elapsed: seconds spent on the commit before the failure
+    """
+    def __init__(self, hash, stage, error, traceback, elapsed):
+        self.hash = hash
+        self.stage = stage
+        self.error = type(error).__name__
+        self.message = str(error)
+        self.traceback = traceback
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            'commit': self.hash,
+            'stage': self.stage,
+            'error': self.error,
+            'message': self.message,
+            'traceback': self.traceback,
+            'elapsed': self.elapsed
+        }
+
+
+class DeadLetterFile:
+    """Store the commits whose analysis failed.
+
+    The failures are appended to a file as JSON documents, one
+    per line, so they are kept when the analysis is interrupted.
+    When a commit fails more than once, only its last failure
+    is taken into account.
+
+    :param path: path of the file
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_fd'] = None
+        return state
+
+    def add(self, dead_letter):
+        """Append the failure of a commit to the file
+
+        :param dead_letter: a DeadLetter object
+        """
+        if not self._fd:
+            self._fd = open(self.path, 'a')
+
+        self._fd.write(json.dumps(dead_letter.to_dict(), sort_keys=True) + '\n')
+        self._fd.flush()
+
+    def load(self):
+        """Read the failures stored in the file
+
+        :returns: a dict with the last failure of each commit, keyed by hash
+        """
+        dead_letters = {}
+
+        if not os.path.exists(self.path):
+            return dead_letters
+
+        with open(self.path, 'r') as fd:
+            for line in fd:
+                if line.strip():
+                    dead_letter = json.loads(line)
+                    dead_letters[dead_letter['commit']] = dead_letter
+
+        return dead_letters
+
+    def remove(self, hashes):
+        """Remove the failures of a set of commits from the file
+
+        :param hashes: the hashes of the commits
+        """
+        self.close()
+
+        dead_letters = [dl for hash, dl in self.load().items() if hash not in hashes]
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as fd:
+            for dead_letter in dead_letters:
+                fd.write(json.dumps(dead_letter, sort_keys=True) + '\n')
+        os.replace(tmp_path, self.path)
+
+        logger.debug("%s commits removed from dead letters %s", len(hashes), self.path)
+
+    def close(self):
+        """Close the file"""
+
+        if self._fd:
+            self._fd.close()
+            self._fd = None
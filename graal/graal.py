@@ -23,15 +23,27 @@
 #
 
 import argparse
+import atexit
+import collections
+import concurrent.futures
 from glob import glob
+import hashlib
 import io
 import importlib
+import json
 import logging
+import multiprocessing
 import os
+import pickle
 import pkgutil
 import shutil
+import subprocess
 import sys
 import tarfile
+import tempfile
+import threading
+import time
+import traceback
 
 from grimoirelab_toolkit.datetime import (datetime_utcnow,
                                           str_to_datetime)
@@ -44,10 +56,53 @@ from perceval.errors import BaseError, RepositoryError
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
 from ._version import __version__
+from .cache import AnalysisCache
+from .checkpoint import CheckpointStore
+from .deadletter import (DeadLetter,
+                         DeadLetterFile)
+from .stats import (STAGE_ANALYZE,
+                    STAGE_CHECKOUT,
+                    STAGE_COMMIT,
+                    STAGE_GIT,
+                    STAGE_LOG,
+                    STAGE_METADATA,
+                    STAGE_OUTPUT,
+                    STAGE_POST,
+                    Stats,
+                    activate,
+                    measure,
+                    rusage)
+from .trace import TraceFile
 
 CATEGORY_GRAAL = 'graal'
 DEFAULT_WORKTREE_PATH = '/tmp/worktrees/'
 GIT_EXEC_PATH = '/usr/bin/git'
+DEFAULT_WORKERS = 1
+# Suffix of the checkpoint store saved next to the mirror
+CHECKPOINT_SUFFIX = '-checkpoints.db'
+
+# The working tree is checked out at each commit
+CHECKOUT_FULL = 'full'
+# Only the files touched by each commit are checked out in the working tree
+CHECKOUT_SPARSE = 'sparse'
+# The working tree is not created, file contents are read from the mirror
+CHECKOUT_NONE = 'none'
+CHECKOUT_MODES = [CHECKOUT_FULL, CHECKOUT_SPARSE, CHECKOUT_NONE]
+
+# Max number of commits per worker waiting to be yielded when
+# the analysis runs in parallel
+PARALLEL_BUFFER_SIZE = 2
+
+# Suffix of the working trees of the execnet gateways
+GATEWAY_WORKTREE_SUFFIX = '-gw%s'
+# Seconds to wait for the gateways to finish once the analysis is over
+GATEWAY_TIMEOUT = 60
+
+# Suffix of the working trees of the branches, when several branches are analyzed
+BRANCH_WORKTREE_SUFFIX = '-br%s'
+
+# Suffix of the working trees being deleted in background
+STALE_WORKTREE_SUFFIX = '.stale-'
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +133,79 @@ class Graal(Git):
     method `_analyze(self, commit)` as well as tweak
     the item generated by redefining the method `_post(commit)`.
 
+    When `workers` is greater than one, the commits are analyzed
+    in parallel by a pool of processes, each one owning a different
+    working tree of the same mirror. The items are still returned
+    in the order the commits were obtained.
+
+    The analysis can also be distributed to `gateways`, a list of
+    execnet specifications (e.g., `popen` or `ssh=user@host`). Each
+    gateway receives a copy of the backend, creates its own working tree
+    (cloning the repository in `git_path` if it is not there) and analyzes
+    the commits sent by the process running `fetch_items`, which still
+    returns the items in the order the commits were obtained.
+
+    When `branches` are fetched, the ones which contain each commit are
+    added to its item, under `branches`; when they are not set, the items
+    do not have this attribute. The commits of several branches are read
+    from a single Git log, thus the commits shared by some of them are
+    analyzed only once. Unless the analysis runs on `workers` or
+    `gateways`, each branch has its own working tree, where the commits
+    whose first branch (in the order of `branches`) is that one are
+    checked out, so every working tree only moves along its branch.
+
+    By default, the working trees are created at the beginning of each
+    run and deleted at its end. When `reuse_worktree` is set, they are
+    kept, and the next runs only check them out at their commits, as long
+    as they are still valid working trees of the mirror. The working trees
+    which cannot be reused, such as the ones left by an interrupted run, are
+    moved aside and deleted in background, while the analysis goes on.
+
+    When `cache_path` is set, backends can save the results of their
+    analyses in an `AnalysisCache` stored at that path (use `:memory:`
+    to keep it in memory), and reuse them when the same content is
+    analyzed again. The backends analyzing whole snapshots can rely on
+    `_analyze_tree` to reuse the results obtained on identical trees.
+
+    The `checkout_mode` controls how the files of each commit are
+    made available to the analysis. By default (`full`), the working
+    tree is checked out at every commit; with `sparse`, only the paths
+    returned by `_sparse_paths` (by default, the files touched by the
+    commit that match `in_paths`) are checked out; with `none`, no working
+    tree is created and the backends read the contents of the files directly
+    from the mirror (see `GraalRepository.read_blob`). Backends declare
+    the modes supported by each category via `_checkout_modes`.
+
+    When `incremental` is set, the categories analyzing whole snapshots
+    (see `_supports_incremental`) keep the results of each directory and
+    analyze again only the directories changed since the previous commit
+    (see `graal.incremental.SubtreeAnalyzer`).
+
+    When `resume` is set, the commits analyzed are recorded in a
+    `CheckpointStore` saved next to the mirror, together with the data
+    which identifies the items generated (the backend, the category and
+    the options returned by `_run_options`), and the commits already
+    recorded are skipped. Thus, a run started with `resume` can be
+    continued by another one when it is interrupted.
+
+    When `dead_letters_path` is set, an error raised while analyzing
+    a commit does not stop the analysis: the commit, the stage where it
+    failed, the error and the time spent on it are appended to a
+    `DeadLetterFile` at that path, no item is returned for the commit
+    and the analysis goes on. With `retry_dead_letters`, only the commits
+    stored in the file are analyzed, and the ones analyzed successfully
+    are removed from it.
+
+    The time spent on each stage of the analysis (reading the Git log,
+    checking out, analyzing and post-processing the commits, adding the
+    metadata, handing the items over) and by each analyzer is measured
+    with `graal.stats` when `stats_path` or `timings` are set. The first
+    one saves the stats of the whole run as a JSON document, while the
+    second one adds the stats of each commit to its item, under `timings`.
+    With `trace_path`, a span is written for each commit, stage, analyzer
+    and Git command to a trace file in Chrome trace event format (see
+    `graal.trace.TraceFile`).
+
     :param uri: URI of the Git repository
     :param git_path: path to where is/to clone the repository
     :param worktreepath: the directory where to store the working tree
@@ -86,18 +214,33 @@ class Graal(Git):
     :param in_paths: the target paths of the analysis
     :param out_paths: the paths to be excluded from the analysis
     :param details: if enable, it returns fine-grained results
+    :param workers: number of processes used to analyze the commits
+    :param cache_path: path of the cache of analysis results
+    :param checkout_mode: how the files of each commit are obtained (`full`, `sparse` or `none`)
+    :param incremental: if enabled, only the directories changed by each commit are analyzed
+    :param resume: if enabled, the commits already analyzed by a previous run are skipped
+    :param dead_letters_path: path of the file where the commits whose analysis failed are stored
+    :param retry_dead_letters: if enabled, only the commits stored in the dead letters are analyzed
+    :param stats_path: path of the JSON file where the stats of the run are saved
+    :param timings: if enabled, the stats of each commit are added to its item
+    :param trace_path: path of the file where the spans of the analysis are saved
+    :param gateways: list of specifications of the execnet gateways where the commits are analyzed
+    :param reuse_worktree: if enabled, the working trees are kept and reused by the next runs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
 
     :raises RepositoryError: raised when there was an error cloning or
         updating the repository.
     """
-    version = '0.6.1'
+    version = '0.10.0'
 
     CATEGORIES = [CATEGORY_GRAAL]
 
     def __init__(self, uri, gitpath, worktreepath=DEFAULT_WORKTREE_PATH, exec_path=None,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
+                 workers=DEFAULT_WORKERS, cache_path=None, checkout_mode=CHECKOUT_FULL,
+                 incremental=False, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, reuse_worktree=False,
                  tag=None, archive=None):
         super().__init__(uri, gitpath, tag=tag, archive=archive)
         self.uri = uri
@@ -109,6 +252,34 @@ class Graal(Git):
         self.out_paths = out_paths
         self.details = details
 
+        if workers < 1:
+            raise GraalError(cause="number of workers must be greater than 0, %s given" % workers)
+        self.workers = workers
+        if workers > 1 and gateways:
+            raise GraalError(cause="workers and gateways cannot be used together")
+        self.gateways = gateways or []
+        self.reuse_worktree = reuse_worktree
+        self.cache = AnalysisCache(cache_path) if cache_path else None
+
+        if checkout_mode not in CHECKOUT_MODES:
+            raise GraalError(cause="Unknown checkout mode %s" % checkout_mode)
+        self.checkout_mode = checkout_mode
+        self.incremental = incremental
+        self.resume = resume
+        self.checkpoints = CheckpointStore(self.gitpath.rstrip('/') + CHECKPOINT_SUFFIX) if resume else None
+
+        if retry_dead_letters and not dead_letters_path:
+            raise GraalError(cause="dead letters path must be set to retry the dead letters")
+        self.dead_letters = DeadLetterFile(dead_letters_path) if dead_letters_path else None
+        self.retry_dead_letters = retry_dead_letters
+
+        self.stats_path = stats_path
+        self.timings = timings
+        self.trace_path = trace_path
+        self.stats = None
+        self.commit_stats = None
+        self.commit_timings = {}
+
         if not GraalRepository.exists(worktreepath):
             os.mkdir(worktreepath)
 
@@ -153,6 +324,14 @@ class Graal(Git):
 
         :returns: a generator of commits
         """
+        if self.checkout_mode not in self._checkout_modes(category):
+            cause = "Checkout mode %s not supported by category %s" % (self.checkout_mode, category)
+            raise GraalError(cause=cause)
+
+        if self.incremental and not self._supports_incremental(category):
+            cause = "Incremental analysis not supported by category %s" % category
+            raise GraalError(cause=cause)
+
         items = super().fetch(category=category,
                               from_date=from_date, to_date=to_date,
                               branches=branches, latest_items=latest_items)
@@ -168,35 +347,104 @@ class Graal(Git):
         :returns: a generator of items
         """
         icommits = 0
-        branch = None
 
-        # the worktree is created from the default branch or from the first branch in `branches`. This
-        # is needed since currently Graal doesn't support multiple worktrees
-        branches = kwargs.get('branches', [])
-        if branches and len(branches) > 1:
-            logger.warning("Only the branch %s will be analyzed" % branches[0])
-            branch = branches[0]
-            kwargs['branches'] = [branch]
-
-        self.graalRepo = self.__create_graal_repository(branch)
+        self.stats = None
+        trace_file = None
+        if self.stats_path or self.timings or self.trace_path:
+            self.stats = Stats(trace=bool(self.trace_path))
+        if self.trace_path:
+            trace_file = TraceFile(self.trace_path, process_name='graal ' + self.__class__.__name__)
+        start = time.perf_counter()
+
+        # the worktree is created from the default branch or, when there are
+        # several branches, from the first branch in `branches`
+        branches = list(dict.fromkeys(kwargs.get('branches') or []))
+
+        # the commits are checked out by the gateways, on their own working trees
+        self.graalRepo = self.__create_graal_repository(branches[0] if len(branches) > 1 else None,
+                                                        checkout=not self.gateways)
+        branch_repos = self.__create_branch_repositories(branches)
+
+        run_id = None
+        analyzed = set()
+        if self.checkpoints:
+            run_id = self.checkpoints.run_id(self.__class__.__name__, self.version, category,
+                                             self.origin, self.tag, self._run_options())
+            analyzed = self.checkpoints.analyzed(run_id)
+        if analyzed:
+            logger.info("Resuming analysis, %s commits already analyzed", len(analyzed))
+
+        to_retry = None
+        if self.retry_dead_letters:
+            to_retry = set(self.dead_letters.load())
+            logger.info("Retrying %s commits from dead letters", len(to_retry))
 
         commits = super().fetch_items(category, **kwargs)
-        for commit in commits:
-            try:
-                if self._filter_commit(commit):
-                    continue
+        commits = (commit for commit in commits
+                   if commit['commit'] not in analyzed and (to_retry is None or commit['commit'] in to_retry))
+        if branches:
+            commits = self.__add_branches(commits, branches)
+        if self.stats:
+            commits = self.__measure_log(commits)
+
+        if self.gateways:
+            items = self.__analyze_commits_in_gateways(commits)
+        elif self.workers > 1:
+            items = self.__analyze_commits_in_parallel(commits)
+        else:
+            items = self.__analyze_commits(commits, branch_repos)
+
+        retried = set()
+        for commit, commit_stats, commit_events in items:
+            if commit_stats:
+                self.stats.update(commit_stats)
+                self.stats.events.extend(commit_events)
 
-                self.graalRepo.checkout(commit['commit'])
-                commit['analysis'] = self._analyze(commit)
+            if isinstance(commit, DeadLetter):
+                logger.warning("Analysis failed at %s (%s), commit added to dead letters",
+                               commit.hash, commit.stage)
+                self.dead_letters.add(commit)
+                continue
 
-                commit = self._post(commit)
+            if self.timings:
+                # the timings are added to the item by `metadata`
+                self.commit_timings[commit['commit']] = commit_stats
+
+            with measure(STAGE_OUTPUT, self.stats):
                 yield commit
-                icommits += 1
-            except Exception as e:
-                logger.error("Analysis failed at %s" % commit['commit'])
-                raise e
+            icommits += 1
+
+            if trace_file:
+                trace_file.write(self.stats.pop_events())
+            if self.checkpoints:
+                # the commit is recorded once the item has been consumed
+                self.checkpoints.add(run_id, commit['commit'])
+            if to_retry is not None:
+                retried.add(commit['commit'])
 
-        self.graalRepo.prune()
+        if branch_repos:
+            self._set_worktree(branch_repos[branches[0]])
+            for repo in list(branch_repos.values())[1:]:
+                self.__release_graal_repository(repo)
+
+        self.__release_graal_repository(self.graalRepo, checkout=not self.gateways)
+
+        if self.cache:
+            self.cache.close()
+        if self.checkpoints:
+            self.checkpoints.close()
+
+        if self.dead_letters:
+            if retried:
+                self.dead_letters.remove(retried)
+            self.dead_letters.close()
+
+        if self.stats_path:
+            self.__save_stats(category, icommits, time.perf_counter() - start)
+
+        if trace_file:
+            trace_file.write(self.stats.pop_events())
+            trace_file.close()
 
         logger.info("Fetch process completed: %s commits inspected",
                     icommits)
@@ -211,6 +459,10 @@ class Graal(Git):
         :param item: an item fetched by a backend
         :param filter_classified: sets if classified fields were filtered
         """
+        with measure(STAGE_METADATA, self.stats):
+            return self.__metadata(item, filter_classified=filter_classified)
+
+    def __metadata(self, item, filter_classified=False):
         item = {
             'backend_name': self.__class__.__name__,
             'backend_version': self.version,
@@ -226,6 +478,10 @@ class Graal(Git):
             'data': item,
         }
 
+        timings = self.commit_timings.pop(item['data']['commit'], None)
+        if timings:
+            item['timings'] = timings
+
         return item
 
     @staticmethod
@@ -237,6 +493,43 @@ class Graal(Git):
         """
         return CATEGORY_GRAAL
 
+    def _checkout_modes(self, category):
+        """Return the checkout modes supported by a category.
+
+        By default, the analysis requires the working tree to be
+        checked out at each commit.
+
+        :param category: the category of items to fetch
+
+        :returns: a list of checkout modes
+        """
+        return [CHECKOUT_FULL]
+
+    def _supports_incremental(self, category):
+        """Check whether a category can analyze only the directories
+        changed by each commit.
+
+        :param category: the category of items to fetch
+
+        :returns: a boolean value
+        """
+        return False
+
+    def _run_options(self):
+        """Return the options which affect the items generated.
+
+        They identify a run in the checkpoint store, so the commits
+        analyzed with different options are not skipped when resuming.
+        Backends with their own options should extend them.
+        """
+        return {
+            'entrypoint': self.entrypoint,
+            'exec_path': self.exec_path,
+            'in_paths': self.in_paths,
+            'out_paths': self.out_paths,
+            'details': self.details
+        }
+
     def _filter_commit(self, commit):
         """Filter a commit according to its data (e.g., author, sha, etc.)
 
@@ -246,6 +539,28 @@ class Graal(Git):
         """
         return False
 
+    def _sparse_paths(self, commit):
+        """Return the paths to check out when the checkout mode is `sparse`.
+
+        By default, they are the files touched by the commit (including
+        the new names of the renamed ones) that match `in_paths`.
+
+        :param commit: a Perceval commit item
+
+        :returns: a list of paths relative to the root of the repository
+        """
+        paths = []
+        for committed_file in commit['files']:
+            for file_path in [committed_file['file'], committed_file.get('newfile', None)]:
+                if not file_path or file_path in paths:
+                    continue
+                if self.in_paths and not [p for p in self.in_paths if file_path.endswith(p)]:
+                    continue
+
+                paths.append(file_path)
+
+        return paths
+
     def _analyze(self, commit):
         """Analyze a commit and the corresponding
         checkout version of the repository
@@ -254,6 +569,40 @@ class Graal(Git):
         """
         return {}
 
+    def _analyze_tree(self, commit, analyze, analyzers, path=None, options=None):
+        """Analyze the snapshot of a commit, reusing the results obtained
+        on an identical snapshot.
+
+        When the cache is enabled, the results of `analyze` are stored
+        with the hash of the tree at `path` (by default, the root of the
+        repository), so the commits sharing that tree (e.g., merges or
+        commits changing files outside `path`) are not analyzed again.
+
+        :param commit: a Perceval commit item
+        :param analyze: function, without parameters, that performs the analysis
+        :param analyzers: the analyzers used, whose names and versions identify the results
+        :param path: path of the analyzed tree, relative to the root of the repository
+        :param options: JSON serializable data identifying the options of the analysis
+
+        :returns: the results of the analysis
+        """
+        if not self.cache:
+            return analyze()
+
+        tree_hash = self.graalRepo.tree_hash(commit['commit'], path)
+        if not tree_hash:
+            return analyze()
+
+        key = self.cache.key('tree', tree_hash, self.__class__.__name__, self.version,
+                             [(a.__class__.__name__, a.version) for a in analyzers], options)
+        analysis = self.cache.get(key)
+
+        if analysis is None:
+            analysis = analyze()
+            self.cache.set(key, analysis)
+
+        return analysis
+
     def _post(self, commit):
         """Perform operation (e.g., removing attributes) on the Graal item obtained
 
@@ -261,18 +610,394 @@ class Graal(Git):
         """
         return commit
 
-    def __create_graal_repository(self, branch=None):
+    def _analyze_commit(self, commit):
+        """Checkout the working tree at a given commit, analyze it
+        and return the corresponding Graal item
+
+        When the dead letters are enabled, the errors are not raised
+        and a `DeadLetter` describing the failure is returned instead.
+
+        When the stats are enabled, the stages of the commit are
+        recorded in `commit_stats`.
+
+        :param commit: a Perceval commit item
+
+        :returns: a Graal commit item
+        """
+        stage = STAGE_CHECKOUT
+        start = time.time()
+
+        self.commit_stats = Stats(trace=self.stats.trace) if self.stats else None
+        previous_stats = activate(self.commit_stats)
+
+        try:
+            with measure(STAGE_COMMIT, commit=commit['commit']):
+                with measure(STAGE_CHECKOUT):
+                    if self.checkout_mode == CHECKOUT_FULL:
+                        self.graalRepo.checkout(commit['commit'])
+                    elif self.checkout_mode == CHECKOUT_SPARSE:
+                        self.graalRepo.sparse_checkout(commit['commit'], self._sparse_paths(commit))
+
+                stage = STAGE_ANALYZE
+                with measure(STAGE_ANALYZE):
+                    commit['analysis'] = self._analyze(commit)
+
+                stage = STAGE_POST
+                with measure(STAGE_POST):
+                    commit = self._post(commit)
+        except Exception as e:
+            if not self.dead_letters:
+                raise e
+            return DeadLetter(commit['commit'], stage, e, traceback.format_exc(), time.time() - start)
+        finally:
+            activate(previous_stats)
+
+        return commit
+
+    def _set_worktree(self, graal_repo):
+        """Make the backend work on the working tree of `graal_repo`
+
+        :param graal_repo: a GraalRepository with a working tree
+        """
+        self.graalRepo = graal_repo
+        self.worktreepath = graal_repo.worktreepath
+
+    def _open_worktree(self, suffix, update=False):
+        """Create a working tree of the mirror, on which the backend works from now on
+
+        :param suffix: suffix added to the path of the working tree
+        :param update: if True, the mirror is updated when it already exists
+        """
+        self._set_worktree(self.__create_graal_repository(suffix=suffix, update=update))
+
+    def _close_worktree(self):
+        """Remove the working tree created by `_open_worktree`"""
+
+        self.__release_graal_repository(self.graalRepo)
+
+    def __analyze_commits(self, commits, branch_repos=None):
+        for commit in commits:
+            try:
+                if self._filter_commit(commit):
+                    continue
+
+                if branch_repos and commit['branches']:
+                    # the commit is checked out in the working tree of its first branch
+                    self._set_worktree(branch_repos[commit['branches'][0]])
+
+                yield _analyze_commit_with_stats(self, commit)
+            except Exception as e:
+                logger.error("Analysis failed at %s" % commit['commit'])
+                raise e
+
+    def __add_branches(self, commits, branches):
+        """Add to each commit the list of `branches` which contain it.
+
+        The commits of each branch are read once the first commit is
+        obtained, since the mirror is updated when the log is read.
+        """
+        membership = None
+
+        for commit in commits:
+            if membership is None:
+                membership = collections.defaultdict(list)
+                for branch in branches:
+                    for hash in self.graalRepo.rev_list([branch]):
+                        membership[hash].append(branch)
+
+            commit['branches'] = membership.get(commit['commit'], [])
+            yield commit
+
+    def __measure_log(self, commits):
+        """Measure the time spent reading each commit from the Git log"""
+
+        commits = iter(commits)
+        while True:
+            with self.stats.measure(STAGE_LOG):
+                commit = next(commits, None)
+
+            if commit is None:
+                break
+
+            yield commit
+
+    def __save_stats(self, category, icommits, elapsed):
+        """Save the stats of the run as a JSON document in `stats_path`"""
+
+        run_stats = {
+            'backend_name': self.__class__.__name__,
+            'backend_version': self.version,
+            'category': category,
+            'origin': self.origin,
+            'workers': self.workers,
+            'commits': icommits,
+            'wall': elapsed,
+            'stages': self.stats.to_dict(),
+            'rusage': rusage()
+        }
+
+        with open(self.stats_path, 'w') as fd:
+            json.dump(run_stats, fd, indent=4, sort_keys=True)
+
+        logger.debug("Stats of the run saved in %s", self.stats_path)
+
+    def __analyze_commits_in_parallel(self, commits):
+        """Analyze the commits using a pool of processes.
+
+        Each process owns a working tree, which is checked out at the commits
+        it receives. At most `PARALLEL_BUFFER_SIZE` commits per worker are
+        pending at any time, and they are returned in the original order.
+        """
+        worker_repos = [self.graalRepo]
+        for i in range(1, self.workers):
+            worker_repos.append(self.__create_graal_repository(suffix='-' + str(i)))
+
+        logger.debug("Analysis running on %s workers", self.workers)
+
+        mp_context = multiprocessing.get_context()
+        worktrees = mp_context.Queue()
+        for repo in worker_repos:
+            worktrees.put(repo)
+
+        max_pending = self.workers * PARALLEL_BUFFER_SIZE
+        pending = collections.deque()
+
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                      mp_context=mp_context,
+                                                      initializer=_init_worker,
+                                                      initargs=(self, worktrees))
+        try:
+            for commit in commits:
+                if self._filter_commit(commit):
+                    continue
+
+                future = pool.submit(_analyze_commit_in_worker, commit)
+                pending.append((commit['commit'], future))
+
+                if len(pending) >= max_pending:
+                    yield self.__wait_for_analysis(*pending.popleft())
+
+            while pending:
+                yield self.__wait_for_analysis(*pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        for repo in worker_repos[1:]:
+            self.__release_graal_repository(repo)
+
+    def __analyze_commits_in_gateways(self, commits):
+        """Analyze the commits on a group of execnet gateways.
+
+        Each gateway runs `_serve_analysis` on its own working tree. The
+        gateways are started one by one, since they may share the mirror.
+        Every commit is sent to the gateway with fewer commits pending, at
+        most `PARALLEL_BUFFER_SIZE` commits per gateway are pending at any
+        time, and they are returned in the original order.
+        """
+        # execnet is only needed when the gateways are set, it is loaded here
+        import execnet
+
+        group = execnet.Group()
+        completed = False
+
+        try:
+            backend = pickle.dumps(self)
+            channels = []
+            for i, spec in enumerate(self.gateways):
+                gateway = group.makegateway(spec)
+                channel = gateway.remote_exec(_serve_analysis, suffix=GATEWAY_WORKTREE_SUFFIX % i)
+                channel.send(backend)
+                # wait until the working tree of the gateway is ready
+                channel.receive()
+                channels.append(channel)
+
+            logger.debug("Analysis running on %s gateways", len(channels))
+
+            max_pending = len(channels) * PARALLEL_BUFFER_SIZE
+            pending = collections.deque()
+            load = [0] * len(channels)
+
+            for commit in commits:
+                if self._filter_commit(commit):
+                    continue
+
+                n = load.index(min(load))
+                channels[n].send(pickle.dumps(commit))
+                load[n] += 1
+                pending.append((commit['commit'], n))
+
+                if len(pending) >= max_pending:
+                    yield self.__receive_analysis(channels, load, pending)
+
+            while pending:
+                yield self.__receive_analysis(channels, load, pending)
+
+            for channel in channels:
+                channel.send(None)
+            for channel in channels:
+                channel.waitclose(GATEWAY_TIMEOUT)
+            completed = True
+        finally:
+            # the working trees left by the gateways stopped abruptly are pruned by the next run
+            group.terminate(timeout=0 if not completed else GATEWAY_TIMEOUT)
+
+    @staticmethod
+    def __receive_analysis(channels, load, pending):
+        """Receive the result of the analysis of the first pending commit"""
+
+        hash, n = pending.popleft()
+        ok, result = pickle.loads(channels[n].receive())
+        load[n] -= 1
+
+        if not ok:
+            logger.error("Analysis failed at %s" % hash)
+            raise GraalError(cause=result)
+
+        return result
+
+    @staticmethod
+    def __wait_for_analysis(hash, future):
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error("Analysis failed at %s" % hash)
+            raise e
+
+    def __create_graal_repository(self, branch=None, suffix='', update=False, checkout=True):
         if not GraalRepository.exists(self.gitpath):
             repo = GraalRepository.clone(self.uri, self.gitpath)
         elif os.path.isdir(self.gitpath):
             repo = GraalRepository(self.uri, self.gitpath)
+            if update:
+                repo.update()
+
+        worktreepath = self.worktreepath + suffix
+        for stale_path in glob(worktreepath + STALE_WORKTREE_SUFFIX + '*'):
+            # the deletion of a stale working tree was interrupted
+            GraalRepository.delete_in_background(stale_path)
+
+        if GraalRepository.exists(worktreepath):
+            repo.worktreepath = worktreepath
+
+            if self.reuse_worktree and self.checkout_mode != CHECKOUT_NONE and \
+                    repo.valid_worktree(sparse=self.checkout_mode == CHECKOUT_SPARSE):
+                logger.debug("Git worktree %s reused" % worktreepath)
+                return repo
 
-        if GraalRepository.exists(self.worktreepath):
-            shutil.rmtree(self.worktreepath)
+            # the working tree left by an interrupted run is still registered in the mirror
+            repo.prune(background=True)
+
+        if self.checkout_mode == CHECKOUT_NONE or not checkout:
+            # the files are read from the mirror, the working tree is not needed
+            repo.worktreepath = worktreepath
+        else:
+            repo.worktree(worktreepath, branch, sparse=self.checkout_mode == CHECKOUT_SPARSE)
 
-        repo.worktree(self.worktreepath, branch)
         return repo
 
+    def __create_branch_repositories(self, branches):
+        """Create a working tree for each branch but the first one, which uses `graalRepo`.
+
+        The working trees are only created when the commits are analyzed
+        in this process and checked out.
+
+        :param branches: names of the branches analyzed
+
+        :returns: a dict with the GraalRepository of each branch
+        """
+        if len(branches) < 2 or self.workers > 1 or self.gateways or self.checkout_mode == CHECKOUT_NONE:
+            return {}
+
+        branch_repos = {branches[0]: self.graalRepo}
+        for i, branch in enumerate(branches[1:], start=1):
+            # the working trees are detached, since the commits are checked out by hash
+            branch_repos[branch] = self.__create_graal_repository(suffix=BRANCH_WORKTREE_SUFFIX % i)
+
+        return branch_repos
+
+    def __release_graal_repository(self, repo, checkout=True):
+        if self.checkout_mode == CHECKOUT_NONE or self.reuse_worktree or not checkout:
+            repo.close()
+        else:
+            repo.prune()
+
+
+def _init_worker(backend, worktrees):
+    """Initialize a process of the analysis pool.
+
+    The process takes one of the working trees available
+    in `worktrees`, which becomes its own for the rest
+    of the analysis.
+
+    :param backend: the Graal backend running the analysis
+    :param worktrees: queue of GraalRepository objects
+    """
+    global _worker_backend
+
+    backend._set_worktree(worktrees.get())
+    _worker_backend = backend
+
+
+def _analyze_commit_in_worker(commit):
+    """Analyze a commit with the backend of the current process"""
+
+    return _analyze_commit_with_stats(_worker_backend, commit)
+
+
+def _analyze_commit_with_stats(backend, commit):
+    """Analyze a commit, returning the result and the stats and spans of the commit, if any"""
+
+    result = backend._analyze_commit(commit)
+
+    if not backend.commit_stats:
+        return result, None, None
+
+    return result, backend.commit_stats.to_dict(), backend.commit_stats.events
+
+
+def _serve_analysis(channel, suffix):
+    """Analyze the commits received from an execnet channel.
+
+    This function runs on the gateways (see `Graal.gateways`) and,
+    since execnet sends its source code, it must import what it uses.
+    It receives the pickled backend, updates the mirror of the gateway,
+    since it may be older than the one the commits are read from, creates
+    a working tree with the given suffix and replies `ready`. Then, for each pickled commit,
+    it replies with a pickled pair, which holds whether the analysis
+    succeeded and either its result or the traceback of the error.
+    The analysis ends when `None` is received.
+
+    :param channel: execnet channel connected to the backend
+    :param suffix: suffix of the working tree of the gateway
+    """
+    import pickle
+    import traceback
+
+    from graal.graal import _analyze_commit_with_stats
+
+    backend = pickle.loads(channel.receive())
+    backend._open_worktree(suffix, update=True)
+
+    try:
+        channel.send('ready')
+
+        while True:
+            data = channel.receive()
+            if data is None:
+                break
+
+            try:
+                reply = (True, _analyze_commit_with_stats(backend, pickle.loads(data)))
+            except Exception:
+                reply = (False, traceback.format_exc())
+
+            channel.send(pickle.dumps(reply))
+    finally:
+        backend._close_worktree()
+
+
+_worker_backend = None
+
 
 class GraalRepository(GitRepository):
     """Manage a Graal repository.
@@ -283,12 +1008,28 @@ class GraalRepository(GitRepository):
     :param uri: URI of the repository
     :param dirpath: local directory where the repository is stored
     """
+    # Threads deleting directories in background, see `delete_in_background`
+    _deletions = []
 
     def __init__(self, uri, dirpath):
         super().__init__(uri, dirpath)
         self.worktreepath = None
+        self.blob_reader = None
 
-    def worktree(self, worktreepath, branch=None):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['blob_reader'] = None
+        return state
+
+    @staticmethod
+    def _exec(cmd, cwd=None, env=None, ignored_error_codes=None, encoding='utf-8'):
+        """Run a Git command, measuring it when the stats are enabled"""
+
+        with measure(STAGE_GIT, command=' '.join(cmd[1:3])):
+            return GitRepository._exec(cmd, cwd=cwd, env=env,
+                                       ignored_error_codes=ignored_error_codes, encoding=encoding)
+
+    def worktree(self, worktreepath, branch=None, sparse=False):
         """Create a working tree of the cloned repository with the active branch
         set to `branch`.
         Create a new branch for `branch` named `<branch>-graal` to avoid errors with protected
@@ -296,10 +1037,14 @@ class GraalRepository(GitRepository):
 
         :param worktreepath: the path where the working tree will be located
         :param branch: the name of the branch. If None, the branch is set to the default branch
+        :param sparse: if True, the files are not checked out, see `sparse_checkout`
         """
         self.worktreepath = worktreepath
 
-        cmd_worktree = [GIT_EXEC_PATH, 'worktree', 'add', self.worktreepath]
+        cmd_worktree = [GIT_EXEC_PATH, 'worktree', 'add']
+        if sparse:
+            cmd_worktree.append('--no-checkout')
+        cmd_worktree.append(self.worktreepath)
         if branch:
             cmd_worktree.append(branch)
             cmd_worktree.extend(['-b', '{}-graal'.format(branch)])
@@ -313,12 +1058,17 @@ class GraalRepository(GitRepository):
             else:
                 raise e
 
-    def prune(self):
+    def prune(self, background=False):
         """Delete a working tree from disk
 
-        :param worktreepath: directory where the working tree is located
+        :param background: if True, the working tree is moved aside and
+            deleted in background (see `delete_in_background`)
         """
-        GraalRepository.delete(self.worktreepath)
+        self.close()
+        if background:
+            GraalRepository.delete_in_background(self.worktreepath)
+        else:
+            GraalRepository.delete(self.worktreepath)
         cmd_worktree = [GIT_EXEC_PATH, 'worktree', 'prune']
         try:
             self._exec(cmd_worktree, cwd=self.dirpath, env=self.gitenv)
@@ -327,6 +1077,37 @@ class GraalRepository(GitRepository):
             cause = "Impossible to delete the worktree %s" % (self.worktreepath)
             raise RepositoryError(cause=cause)
 
+    def valid_worktree(self, sparse=False):
+        """Check whether the working tree can be checked out at other commits.
+
+        The working tree must be registered in the mirror and have a valid
+        `HEAD`. Unless `sparse` is set, it cannot have a sparse checkout,
+        since some files of the commits would be missing.
+
+        :param sparse: if True, the working tree will be sparse checked out
+
+        :returns: a boolean value
+        """
+        cmd_rev_parse = [GIT_EXEC_PATH, 'rev-parse', '--git-common-dir', '--verify', 'HEAD']
+        try:
+            output = self._exec(cmd_rev_parse, cwd=self.worktreepath, env=self.gitenv)
+        except RepositoryError as e:
+            logger.debug("Git worktree %s not valid. %s" % (self.worktreepath, e.msg))
+            return False
+
+        common_dir = output.decode('utf-8').splitlines()[0]
+        if os.path.realpath(os.path.join(self.worktreepath, common_dir)) != os.path.realpath(self.dirpath):
+            logger.debug("Git worktree %s belongs to another repository" % self.worktreepath)
+            return False
+
+        if sparse:
+            return True
+
+        cmd_config = [GIT_EXEC_PATH, 'config', '--bool', 'core.sparseCheckout']
+        output = self._exec(cmd_config, cwd=self.worktreepath, env=self.gitenv, ignored_error_codes=[1])
+
+        return output.decode('utf-8').strip() != 'true'
+
     def checkout(self, hash):
         """Checkout a Git repository at a given commit
 
@@ -340,6 +1121,125 @@ class GraalRepository(GitRepository):
             cause = "Impossible to checkout the worktree %s at %s" % (self.worktreepath, hash)
             raise RepositoryError(cause=cause)
 
+    def sparse_checkout(self, hash, paths):
+        """Checkout a Git repository at a given commit, limiting
+        the files of the working tree to `paths`.
+
+        The paths are set as non-cone sparse-checkout patterns of the
+        working tree, thus the rest of files are not written to disk.
+
+        :param hash: the hash of a commit
+        :param paths: list of file paths, relative to the root of the repository
+        """
+        patterns = [self.sparse_pattern(path) for path in paths if '\n' not in path]
+        if not patterns:
+            # an empty list of patterns would check out the top-level files
+            patterns = ['!/*']
+
+        cmd_sparse = [GIT_EXEC_PATH, 'sparse-checkout', 'set', '--no-cone'] + patterns
+        try:
+            self._exec(cmd_sparse, cwd=self.worktreepath, env=self.gitenv)
+        except Exception:
+            cause = "Impossible to set the sparse checkout of the worktree %s" % self.worktreepath
+            raise RepositoryError(cause=cause)
+
+        self.checkout(hash)
+
+    @staticmethod
+    def sparse_pattern(path):
+        """Convert a file path into a sparse-checkout pattern that matches only that path
+
+        :param path: a file path, relative to the root of the repository
+
+        :returns: the pattern
+        """
+        pattern = ''.join('\\' + c if c in '\\*?[' else c for c in path)
+        if pattern.endswith(' '):
+            pattern = pattern[:-1] + '\\ '
+
+        return '/' + pattern
+
+    def read_blob(self, hash, file_path):
+        """Read the content of a file at a given commit from the
+        mirror, without checking it out in the working tree.
+
+        The content is obtained through a `BlobReader`, which is
+        started the first time this method is called and kept alive
+        until `close` is called.
+
+        :param hash: the hash of a commit
+        :param file_path: the path of the file, relative to the root of the repository
+
+        :returns: the content of the file as bytes, or None if the file
+            does not exist at the given commit
+        """
+        if not self.blob_reader:
+            self.blob_reader = BlobReader(self.dirpath, env=self.gitenv)
+
+        return self.blob_reader.read(hash, file_path)
+
+    def ls_tree(self, hash, trees=False):
+        """List the files of the repository at a given commit,
+        without checking it out in the working tree.
+
+        :param hash: the hash of a commit
+        :param trees: if True, the directories are listed too, with
+            a trailing `/` in their paths
+
+        :returns: a dict with the paths of the files, relative to the
+            root of the repository, and the hashes of their blobs (or trees)
+        """
+        cmd_ls_tree = [GIT_EXEC_PATH, 'ls-tree', '-r', '-z', '--full-tree']
+        if trees:
+            cmd_ls_tree.append('-t')
+        cmd_ls_tree.append(hash)
+
+        try:
+            outs = self._exec(cmd_ls_tree, cwd=self.dirpath, env=self.gitenv)
+        except Exception:
+            cause = "Impossible to list the files of %s at %s" % (self.dirpath, hash)
+            raise RepositoryError(cause=cause)
+
+        files = {}
+        for entry in outs.decode('utf-8', errors='surrogateescape').split('\0'):
+            if not entry:
+                continue
+
+            info, file_path = entry.split('\t', 1)
+            _, obj_type, obj_hash = info.split()
+            if obj_type == 'blob':
+                files[file_path] = obj_hash
+            elif obj_type == 'tree' and trees:
+                files[file_path + '/'] = obj_hash
+
+        return files
+
+    def tree_hash(self, hash, path=None):
+        """Get the hash of the tree of a commit, or of one of its subtrees.
+
+        :param hash: the hash of a commit
+        :param path: the path of a subtree (or a file), relative to the root
+            of the repository; if not set, the root tree is used
+
+        :returns: the hash of the Git object, or None if `path` does
+            not exist at the given commit
+        """
+        path = os.path.normpath(path).strip('/') if path else '.'
+        obj = hash + '^{tree}' if path == '.' else hash + ':' + path
+
+        # rev-parse exits with 1 and prints nothing when the object is not found
+        cmd_rev_parse = [GIT_EXEC_PATH, 'rev-parse', '--verify', '--quiet', obj]
+        outs = self._exec(cmd_rev_parse, cwd=self.dirpath, env=self.gitenv, ignored_error_codes=[1])
+
+        return outs.decode('utf-8').strip() or None
+
+    def close(self):
+        """Stop the processes attached to the repository"""
+
+        if self.blob_reader:
+            self.blob_reader.close()
+            self.blob_reader = None
+
     def archive(self, hash):
         """Create an archive using the git archive command
 
@@ -433,6 +1333,24 @@ class GraalRepository(GitRepository):
         ext = file_path.split(".")[-1]
         return ext
 
+    @staticmethod
+    def blob_hash(file_path, content=None):
+        """Calculate the Git blob hash of a file, without
+        calling any Git command
+
+        :param file_path: the path of the file
+        :param content: the content of the file as bytes; if None,
+            it is read from `file_path`
+
+        :returns: the hash of the file content as stored by Git
+        """
+        if content is None:
+            with open(file_path, 'rb') as fd:
+                content = fd.read()
+
+        header = ('blob %s\0' % len(content)).encode('utf-8')
+        return hashlib.sha1(header + content).hexdigest()
+
     @staticmethod
     def files(dir_path):
         """List all files in a target dir
@@ -463,6 +1381,127 @@ class GraalRepository(GitRepository):
 
         logger.debug("%s deleted!" % target_path)
 
+    @classmethod
+    def delete_in_background(cls, target_path):
+        """Delete a directory from disk without waiting for it
+
+        The directory is renamed to a new path next to it, ending with
+        `STALE_WORKTREE_SUFFIX`, so `target_path` can be used right away,
+        and that path is deleted by a thread. A path which already ends
+        with that suffix is deleted as it is. Since every deletion works
+        on its own path, nobody waits for it but the interpreter, which
+        joins the thread at exit (see `wait_for_deletions`).
+
+        :param target_path: the path of the directory to be deleted
+
+        :returns: the thread deleting the directory
+        """
+        stale_path = target_path
+        if STALE_WORKTREE_SUFFIX not in os.path.basename(target_path):
+            parent_path, name = os.path.split(target_path.rstrip(os.sep))
+            stale_path = tempfile.mkdtemp(prefix=name + STALE_WORKTREE_SUFFIX, dir=parent_path)
+            os.rename(target_path, os.path.join(stale_path, name))
+
+        thread = threading.Thread(target=shutil.rmtree, args=(stale_path,), kwargs={'ignore_errors': True},
+                                  name='delete ' + stale_path)
+        thread.start()
+        cls._deletions = [deletion for deletion in cls._deletions if deletion.is_alive()]
+        cls._deletions.append(thread)
+
+        logger.debug("%s moved to %s to be deleted" % (target_path, stale_path))
+        return thread
+
+    @classmethod
+    def wait_for_deletions(cls):
+        """Wait until the directories deleted in background are gone"""
+
+        while cls._deletions:
+            cls._deletions.pop().join()
+
+
+# the directories deleted in background are gone when the interpreter exits
+atexit.register(GraalRepository.wait_for_deletions)
+
+
+class BlobReader:
+    """Read Git objects using a long-lived `git cat-file --batch` process.
+
+    The process is started when the reader is created and it receives
+    the names of the objects (e.g., `<commit>:<path>`) through its
+    standard input, thus avoiding to launch a new Git command for
+    each file.
+
+    :param dirpath: the path of the Git repository
+    :param env: the environment variables of the process
+    """
+    def __init__(self, dirpath, env=None):
+        self.dirpath = dirpath
+
+        cmd = [GIT_EXEC_PATH, 'cat-file', '--batch']
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, cwd=dirpath, env=env)
+        except OSError as e:
+            raise RepositoryError(cause=str(e))
+
+        logger.debug("Git blob reader started on %s" % self.dirpath)
+
+    def read(self, hash, file_path):
+        """Read the content of a file at a given commit
+
+        :param hash: the hash of a commit
+        :param file_path: the path of the file, relative to the root of the repository
+
+        :returns: the content of the file as bytes, or None if the
+            object does not exist or it is not a file
+        """
+        if '\n' in file_path:
+            logger.warning("File %s cannot be read by the blob reader" % file_path)
+            return None
+
+        obj_type, content = self.read_object(hash + ':' + file_path)
+
+        return content if obj_type == 'blob' else None
+
+    def read_object(self, name):
+        """Read a Git object
+
+        :param name: the name of the object (e.g., `<commit>:<path>`, `<hash>`)
+
+        :returns: a tuple with the type of the object and its content; both
+            are None when the object does not exist
+        """
+        try:
+            self.proc.stdin.write(name.encode('utf-8') + b'\n')
+            self.proc.stdin.flush()
+
+            header = self.proc.stdout.readline()
+            if not header:
+                raise RepositoryError(cause="git cat-file process terminated at %s" % name)
+
+            fields = header.decode('utf-8', errors='surrogateescape').split()
+            if len(fields) != 3:
+                # the object is missing or ambiguous
+                return None, None
+
+            _, obj_type, size = fields
+            content = self.proc.stdout.read(int(size))
+            self.proc.stdout.read(1)
+        except (OSError, ValueError) as e:
+            raise RepositoryError(cause="Impossible to read %s from %s, %s" % (name, self.dirpath, str(e)))
+
+        return obj_type, content
+
+    def close(self):
+        """Terminate the `git cat-file` process"""
+
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+            self.proc.stdout.close()
+
+        logger.debug("Git blob reader stopped on %s" % self.dirpath)
+
 
 class GraalCommand(GitCommand):
     """Class to run GraalRepository backend from the command line."""
@@ -473,14 +1512,21 @@ class GraalCommand(GitCommand):
         """Initialize repositories directory path"""
 
         if not self.parsed_args.git_path:
-            base_path = os.path.expanduser('~/.graal/repositories/' + self.BACKEND.__name__ + '/')
-            processed_uri = self.parsed_args.uri.lstrip('/')
-            git_path = os.path.join(base_path, processed_uri) + '-git'
+            git_path = self.default_git_path(self.parsed_args.uri)
         else:
             git_path = self.parsed_args.git_path
 
         setattr(self.parsed_args, 'git_path', git_path)
 
+    @classmethod
+    def default_git_path(cls, uri):
+        """Path where the repository `uri` is mirrored when `--git-path` is not set"""
+
+        base_path = os.path.expanduser('~/.graal/repositories/' + cls.BACKEND.__name__ + '/')
+        processed_uri = uri.lstrip('/')
+
+        return os.path.join(base_path, processed_uri) + '-git'
+
     @staticmethod
     def setup_cmd_parser(backend):
         """Returns the Graal argument parser."""
@@ -512,6 +1558,46 @@ class GraalCommand(GitCommand):
         group.add_argument('--details', dest='details',
                            action='store_true', default=False,
                            help="include details")
+        group.add_argument('--workers', dest='workers',
+                           type=int, default=DEFAULT_WORKERS,
+                           help="Number of processes used to analyze the commits")
+        group.add_argument('--cache-path', dest='cache_path',
+                           type=str, default=None,
+                           help="Path of the cache of analysis results (use ':memory:' to keep it in memory)")
+        group.add_argument('--checkout-mode', dest='checkout_mode',
+                           choices=CHECKOUT_MODES, default=CHECKOUT_FULL,
+                           help="How the files of each commit are obtained: checking out the whole working tree, "
+                                "only the files of the commit (sparse) or reading them from the mirror")
+        group.add_argument('--incremental', dest='incremental',
+                           action='store_true', default=False,
+                           help="Analyze only the directories changed by each commit, when supported by the category")
+        group.add_argument('--resume', dest='resume',
+                           action='store_true', default=False,
+                           help="Record the commits analyzed and skip the ones already analyzed by a previous "
+                                "run with this option and the same settings")
+        group.add_argument('--dead-letters-path', dest='dead_letters_path',
+                           type=str, default=None,
+                           help="Path of the file where the commits whose analysis failed are stored, "
+                                "instead of stopping the analysis")
+        group.add_argument('--retry-dead-letters', dest='retry_dead_letters',
+                           action='store_true', default=False,
+                           help="Analyze only the commits stored in the dead letters")
+        group.add_argument('--stats', dest='stats_path',
+                           type=str, default=None,
+                           help="Path of the JSON file where the time spent on each stage of the analysis is saved")
+        group.add_argument('--timings', dest='timings',
+                           action='store_true', default=False,
+                           help="Add the time spent on each stage of the analysis to the items")
+        group.add_argument('--trace', dest='trace_path',
+                           type=str, default=None,
+                           help="Path of the file where the spans of the analysis are saved in Chrome trace event format")
+        group.add_argument('--gateway', dest='gateways',
+                           action='append', default=None,
+                           help="Specification of an execnet gateway where the commits are analyzed "
+                                "(e.g., 'popen' or 'ssh=user@host'); it can be repeated")
+        group.add_argument('--reuse-worktree', dest='reuse_worktree',
+                           action='store_true', default=False,
+                           help="Keep the working trees once the analysis is over and reuse them in the next runs")
 
         # Required arguments
         parser.parser.add_argument('uri',
@@ -646,6 +1732,31 @@ def find_backends(top_package):
     return _import_backends(modules)
 
 
+def find_backend(top_package, name):
+    """Find a backend by name.
+
+    Look for the module `name` under `top_package` and its
+    sub-packages, as `find_backends` does, but import only
+    that module. Thus, the dependencies of the other backends
+    are not loaded.
+
+    :param top_package: package storing backends
+    :param name: name of the backend (e.g., `cocom`)
+
+    :returns: a tuple with the `Backend` and the `BackendCommand`
+        classes, which are None when the backend is not found
+    """
+    candidates = pkgutil.walk_packages(top_package.__path__,
+                                       prefix=top_package.__name__ + '.')
+
+    modules = [module for _, module, is_pkg in candidates
+               if not is_pkg and module.split('.')[-1] == name]
+
+    backends, commands = _import_backends(modules)
+
+    return backends.get(name, None), commands.get(name, None)
+
+
 def _import_backends(modules):
     for module in modules:
         importlib.import_module(module)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import copy
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SubtreeAnalyzer:
+    """Analyze the snapshots of a repository directory by directory.
+
+    The results of each directory are kept between calls to `analyze`,
+    together with the hash of its tree. When a new commit is analyzed,
+    the directories whose tree did not change are taken as they are,
+    and only the files placed directly in the directories that changed
+    are analyzed again. The result of a directory is obtained merging
+    the result of its own files with the ones of its subdirectories.
+
+    The analysis of a list of files is performed by the function `analyze`,
+    which receives the local path of the directory analyzed and the local
+    paths of the files, and returns a partial result. Partial results are
+    aggregated by the function `merge`, which receives a list of them and
+    must not modify them (see `merge_analyses`).
+
+    :param analyze: function that analyzes a list of files
+    :param merge: function that aggregates a list of partial results
+    :param file_filter: function that selects the files to analyze, given
+        their paths relative to the root of the repository
+    """
+    def __init__(self, analyze, merge, file_filter=None):
+        self.analyze_files = analyze
+        self.merge = merge
+        self.file_filter = file_filter
+
+        self.root = None
+        self.tree_results = {}
+        self.files_results = {}
+
+    def analyze(self, repo, hash, worktreepath, path=None):
+        """Analyze the snapshot of a commit.
+
+        :param repo: the GraalRepository which contains the commit
+        :param hash: the hash of the commit
+        :param worktreepath: the directory where the commit is checked out
+        :param path: path of the directory to analyze, relative to the
+            root of the repository; if not set, the root is used
+
+        :returns: the result of the analysis, or None when `path` does
+            not exist at the given commit
+        """
+        root = os.path.normpath(path).strip('/') if path else '.'
+        root = '' if root == '.' else root
+
+        root_hash = repo.tree_hash(hash, root or None)
+        if not root_hash:
+            return None
+
+        if root != self.root:
+            # the results depend on the directory where the analysis starts
+            self.root = root
+            self.tree_results = {}
+            self.files_results = {}
+
+        tree_hashes, subdirs, dir_files = self.__read_tree(repo.ls_tree(hash, trees=True), root)
+        tree_hashes[root] = root_hash
+
+        # directories whose tree is not known, parents before children
+        to_analyze = []
+        pending = [root]
+        while pending:
+            dir_path = pending.pop()
+            if (dir_path, tree_hashes[dir_path]) in self.tree_results:
+                continue
+
+            to_analyze.append(dir_path)
+            pending.extend(subdirs.get(dir_path, []))
+
+        root_path = os.path.join(worktreepath, root) if root else worktreepath
+
+        files_results = {}
+        for dir_path in to_analyze:
+            files = dir_files.get(dir_path, ())
+            files_result = self.files_results.get(files, None)
+            if files_result is None:
+                local_paths = [os.path.join(worktreepath, file_path) for file_path, _ in files]
+                files_result = self.analyze_files(root_path, local_paths) if local_paths else self.merge([])
+            files_results[files] = files_result
+
+        tree_results = {}
+        for dir_path in reversed(to_analyze):
+            partials = [files_results[dir_files.get(dir_path, ())]]
+            for subdir in subdirs.get(dir_path, []):
+                key = (subdir, tree_hashes[subdir])
+                partials.append(tree_results[key] if key in tree_results else self.tree_results[key])
+            tree_results[(dir_path, tree_hashes[dir_path])] = self.merge(partials)
+
+        logger.debug("%s directories of %s analyzed again at %s",
+                     len(to_analyze), len(tree_hashes), hash)
+
+        # only the results of the directories of the last commit are kept
+        for key, result in self.tree_results.items():
+            if key[1] == tree_hashes.get(key[0], None):
+                tree_results.setdefault(key, result)
+        self.tree_results = tree_results
+
+        for files, files_result in self.files_results.items():
+            if files and dir_files.get(os.path.dirname(files[0][0]), None) == files:
+                files_results.setdefault(files, files_result)
+        self.files_results = files_results
+
+        return copy.deepcopy(self.tree_results[(root, root_hash)])
+
+    def __read_tree(self, entries, root):
+        """Group the entries of a tree by directory"""
+
+        prefix = root + '/' if root else ''
+
+        tree_hashes = {}
+        subdirs = {}
+        dir_files = {}
+
+        for entry_path, entry_hash in sorted(entries.items()):
+            if entry_path != root and not entry_path.startswith(prefix):
+                continue
+
+            if entry_path == root:
+                # the root is a file
+                dir_files[root] = [(entry_path, entry_hash)]
+            elif entry_path.endswith('/'):
+                dir_path = entry_path[:-1]
+                tree_hashes[dir_path] = entry_hash
+                subdirs.setdefault(os.path.dirname(dir_path), []).append(dir_path)
+            elif not self.file_filter or self.file_filter(entry_path):
+                dir_files.setdefault(os.path.dirname(entry_path), []).append((entry_path, entry_hash))
+
+        # the files of a directory identify the result of their analysis
+        dir_files = {dir_path: tuple(files) for dir_path, files in dir_files.items()}
+
+        return tree_hashes, subdirs, dir_files
+
+
+def merge_analyses(analyses):
+    """Merge a list of partial results.
+
+    The results are merged key by key: numbers are added,
+    lists are concatenated and dicts are merged recursively.
+    Missing values (None) are ignored.
+
+    :param analyses: list of partial results
+
+    :returns: the merged result, or None if `analyses` is empty
+    """
+    result = None
+    for analysis in analyses:
+        result = _merge(result, analysis)
+
+    return result
+
+
+def _merge(result, analysis):
+    if result is None:
+        return copy.deepcopy(analysis)
+    if analysis is None:
+        return result
+
+    if isinstance(result, dict):
+        for key, value in analysis.items():
+            result[key] = _merge(result.get(key, None), value)
+        return result
+    elif isinstance(result, list):
+        return result + copy.deepcopy(analysis)
+
+    return result + analysis
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import contextlib
+import os
+import resource
+import threading
+import time
+
+# Stages of the analysis
+STAGE_LOG = 'log'
+STAGE_COMMIT = 'commit'
+STAGE_CHECKOUT = 'checkout'
+STAGE_ANALYZE = 'analyze'
+STAGE_POST = 'post'
+STAGE_METADATA = 'metadata'
+STAGE_OUTPUT = 'output'
+STAGE_GIT = 'git'
+# Prefix of the stages of the analyzers, followed by their class name
+STAGE_ANALYZER = 'analyzer:'
+
+# Stats where the stages are recorded when no stats are given
+_active_stats = None
+
+
+class Stats:
+    """Timers and counters of the stages of an analysis.
+
+    For each stage, the number of times it was executed and the time
+    spent on it are recorded: the wall time, the CPU time of the current
+    process and the CPU time of its child processes, such as the tools
+    run by the analyzers (obtained with `getrusage`).
+
+    When `trace` is set, each execution is also saved in `events`
+    as a span in Chrome trace event format (see `graal.trace`).
+
+    :param trace: if enabled, the spans of the stages are saved
+    """
+    def __init__(self, trace=False):
+        self.stages = {}
+        self.trace = trace
+        self.events = []
+
+    def add(self, stage, wall, cpu=0.0, children_cpu=0.0):
+        """Add an execution of a stage
+
+        :param stage: the name of the stage
+        :param wall: the wall time, in seconds
+        :param cpu: the CPU time of the process, in seconds
+        :param children_cpu: the CPU time of the child processes, in seconds
+        """
+        timer = self.stages.setdefault(stage, {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'children_cpu': 0.0})
+        timer['count'] += 1
+        timer['wall'] += wall
+        timer['cpu'] += cpu
+        timer['children_cpu'] += children_cpu
+
+    def update(self, stages):
+        """Add the stages recorded by other stats
+
+        :param stages: dict of stages, as returned by `to_dict`
+        """
+        for stage, other in stages.items():
+            timer = self.stages.setdefault(stage, {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'children_cpu': 0.0})
+            for key in timer:
+                timer[key] += other[key]
+
+    @contextlib.contextmanager
+    def measure(self, stage, **args):
+        """Measure the execution of a block of code as a stage
+
+        :param stage: the name of the stage
+        :param args: data added to the span of the stage, when traced
+        """
+        timestamp = time.time()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children_cpu = _children_cpu_time()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            self.add(stage,
+                     wall,
+                     time.process_time() - cpu,
+                     _children_cpu_time() - children_cpu)
+
+            if self.trace:
+                self.events.append(_span(stage, timestamp, wall, args))
+
+    def pop_events(self):
+        """Return the spans saved, removing them from the stats"""
+
+        events = self.events
+        self.events = []
+
+        return events
+
+    def to_dict(self):
+        """Return the stages recorded as a dict"""
+
+        return {stage: dict(timer) for stage, timer in self.stages.items()}
+
+
+def activate(stats):
+    """Set the stats where the stages are recorded by `measure`
+
+    :param stats: a Stats object or None to disable the recording
+
+    :returns: the stats previously active
+    """
+    global _active_stats
+
+    previous = _active_stats
+    _active_stats = stats
+
+    return previous
+
+
+def measure(stage, stats=None, **args):
+    """Measure a stage with the given stats or, if not set, with the active ones.
+
+    When there are no stats, the stage is not measured.
+
+    :param stage: the name of the stage
+    :param stats: a Stats object
+    :param args: data added to the span of the stage, when traced
+    """
+    stats = stats or _active_stats
+
+    if not stats:
+        return contextlib.nullcontext()
+
+    return stats.measure(stage, **args)
+
+
+def rusage():
+    """Get the resources used by the current process and its child processes"""
+
+    usage = {}
+    for who, name in [(resource.RUSAGE_SELF, 'self'), (resource.RUSAGE_CHILDREN, 'children')]:
+        ru = resource.getrusage(who)
+        usage[name] = {
+            'utime': ru.ru_utime,
+            'stime': ru.ru_stime,
+            'maxrss': ru.ru_maxrss
+        }
+
+    return usage
+
+
+def _span(stage, timestamp, wall, args):
+    """Build a complete event of the Chrome trace event format"""
+
+    if stage.startswith(STAGE_ANALYZER):
+        name, category = stage[len(STAGE_ANALYZER):], 'analyzer'
+    else:
+        name, category = stage, 'graal'
+
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': int(timestamp * 1000000),
+        'dur': int(wall * 1000000),
+        'pid': os.getpid(),
+        'tid': threading.get_ident()
+    }
+    if args:
+        event['args'] = args
+
+    return event
+
+
+def _children_cpu_time():
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class TraceFile:
+    """Write the spans of an analysis to a file.
+
+    The spans are written in the JSON array format of the Chrome
+    trace event format, which can be opened with the trace viewers
+    of Chrome (chrome://tracing) or Perfetto (https://ui.perfetto.dev).
+    The events are appended to the file as soon as they are written,
+    so the memory used does not grow with the length of the analysis.
+
+    :param path: path of the trace file
+    :param process_name: name shown by the viewers for the current process
+    """
+    def __init__(self, path, process_name='graal'):
+        self.path = path
+        self.process_name = process_name
+        self._fd = None
+
+    def write(self, events):
+        """Append a list of events to the file
+
+        :param events: list of events in Chrome trace event format
+        """
+        if not self._fd:
+            self._fd = open(self.path, 'w')
+            self._fd.write('[\n')
+            self.__write_event({
+                'name': 'process_name',
+                'ph': 'M',
+                'pid': os.getpid(),
+                'args': {'name': self.process_name}
+            })
+
+        for event in events:
+            self._fd.write(',\n')
+            self.__write_event(event)
+        self._fd.flush()
+
+    def close(self):
+        """Close the file, ending the array of events"""
+
+        if not self._fd:
+            self.write([])
+
+        self._fd.write('\n]\n')
+        self._fd.close()
+        self._fd = None
+
+        logger.debug("Trace saved in %s", self.path)
+
+    def __write_event(self, event):
+        self._fd.write(json.dumps(event, sort_keys=True))
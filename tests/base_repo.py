@@ -26,6 +26,8 @@ import subprocess
 import tempfile
 import unittest.mock
 
+from graal.graal import GraalRepository
+
 
 def get_file_path(filename):
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
@@ -57,6 +59,8 @@ class TestCaseRepo(unittest.TestCase):
                               stderr=fdout)
 
     def tearDown(self):
+        # the working trees of the tests may still be deleted in background
+        GraalRepository.wait_for_deletions()
         shutil.rmtree(self.tmp_path)
 
 
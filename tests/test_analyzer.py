@@ -21,9 +21,28 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import time
 import unittest
 
 from graal.backends.core.analyzers.analyzer import Analyzer
+from graal.stats import (Stats,
+                         activate)
+
+
+class MockedAnalyzer(Analyzer):
+    """Analyzer which returns its arguments"""
+
+    def analyze(self, **kwargs):
+        """Return the arguments received"""
+
+        return kwargs
+
+
+class MockedStreamAnalyzer(Analyzer):
+    """Analyzer which returns a generator of its arguments"""
+
+    def analyze(self, **kwargs):
+        return (time.sleep(0.05) or path for path in kwargs['file_paths'])
 
 
 class TestAnalyzer(unittest.TestCase):
@@ -37,6 +56,45 @@ class TestAnalyzer(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             analyzer.analyze()
 
+    def test_analyze_stats(self):
+        """Test whether the executions of the analyzers are measured when the stats are active"""
+
+        analyzer = MockedAnalyzer()
+        self.assertEqual(analyzer.analyze.__doc__, "Return the arguments received")
+
+        # nothing is recorded when there are no stats
+        self.assertDictEqual(analyzer.analyze(file_path='a.py'), {'file_path': 'a.py'})
+
+        stats = Stats()
+        previous = activate(stats)
+        try:
+            self.assertDictEqual(analyzer.analyze(file_path='a.py'), {'file_path': 'a.py'})
+            analyzer.analyze(file_path='b.py')
+        finally:
+            activate(previous)
+
+        stages = stats.to_dict()
+        self.assertListEqual(list(stages.keys()), ['analyzer:MockedAnalyzer'])
+        self.assertEqual(stages['analyzer:MockedAnalyzer']['count'], 2)
+
+    def test_analyze_stats_generator(self):
+        """Test whether the stage of an analyzer which returns a generator lasts until it is exhausted"""
+
+        analyzer = MockedStreamAnalyzer()
+
+        stats = Stats()
+        previous = activate(stats)
+        try:
+            result = analyzer.analyze(file_paths=['a.py', 'b.py'])
+            self.assertDictEqual(stats.to_dict(), {})
+            self.assertListEqual(list(result), ['a.py', 'b.py'])
+        finally:
+            activate(previous)
+
+        stages = stats.to_dict()
+        self.assertEqual(stages['analyzer:MockedStreamAnalyzer']['count'], 1)
+        self.assertGreaterEqual(stages['analyzer:MockedStreamAnalyzer']['wall'], 0.1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -123,6 +123,25 @@ class TestBandit(TestCaseAnalyzer):
 
         self.assertNotIn('vulns', result)
 
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_file_paths(self, check_output_mock):
+        """Test whether only a list of files of a folder is analyzed"""
+
+        check_output_mock.return_value = b"Run started:\nCode scanned:\n\tTotal lines of code: 10\n"
+
+        bandit = Bandit()
+        kwargs = {
+            'folder_path': '/tmp/repo',
+            'file_paths': ['/tmp/repo/a.py', '/tmp/repo/b.py'],
+            'details': False
+        }
+        result = bandit.analyze(**kwargs)
+
+        args, _ = check_output_mock.call_args
+        self.assertListEqual(args[0], ['bandit', '/tmp/repo/a.py', '/tmp/repo/b.py'])
+        self.assertEqual(result['loc_analyzed'], 10)
+        self.assertEqual(result['num_vulns'], 0)
+
     @unittest.mock.patch('subprocess.check_output')
     def test_analyze_error(self, check_output_mock):
         """Test whether an exception is thrown in case of errors"""
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+from graal.batch import (DEFAULT_BATCH_WORKERS,
+                         DEFAULT_FETCHERS,
+                         STATUS_FAILED,
+                         STATUS_OK,
+                         SUMMARY_FILE,
+                         Batch,
+                         BatchCommand,
+                         BatchJob,
+                         _run_jobs,
+                         load_manifest)
+from graal.backends.core.covuln import CATEGORY_COVULN
+from graal.graal import DEFAULT_WORKTREE_PATH, GraalError
+from base_repo import TestCaseRepo
+
+
+class TestBatchJob(unittest.TestCase):
+    """BatchJob tests"""
+
+    def test_args(self):
+        """Test whether the arguments of the backend command are built"""
+
+        job = BatchJob('http://example.com', 'covuln')
+        self.assertListEqual(job.args('/tmp/git', '/tmp/worktrees/0'),
+                             ['http://example.com', '--git-path', '/tmp/git', '--worktree-path', '/tmp/worktrees/0'])
+
+        job = BatchJob('http://example.com', 'covuln', category=CATEGORY_COVULN,
+                       options=['--entrypoint', 'perceval', '--worktree-path', '/tmp/custom'])
+        self.assertListEqual(job.args('/tmp/git', '/tmp/worktrees/0'),
+                             ['http://example.com', '--git-path', '/tmp/git', '--category', CATEGORY_COVULN,
+                              '--entrypoint', 'perceval', '--worktree-path', '/tmp/custom'])
+
+
+class TestLoadManifest(unittest.TestCase):
+    """load_manifest tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        self.manifest_path = os.path.join(self.tmp_path, 'manifest.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_load_manifest(self):
+        """Test whether the jobs are read from the manifest"""
+
+        with open(self.manifest_path, 'w') as fd:
+            fd.write('{"uri": "http://example.com/a", "backend": "cocom"}\n')
+            fd.write('\n')
+            fd.write('{"uri": "http://example.com/b", "backend": "covuln", "category": "code_vulnerabilities",'
+                     ' "options": ["--details"], "output": "/tmp/b.json"}\n')
+
+        jobs = load_manifest(self.manifest_path)
+        self.assertEqual(len(jobs), 2)
+
+        job = jobs[0]
+        self.assertEqual(job.uri, 'http://example.com/a')
+        self.assertEqual(job.backend, 'cocom')
+        self.assertIsNone(job.category)
+        self.assertListEqual(job.options, [])
+        self.assertIsNone(job.output)
+
+        job = jobs[1]
+        self.assertEqual(job.uri, 'http://example.com/b')
+        self.assertEqual(job.backend, 'covuln')
+        self.assertEqual(job.category, CATEGORY_COVULN)
+        self.assertListEqual(job.options, ['--details'])
+        self.assertEqual(job.output, '/tmp/b.json')
+
+    def test_load_manifest_invalid(self):
+        """Test whether an exception is thrown when a job is not valid"""
+
+        with open(self.manifest_path, 'w') as fd:
+            fd.write('{"uri": "http://example.com/a", "backend": "cocom"}\n')
+            fd.write('{"uri": "http://example.com/b"}\n')
+
+        with self.assertRaisesRegex(GraalError, 'line 2'):
+            _ = load_manifest(self.manifest_path)
+
+        with open(self.manifest_path, 'w') as fd:
+            fd.write('{"uri": \n')
+
+        with self.assertRaisesRegex(GraalError, 'line 1'):
+            _ = load_manifest(self.manifest_path)
+
+
+class TestBatch(TestCaseRepo):
+    """Batch tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.output_path = os.path.join(self.tmp_path, 'output')
+        self.home_path = os.path.join(self.tmp_path, 'home')
+
+    def test_initialization(self):
+        """Test whether attributes are initializated"""
+
+        batch = Batch([], self.output_path)
+        self.assertListEqual(batch.jobs, [])
+        self.assertEqual(batch.output_path, self.output_path)
+        self.assertEqual(batch.workers, DEFAULT_BATCH_WORKERS)
+        self.assertEqual(batch.fetchers, DEFAULT_FETCHERS)
+        self.assertEqual(batch.worktree_path, DEFAULT_WORKTREE_PATH)
+
+        with self.assertRaises(GraalError):
+            _ = Batch([], self.output_path, workers=0)
+
+        with self.assertRaises(GraalError):
+            _ = Batch([], self.output_path, fetchers=0)
+
+    def test_run(self):
+        """Test whether the jobs are run and their results are saved"""
+
+        missing_uri = os.path.join(self.tmp_path, 'missing')
+        custom_output = os.path.join(self.tmp_path, 'details.json')
+        jobs = [
+            BatchJob(self.git_path, 'covuln', options=['--entrypoint', 'perceval']),
+            BatchJob(missing_uri, 'covuln'),
+            BatchJob(self.git_path, 'covuln', category=CATEGORY_COVULN,
+                     options=['--entrypoint', 'perceval', '--details'], output=custom_output),
+            BatchJob(self.git_path, 'covuln', options=['--entrypoint', 'perceval', '--checkout-mode', 'none'])
+        ]
+
+        batch = Batch(jobs, self.output_path, workers=2, fetchers=2, worktree_path=self.worktree_path)
+        with unittest.mock.patch.dict(os.environ, {'HOME': self.home_path}):
+            results = batch.run()
+
+        self.assertEqual(len(results), 4)
+
+        result = results[0]
+        self.assertEqual(result['uri'], self.git_path)
+        self.assertEqual(result['backend'], 'covuln')
+        self.assertIsNone(result['category'])
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['items'], 6)
+        self.assertEqual(result['output'], os.path.join(self.output_path, '0-covuln.json'))
+        self.assertGreater(result['prepare'], 0)
+        self.assertGreater(result['analyze'], 0)
+        self.assertIsNone(result['error'])
+
+        with open(result['output']) as fd:
+            items = [json.loads(line) for line in fd]
+        self.assertEqual(len(items), 6)
+        self.assertEqual(items[0]['backend_name'], 'CoVuln')
+        self.assertNotIn('vulns', items[0]['data']['analysis'])
+
+        result = results[1]
+        self.assertEqual(result['status'], STATUS_FAILED)
+        self.assertEqual(result['items'], 0)
+        self.assertIsNone(result['prepare'])
+        self.assertIsNone(result['analyze'])
+        self.assertRegex(result['error'], 'does not exist')
+        self.assertFalse(os.path.exists(os.path.join(self.output_path, '1-covuln.json')))
+
+        result = results[2]
+        self.assertEqual(result['category'], CATEGORY_COVULN)
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['items'], 6)
+        self.assertEqual(result['output'], custom_output)
+
+        with open(custom_output) as fd:
+            items = [json.loads(line) for line in fd]
+        self.assertIn('vulns', items[0]['data']['analysis'])
+
+        result = results[3]
+        self.assertEqual(result['status'], STATUS_FAILED)
+        self.assertEqual(result['prepare'], results[0]['prepare'])
+        self.assertRegex(result['error'], 'Checkout mode none not supported')
+
+        # the jobs of the same repository share the mirror
+        mirrors = os.path.join(self.home_path, '.graal', 'repositories', 'CoVuln')
+        self.assertTrue(os.path.exists(os.path.join(mirrors, self.git_path.lstrip('/')) + '-git'))
+        self.assertFalse(os.path.exists(os.path.join(mirrors, missing_uri.lstrip('/')) + '-git'))
+        self.assertListEqual(os.listdir(self.worktree_path), [])
+
+        with open(os.path.join(self.output_path, SUMMARY_FILE)) as fd:
+            summary = json.load(fd)
+        self.assertListEqual(summary, results)
+
+    def test_run_jobs_on_error(self):
+        """Test whether the jobs of a mirror are failed when its process raises an exception"""
+
+        def thread_pool(max_workers, mp_context):
+            return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+        jobs = [
+            BatchJob(self.git_path, 'covuln', options=['--entrypoint', 'perceval']),
+            BatchJob(self.git_path, 'covuln', options=['--entrypoint', 'perceval', '--details'])
+        ]
+
+        batch = Batch(jobs, self.output_path, workers=1, fetchers=1, worktree_path=self.worktree_path)
+        with unittest.mock.patch.dict(os.environ, {'HOME': self.home_path}), \
+                unittest.mock.patch('concurrent.futures.ProcessPoolExecutor', side_effect=thread_pool), \
+                unittest.mock.patch('graal.batch._run_jobs', side_effect=RuntimeError('pool broken')):
+            results = batch.run()
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result['status'], STATUS_FAILED)
+            self.assertEqual(result['items'], 0)
+            self.assertGreater(result['prepare'], 0)
+            self.assertEqual(result['error'], 'pool broken')
+
+        with open(os.path.join(self.output_path, SUMMARY_FILE)) as fd:
+            summary = json.load(fd)
+        self.assertListEqual(summary, results)
+
+    def test_run_jobs_worktree_path(self):
+        """Test whether the directory of the working trees is only removed when it is empty"""
+
+        worktree_path = os.path.join(self.tmp_path, 'worktrees')
+        self.assertListEqual(_run_jobs([], worktree_path), [])
+
+        os.makedirs(os.path.join(worktree_path, 'graaltest'))
+        self.assertListEqual(_run_jobs([], worktree_path), [])
+        self.assertTrue(os.path.exists(worktree_path))
+
+        os.rmdir(os.path.join(worktree_path, 'graaltest'))
+        self.assertListEqual(_run_jobs([], worktree_path), [])
+        self.assertFalse(os.path.exists(worktree_path))
+
+    def test_run_unknown_backend(self):
+        """Test whether an exception is thrown when the backend of a job is not found"""
+
+        jobs = [BatchJob(self.git_path, 'unknown')]
+
+        batch = Batch(jobs, self.output_path, worktree_path=self.worktree_path)
+        with self.assertRaisesRegex(GraalError, 'Unknown backend unknown'):
+            _ = batch.run()
+
+
+class TestBatchCommand(TestCaseRepo):
+    """BatchCommand tests"""
+
+    def test_setup_cmd_parser(self):
+        """Test if it parser object is correctly initialized"""
+
+        parser = BatchCommand.setup_cmd_parser()
+
+        parsed_args = parser.parse_args(['manifest.jsonl', '-o', '/tmp/output'])
+        self.assertEqual(parsed_args.manifest, 'manifest.jsonl')
+        self.assertEqual(parsed_args.output_path, '/tmp/output')
+        self.assertEqual(parsed_args.workers, DEFAULT_BATCH_WORKERS)
+        self.assertEqual(parsed_args.fetchers, DEFAULT_FETCHERS)
+        self.assertEqual(parsed_args.worktree_path, DEFAULT_WORKTREE_PATH)
+
+        parsed_args = parser.parse_args(['manifest.jsonl', '--output-path', '/tmp/output',
+                                         '--workers', '8', '--fetchers', '16',
+                                         '--worktree-path', '/tmp/custom-worktrees/'])
+        self.assertEqual(parsed_args.workers, 8)
+        self.assertEqual(parsed_args.fetchers, 16)
+        self.assertEqual(parsed_args.worktree_path, '/tmp/custom-worktrees/')
+
+    def test_run(self):
+        """Test whether the jobs of the manifest are run"""
+
+        manifest_path = os.path.join(self.tmp_path, 'manifest.jsonl')
+        output_path = os.path.join(self.tmp_path, 'output')
+        git_path = os.path.join(self.tmp_path, 'mirror')
+
+        with open(manifest_path, 'w') as fd:
+            job = {
+                'uri': self.git_path,
+                'backend': 'covuln',
+                'options': ['--entrypoint', 'perceval', '--git-path', git_path]
+            }
+            fd.write(json.dumps(job) + '\n')
+
+        cmd = BatchCommand(manifest_path, '-o', output_path, '--workers', '1',
+                           '--worktree-path', self.worktree_path)
+        results = cmd.run()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['status'], STATUS_OK)
+        self.assertEqual(results[0]['items'], 6)
+        self.assertTrue(os.path.exists(git_path))
+        self.assertTrue(os.path.exists(os.path.join(output_path, SUMMARY_FILE)))
+
+
+if __name__ == "__main__":
+    unittest.main()
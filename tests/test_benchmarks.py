@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import subprocess
+import tempfile
+import types
+import unittest
+import unittest.mock
+
+from graal.backends.core.cocom import CoCom, CATEGORY_COCOM_LIZARD_FILE, LINE_COUNTER_LIZARD
+from graal.graal import GraalError
+
+from benchmarks.__main__ import main
+from benchmarks.backends import (STATUS_OK,
+                                 STATUS_SKIPPED,
+                                 Benchmark,
+                                 run_benchmark,
+                                 select_benchmarks)
+from benchmarks.generator import (CHURN_APPEND,
+                                  CHURN_HOTSPOT,
+                                  ENTRYPOINT,
+                                  RepositoryGenerator)
+from benchmarks.overhead import (OVERHEAD_BENCHMARKS,
+                                 OVERHEAD_STAGES,
+                                 NullCoCom,
+                                 NullCoLic,
+                                 run_overhead,
+                                 select_overhead_benchmarks)
+from benchmarks.parsers import (PARSERS,
+                                CORPUS_SUFFIX,
+                                RecordedProcess,
+                                load_output,
+                                run_parser,
+                                select_parsers,
+                                write_corpus)
+from benchmarks.results import compare_results, load_results, save_results
+
+
+def git_log(repo_path, *args):
+    cmd = ['git', '-C', repo_path, 'log', '--format=%H'] + list(args)
+    return subprocess.check_output(cmd).decode('utf-8').split()
+
+
+class TestRepositoryGenerator(unittest.TestCase):
+    """RepositoryGenerator tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_generate(self):
+        """Test whether the repository is generated with the given parameters"""
+
+        generator = RepositoryGenerator(commits=5, files=6, file_size=50,
+                                        languages=['python', 'java', 'dockerfile'], seed=1)
+        repo_path = generator.generate(os.path.join(self.tmp_path, 'repo'))
+
+        self.assertEqual(len(git_log(repo_path)), 5)
+
+        files = subprocess.check_output(['git', '-C', repo_path, 'ls-files']).decode('utf-8').split()
+        self.assertEqual(len([f for f in files if not f.endswith('__init__.py')]), 6)
+        self.assertIn(os.path.join(ENTRYPOINT, '__init__.py'), files)
+        self.assertIn(os.path.join(ENTRYPOINT, 'pkg0', 'module0.py'), files)
+        self.assertIn(os.path.join(ENTRYPOINT, 'pkg0', 'module1.java'), files)
+        self.assertIn(os.path.join(ENTRYPOINT, 'pkg0', 'module2', 'Dockerfile'), files)
+
+        # the working tree is checked out
+        self.assertTrue(os.path.exists(os.path.join(repo_path, ENTRYPOINT, 'pkg0', 'module0.py')))
+
+        # the repositories are reproducible
+        other_path = RepositoryGenerator(**{k: v for k, v in generator.params().items()
+                                            if k != 'dirs'}).generate(os.path.join(self.tmp_path, 'other'))
+        self.assertListEqual(git_log(other_path), git_log(repo_path))
+
+    def test_churn_append(self):
+        """Test whether the append pattern adds files on each commit"""
+
+        generator = RepositoryGenerator(commits=4, files=10, file_size=20, churn=0.2, pattern=CHURN_APPEND)
+        repo_path = generator.generate(os.path.join(self.tmp_path, 'repo'))
+
+        files = subprocess.check_output(['git', '-C', repo_path, 'ls-files', '*.py']).decode('utf-8').split()
+        self.assertEqual(len([f for f in files if not f.endswith('__init__.py')]), 10 + 3 * 2)
+
+    def test_churn_hotspot(self):
+        """Test whether the hotspot pattern concentrates the changes on few files"""
+
+        generator = RepositoryGenerator(commits=50, files=20, file_size=20, churn=0.1, pattern=CHURN_HOTSPOT)
+        repo_path = generator.generate(os.path.join(self.tmp_path, 'repo'))
+
+        hot_changes = len(git_log(repo_path, '--', os.path.join(ENTRYPOINT, 'pkg0', 'module0.py')))
+        cold_changes = len(git_log(repo_path, '--', os.path.join(ENTRYPOINT, 'pkg1', 'module19.py')))
+        self.assertGreater(hot_changes, cold_changes)
+
+    def test_invalid_params(self):
+        """Test whether an exception is thrown when the parameters are not valid"""
+
+        with self.assertRaises(GraalError):
+            RepositoryGenerator(commits=0)
+
+        with self.assertRaises(GraalError):
+            RepositoryGenerator(languages=['cobol'])
+
+        with self.assertRaises(GraalError):
+            RepositoryGenerator(pattern='unknown')
+
+        with self.assertRaises(GraalError):
+            RepositoryGenerator(churn=2)
+
+    def test_existing_path(self):
+        """Test whether an exception is thrown when the path exists"""
+
+        with self.assertRaises(GraalError):
+            RepositoryGenerator().generate(self.tmp_path)
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Backend benchmarks tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        generator = RepositoryGenerator(commits=4, files=4, file_size=30)
+        cls.repo_path = generator.generate(os.path.join(cls.tmp_path, 'repo'))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_path)
+
+    def test_run_benchmark(self):
+        """Test whether a benchmark is timed end to end and per stage"""
+
+        benchmark = Benchmark(CoCom, CATEGORY_COCOM_LIZARD_FILE, params={'line_counter': LINE_COUNTER_LIZARD})
+        result = run_benchmark(benchmark, self.repo_path, self.tmp_path, repeat=2)
+
+        self.assertEqual(result['name'], 'cocom:code_complexity_lizard_file')
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['commits'], 4)
+        self.assertEqual(result['items'], 4)
+        self.assertEqual(len(result['walls']), 2)
+        self.assertEqual(result['wall'], min(result['walls']))
+        self.assertGreater(result['commits_per_second'], 0)
+        self.assertEqual(result['stages']['checkout']['count'], 4)
+        self.assertEqual(result['stages']['json']['count'], 4)
+        self.assertIn('analyzer:Lizard', result['stages'])
+
+        # the data of the runs is removed
+        self.assertListEqual(os.listdir(self.tmp_path), ['repo'])
+
+    def test_run_benchmark_missing_tools(self):
+        """Test whether benchmarks whose tools are not available are skipped"""
+
+        benchmark = Benchmark(CoCom, CATEGORY_COCOM_LIZARD_FILE, tools=['graal-unknown-tool'],
+                              exec_tool='graal-unknown-exec')
+        result = run_benchmark(benchmark, self.repo_path, self.tmp_path)
+
+        self.assertEqual(result['status'], STATUS_SKIPPED)
+        self.assertEqual(result['reason'], 'missing tools: graal-unknown-tool, graal-unknown-exec')
+
+    def test_select_benchmarks(self):
+        """Test whether the benchmarks are selected by the prefix of their names"""
+
+        names = [b.name for b in select_benchmarks(['cocom:code_complexity_lizard', 'covuln'])]
+        self.assertListEqual(names, ['cocom:code_complexity_lizard_file',
+                                     'cocom:code_complexity_lizard_file:cloc',
+                                     'cocom:code_complexity_lizard_repository',
+                                     'covuln:code_vulnerabilities'])
+
+        backends = {b.backend for b in select_benchmarks()}
+        self.assertSetEqual(backends, {'cocom', 'codep', 'colang', 'colic', 'coqua', 'covuln'})
+
+    def test_main(self):
+        """Test whether the benchmarks are run and compared from the command line"""
+
+        old_path = os.path.join(self.tmp_path, 'old.json')
+        new_path = os.path.join(self.tmp_path, 'new.json')
+
+        main(['backends', '-o', old_path, '--repository', self.repo_path,
+              '--select', 'cocom:code_complexity_lizard_file'])
+
+        results = load_results(old_path)
+        self.assertEqual(results['suite'], 'backends')
+        self.assertDictEqual(results['repository'], {'path': self.repo_path})
+        self.assertEqual([r['status'] for r in results['results']][0], STATUS_OK)
+
+        for result in results['results']:
+            if result['status'] == STATUS_OK:
+                result['wall'] *= 2
+        save_results(new_path, 'backends', results['results'])
+
+        self.assertEqual(main(['compare', old_path, old_path]), 0)
+        self.assertEqual(main(['compare', old_path, new_path]), 1)
+
+        os.remove(old_path)
+        os.remove(new_path)
+
+
+class TestOverhead(unittest.TestCase):
+    """Overhead benchmarks tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        generator = RepositoryGenerator(commits=5, files=4, file_size=30)
+        cls.repo_path = generator.generate(os.path.join(cls.tmp_path, 'repo'))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_path)
+
+    def test_null_analysis(self):
+        """Test whether the backends of the overhead benchmarks do not analyze the commits"""
+
+        backend = NullCoCom(self.repo_path, os.path.join(self.tmp_path, 'git'),
+                            worktreepath=os.path.join(self.tmp_path, 'worktrees'))
+        items = [item for item in backend.fetch()]
+        shutil.rmtree(os.path.join(self.tmp_path, 'git'))
+
+        self.assertEqual(len(items), 5)
+        for item in items:
+            self.assertDictEqual(item['data']['analysis'], {})
+            # the post-processing of the backend is done
+            self.assertIn(os.path.join(ENTRYPOINT, 'pkg0', 'module0.py'), item['data']['files'])
+
+    def test_run_overhead(self):
+        """Test whether the throughput of the stages of the framework is measured"""
+
+        benchmark = select_overhead_benchmarks(['nullcocom:code_complexity_lizard_file'])[0]
+        result = run_overhead(benchmark, self.repo_path, self.tmp_path)
+
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['commits'], 5)
+        self.assertListEqual(list(result['throughput']), OVERHEAD_STAGES)
+        self.assertNotIn('analyzer:Lizard', result['stages'])
+
+    def test_run_overhead_stub_tool(self):
+        """Test whether a stub tool is set to the backends requiring an executable"""
+
+        benchmark = [b for b in OVERHEAD_BENCHMARKS if b.backend_class is NullCoLic][0]
+        result = run_overhead(benchmark, self.repo_path, self.tmp_path)
+
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['commits'], 5)
+
+    def test_main(self):
+        """Test whether the overhead is measured from the command line"""
+
+        output_path = os.path.join(self.tmp_path, 'overhead.json')
+
+        main(['overhead', '-o', output_path, '--commits', '3', '--files', '2', '--select', 'nullgraal'])
+
+        results = load_results(output_path)
+        self.assertEqual(results['suite'], 'overhead')
+        self.assertEqual(results['repository']['commits'], 3)
+        self.assertListEqual([r['name'] for r in results['results']], ['nullgraal:graal'])
+        self.assertEqual(results['results'][0]['commits'], 3)
+
+        os.remove(output_path)
+
+
+class TestParsers(unittest.TestCase):
+    """Parser benchmarks tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_outputs(self):
+        """Test whether the generated outputs are parsed by the analyzers"""
+
+        expected = {
+            'cloc_repository': lambda r: len(r) == 10,
+            'cloc_files': lambda r: len(r) == 10 and all(v['loc'] == 100 for v in r.values()),
+            'scc_repository': lambda r: sum(v['total_files'] for v in r.values()) == 10,
+            'scc_repository_files': lambda r: len(r) == 10,
+            'bandit': lambda r: r['num_vulns'] == 10 and r['loc_analyzed'] == 500,
+            'pylint': lambda r: r['quality'] == '7.50',
+            'flake8': lambda r: r['warnings'] == 10,
+            'nomos': lambda r: len(r['licenses'][0].split(',')) == 10,
+            'scancode_cli': lambda r: len(r) == 10 and r[0]['licenses'][0]['key'] == 'gpl-3.0-plus'
+        }
+
+        self.assertListEqual([p.name for p in PARSERS], list(expected))
+
+        for parser in PARSERS:
+            output = parser.output(10)
+            data = output.encode('utf-8')
+            with unittest.mock.patch('subprocess.check_output', return_value=data), \
+                    unittest.mock.patch('subprocess.Popen', return_value=RecordedProcess(data, encoding='utf-8')):
+                result = parser.analyzer().analyze(**parser.params(output))
+                if isinstance(result, types.GeneratorType):
+                    result = list(result)
+            self.assertTrue(expected[parser.name](result), parser.name)
+
+    def test_run_parser(self):
+        """Test whether the time and the peak of memory of a parser are measured"""
+
+        parser = select_parsers(['bandit'])[0]
+        output = parser.output(100)
+        result = run_parser(parser, output, repeat=2)
+
+        self.assertEqual(result['name'], 'bandit')
+        self.assertEqual(result['status'], STATUS_OK)
+        self.assertEqual(result['output_bytes'], len(output))
+        self.assertEqual(len(result['walls']), 2)
+        self.assertEqual(result['wall'], min(result['walls']))
+        self.assertGreater(result['peak_memory'], len(output))
+        self.assertGreater(result['megabytes_per_second'], 0)
+
+    def test_run_parser_error(self):
+        """Test whether the parsers failing on an output are reported"""
+
+        parser = select_parsers(['scancode_cli'])[0]
+        result = run_parser(parser, 'not a JSON document', repeat=1)
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertTrue(result['reason'].startswith('JSONDecodeError'))
+
+    def test_corpus(self):
+        """Test whether the outputs are read from a corpus, when available"""
+
+        parsers = select_parsers(['nomos', 'flake8'])
+        write_corpus(self.tmp_path, parsers, scale=0.001)
+
+        self.assertListEqual(sorted(os.listdir(self.tmp_path)), ['flake8' + CORPUS_SUFFIX, 'nomos' + CORPUS_SUFFIX])
+
+        nomos = parsers[1]
+        with open(os.path.join(self.tmp_path, 'nomos' + CORPUS_SUFFIX), 'w') as fd:
+            fd.write('File a.py contains license(s) MIT\n')
+
+        self.assertEqual(load_output(nomos, corpus_path=self.tmp_path), 'File a.py contains license(s) MIT\n')
+        self.assertEqual(load_output(nomos, scale=0.001), nomos.output(5))
+
+        # outputs not found in the corpus are generated
+        bandit = select_parsers(['bandit'])[0]
+        self.assertEqual(load_output(bandit, corpus_path=self.tmp_path, scale=0.001), bandit.output(20))
+
+    def test_main(self):
+        """Test whether the parsers are benchmarked from the command line"""
+
+        output_path = os.path.join(self.tmp_path, 'parsers.json')
+
+        main(['parsers', '-o', output_path, '--scale', '0.001', '--repeat', '1'])
+
+        results = load_results(output_path)
+        self.assertEqual(results['suite'], 'parsers')
+        self.assertEqual(results['scale'], 0.001)
+        self.assertListEqual([r['name'] for r in results['results']], [p.name for p in PARSERS])
+        self.assertTrue(all(r['status'] == STATUS_OK for r in results['results']))
+
+
+class TestCompareResults(unittest.TestCase):
+    """compare_results tests"""
+
+    def test_compare(self):
+        """Test whether the regressions and improvements are detected"""
+
+        old = {'results': [{'name': 'a', 'wall': 1.0},
+                           {'name': 'b', 'wall': 1.0},
+                           {'name': 'c', 'wall': 1.0},
+                           {'name': 'd', 'status': 'skipped'}]}
+        new = {'results': [{'name': 'a', 'wall': 1.05},
+                           {'name': 'b', 'wall': 2.0},
+                           {'name': 'c', 'wall': 0.5},
+                           {'name': 'd', 'wall': 1.0},
+                           {'name': 'e', 'wall': 1.0}]}
+
+        comparison = compare_results(old, new)
+
+        self.assertListEqual([c['name'] for c in comparison], ['a', 'b', 'c'])
+        self.assertListEqual([c['regression'] for c in comparison], [False, True, False])
+        self.assertListEqual([c['improvement'] for c in comparison], [False, False, True])
+        self.assertAlmostEqual(comparison[1]['change'], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from graal.cache import (MEMORY_CACHE,
+                         AnalysisCache)
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """AnalysisCache tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_init(self):
+        """Test initialization"""
+
+        cache = AnalysisCache()
+        self.assertEqual(cache.path, MEMORY_CACHE)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+
+    def test_key(self):
+        """Test whether keys depend on all their parts"""
+
+        key = AnalysisCache.key('abc', 'Lizard', '0.3.1', True)
+        self.assertEqual(key, AnalysisCache.key('abc', 'Lizard', '0.3.1', True))
+        self.assertNotEqual(key, AnalysisCache.key('abc', 'Lizard', '0.3.1', False))
+        self.assertNotEqual(key, AnalysisCache.key('abc', 'Lizard', '0.3.2', True))
+        self.assertNotEqual(key, AnalysisCache.key('abd', 'Lizard', '0.3.1', True))
+
+    def test_get_set(self):
+        """Test whether results are stored and retrieved"""
+
+        cache = AnalysisCache()
+        key = cache.key('abc')
+
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.misses, 1)
+
+        cache.set(key, {'ccn': 3, 'funs': [{'name': 'f'}]})
+        self.assertDictEqual(cache.get(key), {'ccn': 3, 'funs': [{'name': 'f'}]})
+        self.assertEqual(cache.hits, 1)
+
+        # results are copies, so they can be modified safely
+        result = cache.get(key)
+        result['file_path'] = 'a.py'
+        self.assertNotIn('file_path', cache.get(key))
+
+        cache.close()
+
+    def test_get_set_worktree(self):
+        """Test whether the worktree in the results is replaced by the one of the reader"""
+
+        cache = AnalysisCache()
+        key = cache.key('abc')
+
+        cache.set(key, {'path': '/tmp/worktree-1/a.py', 'smells': ['/tmp/worktree-1/a.py:1 DL3000']},
+                  worktree_path='/tmp/worktree-1/')
+        self.assertDictEqual(cache.get(key, worktree_path='/tmp/worktree-2'),
+                             {'path': '/tmp/worktree-2/a.py', 'smells': ['/tmp/worktree-2/a.py:1 DL3000']})
+        self.assertDictEqual(cache.get(key, worktree_path='/tmp/worktree-1'),
+                             {'path': '/tmp/worktree-1/a.py', 'smells': ['/tmp/worktree-1/a.py:1 DL3000']})
+
+        cache.close()
+
+    def test_persistence(self):
+        """Test whether results are kept among runs"""
+
+        cache_path = os.path.join(self.tmp_path, 'cache.db')
+
+        cache = AnalysisCache(cache_path)
+        cache.set(cache.key('abc'), [1, 2, 3])
+        cache.close()
+
+        cache = AnalysisCache(cache_path)
+        self.assertListEqual(cache.get(cache.key('abc')), [1, 2, 3])
+        cache.close()
+
+    def test_pickle(self):
+        """Test whether the cache can be sent to other processes"""
+
+        cache_path = os.path.join(self.tmp_path, 'cache.db')
+
+        cache = AnalysisCache(cache_path)
+        cache.set(cache.key('abc'), 'result')
+
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(copy.get(copy.key('abc')), 'result')
+
+        cache.close()
+        copy.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from graal.checkpoint import CheckpointStore
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """CheckpointStore tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        self.store_path = os.path.join(self.tmp_path, 'checkpoints.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_run_id(self):
+        """Test whether run identifiers depend on all their parts"""
+
+        run_id = CheckpointStore.run_id('CoCom', '0.6.0', 'code_complexity_lizard_file', {'details': False})
+        self.assertEqual(run_id, CheckpointStore.run_id('CoCom', '0.6.0', 'code_complexity_lizard_file',
+                                                        {'details': False}))
+        self.assertNotEqual(run_id, CheckpointStore.run_id('CoCom', '0.6.0', 'code_complexity_lizard_file',
+                                                           {'details': True}))
+        self.assertNotEqual(run_id, CheckpointStore.run_id('CoCom', '0.6.0', 'code_complexity_scc_file',
+                                                           {'details': False}))
+
+    def test_add(self):
+        """Test whether the commits analyzed are recorded for each run"""
+
+        store = CheckpointStore(self.store_path)
+        self.assertSetEqual(store.analyzed('run'), set())
+
+        store.add('run', 'abc')
+        store.add('run', 'def')
+        store.add('run', 'abc')
+        store.add('other', 'ghi')
+
+        self.assertSetEqual(store.analyzed('run'), {'abc', 'def'})
+        self.assertSetEqual(store.analyzed('other'), {'ghi'})
+        store.close()
+
+        # commits are kept among runs
+        store = CheckpointStore(self.store_path)
+        self.assertSetEqual(store.analyzed('run'), {'abc', 'def'})
+        store.close()
+
+    def test_pickle(self):
+        """Test whether the store can be sent to other processes"""
+
+        store = CheckpointStore(self.store_path)
+        store.add('run', 'abc')
+
+        copy = pickle.loads(pickle.dumps(store))
+        self.assertSetEqual(copy.analyzed('run'), {'abc'})
+
+        store.close()
+        copy.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,7 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import json
 import os
 import subprocess
 import unittest.mock
@@ -82,6 +83,129 @@ class TestCloc(TestCaseAnalyzer):
         self.assertIn('total_files', result)
         self.assertTrue(type(result['total_files']), int)
 
+    def test_analyze_files(self):
+        """Test whether cloc returns the expected fields data for a list of files"""
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        expected = Cloc().analyze(file_path=file_path)
+
+        cloc = Cloc()
+        results = cloc.analyze(file_paths=[file_path, self.origin_path + '/unknown'])
+
+        self.assertDictEqual(results[file_path], expected)
+        self.assertDictEqual(results[self.origin_path + '/unknown'],
+                             {'blanks': 0, 'comments': 0, 'loc': 0, 'ext': 'unknown'})
+
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files_output(self, check_output_mock):
+        """Test whether the JSON output of cloc is parsed for each file"""
+
+        output = {
+            "header": {"cloc_version": "1.90", "n_files": 2},
+            "/tmp/repo/graal.py": {"blank": 27, "comment": 31, "code": 67, "language": "Python"},
+            "/tmp/repo/tests/../README.md": {"blank": 2, "comment": 0, "code": 5, "language": "Markdown"},
+            "SUM": {"blank": 29, "comment": 31, "code": 72, "nFiles": 2}
+        }
+        list_files = []
+
+        def check_output(cmd):
+            list_file = [arg for arg in cmd if arg.startswith('--list-file=')][0].split('=', 1)[1]
+            with open(list_file) as fd:
+                list_files.append(fd.read())
+            self.assertIn('--by-file', cmd)
+            self.assertIn('--json', cmd)
+            self.assertIn('--skip-uniqueness', cmd)
+            return json.dumps(output).encode('utf-8')
+
+        check_output_mock.side_effect = check_output
+
+        file_paths = ['/tmp/repo/graal.py', '/tmp/repo/README.md', '/tmp/repo/Makefile', '/tmp/repo/new\nline.py']
+
+        cloc = Cloc()
+        results = cloc.analyze(file_paths=file_paths)
+
+        self.assertEqual(check_output_mock.call_count, 1)
+        self.assertEqual(list_files[0], '/tmp/repo/graal.py\n/tmp/repo/README.md\n/tmp/repo/Makefile\n')
+        self.assertDictEqual(results, {
+            '/tmp/repo/graal.py': {'blanks': 27, 'comments': 31, 'loc': 67, 'ext': 'py'},
+            '/tmp/repo/README.md': {'blanks': 2, 'comments': 0, 'loc': 5, 'ext': 'md'},
+            '/tmp/repo/Makefile': {'blanks': 0, 'comments': 0, 'loc': 0, 'ext': '/tmp/repo/Makefile'},
+            '/tmp/repo/new\nline.py': {'blanks': 0, 'comments': 0, 'loc': 0, 'ext': 'py'}
+        })
+
+        # no files
+        results = cloc.analyze(file_paths=[])
+        self.assertDictEqual(results, {})
+        self.assertEqual(check_output_mock.call_count, 1)
+
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files_contents(self, check_output_mock):
+        """Test whether the contents of a list of files are written to disk and analyzed at once"""
+
+        listed = []
+        written = []
+
+        def check_output(cmd):
+            list_file = [arg for arg in cmd if arg.startswith('--list-file=')][0].split('=', 1)[1]
+            output = {"header": {"cloc_version": "1.90", "n_files": 3}}
+            with open(list_file) as fd:
+                for path in fd.read().splitlines():
+                    listed.append(path)
+                    if not path.startswith('/tmp/repo/'):
+                        with open(path, 'rb') as content_fd:
+                            written.append((os.path.basename(path), content_fd.read()))
+                    output[path] = {"blank": 1, "comment": 2, "code": 3, "language": "Python"}
+            return json.dumps(output).encode('utf-8')
+
+        check_output_mock.side_effect = check_output
+
+        file_paths = ['/tmp/repo/graal.py', '/tmp/repo/tests/graal.py', '/tmp/repo/setup.py']
+
+        cloc = Cloc()
+        results = cloc.analyze(file_paths=file_paths, contents=[b'a = 1\n', b'b = 2\n', None])
+
+        self.assertEqual(check_output_mock.call_count, 1)
+        self.assertEqual(len(listed), 3)
+        self.assertEqual(listed[2], '/tmp/repo/setup.py')
+        self.assertListEqual(written, [('graal.py', b'a = 1\n'), ('graal.py', b'b = 2\n')])
+        for file_path in file_paths:
+            self.assertDictEqual(results[file_path], {'blanks': 1, 'comments': 2, 'loc': 3, 'ext': 'py'})
+
+        # the files are removed once analyzed
+        self.assertFalse(any(os.path.exists(path) for path in listed[:2]))
+
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files_repository_level(self, check_output_mock):
+        """Test whether the results of a list of files are obtained for each language"""
+
+        output = (
+            "       2 text files.\n"
+            "-------------------------------------------------------------------------------\n"
+            "Language                     files          blank        comment           code\n"
+            "-------------------------------------------------------------------------------\n"
+            "Python                           1             27             31             67\n"
+            "Markdown                         1              2              0              5\n"
+            "-------------------------------------------------------------------------------\n"
+            "SUM:                             2             29             31             72\n"
+            "-------------------------------------------------------------------------------\n"
+        )
+        check_output_mock.return_value = output.encode('utf-8')
+
+        cloc = Cloc()
+        results = cloc.analyze(file_paths=['/tmp/repo/graal.py', '/tmp/repo/README.md'], repository_level=True)
+
+        args, _ = check_output_mock.call_args
+        self.assertNotIn('--by-file', args[0])
+        self.assertNotIn('--json', args[0])
+        self.assertDictEqual(results, {
+            'Python': {'total_files': 1, 'blanks': 27, 'comments': 31, 'loc': 67},
+            'Markdown': {'total_files': 1, 'blanks': 2, 'comments': 0, 'loc': 5}
+        })
+
+        results = cloc.analyze(file_paths=[], repository_level=True)
+        self.assertDictEqual(results, {})
+        self.assertEqual(check_output_mock.call_count, 1)
+
     @unittest.mock.patch('subprocess.check_output')
     def test_analyze_error(self, check_output_mock):
         """Test whether an exception is thrown in case of errors"""
@@ -93,6 +217,9 @@ class TestCloc(TestCaseAnalyzer):
         with self.assertRaises(GraalError):
             _ = cloc.analyze(**kwargs)
 
+        with self.assertRaises(GraalError):
+            _ = cloc.analyze(file_paths=[kwargs['file_path']])
+
 
 if __name__ == "__main__":
     unittest.main()
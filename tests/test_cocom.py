@@ -24,14 +24,23 @@
 import os
 import unittest.mock
 
-from graal.graal import GraalError
+from graal.cache import AnalysisCache
+from graal.graal import (GraalError,
+                         GraalRepository,
+                         CHECKOUT_NONE,
+                         CHECKOUT_SPARSE)
 from graal.graal import GraalCommandArgumentParser
 from graal.backends.core.analyzers.cloc import Cloc
-from graal.backends.core.analyzers.lizard import Lizard
+from graal.backends.core.analyzers.lizard import (Lizard,
+                                                  DEFAULT_THREADS)
 from graal.backends.core.cocom import (CATEGORY_COCOM_LIZARD_FILE,
                                        CATEGORY_COCOM_LIZARD_REPOSITORY,
                                        CATEGORY_COCOM_SCC_FILE,
                                        CATEGORY_COCOM_SCC_REPOSITORY,
+                                       LINE_COUNTER_CLOC,
+                                       LINE_COUNTER_LIZARD,
+                                       SCC_FILE,
+                                       SCC_REPOSITORY,
                                        CoCom,
                                        FileAnalyzer,
                                        RepositoryAnalyzer,
@@ -40,6 +49,7 @@ from perceval.utils import DEFAULT_DATETIME
 from base_analyzer import (ANALYZER_TEST_FILE,
                            TestCaseAnalyzer)
 from base_repo import TestCaseRepo
+from utils import mock_cloc_analysis
 
 
 class TestCoComBackend(TestCaseRepo):
@@ -70,6 +80,164 @@ class TestCoComBackend(TestCaseRepo):
         cc = CoCom('http://example.com', self.git_path, self.worktree_path)
         self.assertEqual(cc.origin, 'http://example.com')
         self.assertEqual(cc.tag, 'http://example.com')
+        self.assertEqual(cc.threads, DEFAULT_THREADS)
+
+        self.assertEqual(cc.line_counter, LINE_COUNTER_CLOC)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, threads=4,
+                   line_counter=LINE_COUNTER_LIZARD)
+        self.assertEqual(cc.threads, 4)
+        self.assertEqual(cc.line_counter, LINE_COUNTER_LIZARD)
+
+        with self.assertRaises(GraalError):
+            _ = CoCom('http://example.com', self.git_path, self.worktree_path, threads=0)
+
+        with self.assertRaises(GraalError):
+            _ = CoCom('http://example.com', self.git_path, self.worktree_path, line_counter='wc')
+
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_fetch_lizard_file_line_counter(self, mock_cloc):
+        """Test whether blank and comment lines are counted by Lizard"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path,
+                   in_paths=['perceval/backends/core/github.py'], line_counter=LINE_COUNTER_LIZARD)
+        commits = [commit for commit in cc.fetch()]
+
+        self.assertEqual(len(commits), 1)
+        self.assertFalse(mock_cloc.called)
+
+        analysis = commits[0]['data']['analysis'][0]
+        self.assertEqual(analysis['file_path'], 'perceval/backends/core/github.py')
+        self.assertGreater(analysis['loc'], 0)
+        self.assertGreater(analysis['blanks'], 0)
+        self.assertGreater(analysis['comments'], 0)
+
+    @unittest.mock.patch('graal.backends.core.analyzers.lizard.Cloc.analyze')
+    def test_fetch_lizard_repository_incremental(self, mock_cloc):
+        """Test whether only the files changed by each commit are analyzed again"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, threads=2)
+        commits = [commit for commit in cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)]
+
+        self.assertEqual(len(commits), 6)
+        self.assertFalse(os.path.exists(cc.worktreepath))
+
+        analyzed = [len(call[1]['file_paths']) for call in mock_cloc.call_args_list]
+        # all files are analyzed at the first commit, then only the file added and the renamed one
+        self.assertEqual(analyzed[0], len(commits[0]['data']['analysis']))
+        self.assertListEqual(analyzed[1:], [1, 1])
+
+        commit = commits[3]
+        self.assertEqual(len(commit['data']['analysis']), len(commits[0]['data']['analysis']) + 1)
+        in_commit = [a['file_path'] for a in commit['data']['analysis'] if a['in_commit']]
+        self.assertListEqual(in_commit, ['perceval/backends/core/graal.py'])
+
+    @unittest.mock.patch('graal.backends.core.analyzers.lizard.Cloc.analyze')
+    def test_fetch_lizard_repository_cache(self, mock_cloc):
+        """Test whether the results of commits with the same tree are reused"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path)
+        expected = [commit for commit in cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)]
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, cache_path=':memory:')
+        with unittest.mock.patch.object(RepositoryAnalyzer, 'analyze', autospec=True,
+                                        side_effect=RepositoryAnalyzer.analyze) as mock_analyze, \
+                unittest.mock.patch.object(GraalRepository, 'ls_tree', autospec=True,
+                                           side_effect=GraalRepository.ls_tree) as mock_ls_tree:
+            commits = [commit for commit in cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)]
+
+            # the last commit has the same tree of the third one
+            self.assertEqual(mock_analyze.call_count, 5)
+            # the hashes of the files are only listed for the commits analyzed
+            self.assertEqual(mock_ls_tree.call_count, 5)
+
+        self.assertEqual(len(commits), 6)
+        for commit, expected_commit in zip(commits, expected):
+            self.assertListEqual(commit['data']['analysis'], expected_commit['data']['analysis'])
+
+        in_commit = [a['file_path'] for a in commits[5]['data']['analysis'] if a['in_commit']]
+        self.assertListEqual(in_commit, [])
+
+    def test_fetch_lizard_repository_workers(self):
+        """Test whether the processes of Lizard are split among the workers"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, threads=4, workers=2)
+        _ = cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)
+        self.assertEqual(cc.analyzer.threads, 2)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, threads=2, workers=4)
+        _ = cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)
+        self.assertEqual(cc.analyzer.threads, 1)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, threads=4)
+        _ = cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)
+        self.assertEqual(cc.analyzer.threads, 4)
+
+    @unittest.mock.patch('graal.backends.core.cocom.SCC.analyze')
+    def test_fetch_scc_repository_incremental(self, mock_scc):
+        """Test whether SCC is executed only on the directories changed by each commit"""
+
+        def count_files(**kwargs):
+            return {'Python': {'total_files': len(kwargs['file_paths']), 'blanks': 1, 'comments': 1, 'loc': 1, 'ccn': 1}}
+
+        mock_scc.side_effect = count_files
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, incremental=True)
+        commits = [commit for commit in cc.fetch(category=CATEGORY_COCOM_SCC_REPOSITORY)]
+
+        self.assertEqual(len(commits), 6)
+        # hidden files, such as .travis.yml, are not analyzed, thus the
+        # second and third commits do not require to run SCC
+        self.assertEqual(mock_scc.call_count, 7)
+
+        total_files = [commit['data']['analysis']['Python']['total_files'] for commit in commits]
+        self.assertListEqual(total_files, [12, 12, 12, 13, 13, 12])
+
+    def test_fetch_incremental_not_supported(self):
+        """Test whether an exception is thrown when the category does not support the incremental analysis"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, incremental=True)
+
+        with self.assertRaises(GraalError):
+            _ = cc.fetch(category=CATEGORY_COCOM_LIZARD_FILE)
+
+    def test_fetch_resume(self):
+        """Test whether the commits analyzed with another line counter are not skipped"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path,
+                   in_paths=['perceval/backends/core/github.py'], line_counter=LINE_COUNTER_LIZARD,
+                   resume=True)
+        commits = [commit for commit in cc.fetch()]
+        self.assertEqual(len(commits), 1)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path,
+                   in_paths=['perceval/backends/core/github.py'], line_counter=LINE_COUNTER_LIZARD,
+                   resume=True)
+        commits = [commit for commit in cc.fetch()]
+        self.assertEqual(len(commits), 0)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path,
+                   in_paths=['perceval/backends/core/github.py'], line_counter=LINE_COUNTER_LIZARD,
+                   by_file=True, resume=True)
+        commits = [commit for commit in cc.fetch(category=CATEGORY_COCOM_LIZARD_FILE)]
+        self.assertEqual(len(commits), 1)
+
+    def test_fetch_timings(self):
+        """Test whether the time spent by the analyzers is added to the items"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path,
+                   in_paths=['perceval/backends/core/github.py'], line_counter=LINE_COUNTER_LIZARD,
+                   timings=True)
+        commits = [commit for commit in cc.fetch()]
+
+        self.assertEqual(len(commits), 1)
+        timings = commits[0]['timings']
+        self.assertEqual(timings['analyzer:Lizard']['count'], 1)
+        self.assertGreater(timings['analyze']['wall'], timings['analyzer:Lizard']['wall'])
 
     def test_fetch_lizard_file(self):
         """Test whether commits are properly processed via file level"""
@@ -147,6 +315,71 @@ class TestCoComBackend(TestCaseRepo):
             self.assertTrue('parents' in commit['data'])
             self.assertFalse('refs' in commit['data'])
 
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_fetch_lizard_file_checkout_none(self, mock_cloc):
+        """Test whether files are analyzed without checking out the working tree"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, details=True)
+        expected = [commit for commit in cc.fetch()]
+        expected_calls = mock_cloc.call_count
+        mock_cloc.reset_mock()
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, details=True,
+                   checkout_mode=CHECKOUT_NONE)
+
+        with unittest.mock.patch('graal.graal.GraalRepository.checkout') as mock_checkout:
+            commits = [commit for commit in cc.fetch()]
+            self.assertFalse(mock_checkout.called)
+
+        self.assertFalse(os.path.exists(cc.worktreepath))
+        self.assertEqual(len(commits), len(expected))
+
+        for commit, expected_commit in zip(commits, expected):
+            self.assertEqual(commit['data']['commit'], expected_commit['data']['commit'])
+            self.assertListEqual(commit['data']['analysis'], expected_commit['data']['analysis'])
+            self.assertListEqual(commit['data']['files'], expected_commit['data']['files'])
+            self.assertListEqual(commit['data']['files'], sorted(commit['data']['files']))
+
+        # the contents are passed to cloc, which is executed once per commit as on disk
+        self.assertEqual(mock_cloc.call_count, expected_calls)
+        _, kwargs = mock_cloc.call_args
+        self.assertEqual(len(kwargs['contents']), len(kwargs['file_paths']))
+        self.assertNotIn(None, kwargs['contents'])
+
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_fetch_lizard_file_checkout_sparse(self, mock_cloc):
+        """Test whether only the files of each commit are checked out"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, details=True)
+        expected = [commit for commit in cc.fetch()]
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, details=True,
+                   checkout_mode=CHECKOUT_SPARSE)
+        commits = [commit for commit in cc.fetch()]
+
+        self.assertFalse(os.path.exists(cc.worktreepath))
+        self.assertEqual(len(commits), len(expected))
+
+        for commit, expected_commit in zip(commits, expected):
+            self.assertEqual(commit['data']['commit'], expected_commit['data']['commit'])
+            self.assertListEqual(commit['data']['analysis'], expected_commit['data']['analysis'])
+            self.assertListEqual(commit['data']['files'], expected_commit['data']['files'])
+
+    def test_fetch_checkout_none_not_supported(self):
+        """Test whether an error is thrown when the category requires a working tree"""
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, checkout_mode=CHECKOUT_NONE)
+
+        with self.assertRaises(GraalError):
+            _ = cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY)
+
+        with self.assertRaises(GraalError):
+            _ = cc.fetch(category=CATEGORY_COCOM_SCC_FILE)
+
     def test_fetch_unknown(self):
         """Test whether commits are properly processed"""
 
@@ -281,6 +514,149 @@ class TestFileAnalyzer(TestCaseAnalyzer):
             self.assertIn('start', fd)
             self.assertIn('end', fd)
 
+    @unittest.mock.patch('graal.backends.core.cocom.Lizard.analyze')
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_analyze_cache(self, mock_cloc, mock_lizard):
+        """Test whether the results of identical files are taken from the cache"""
+
+        mock_cloc.return_value = {'blanks': 1, 'comments': 2, 'loc': 3}
+        mock_lizard.return_value = {'ccn': 4, 'loc': 3}
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        copy_path = os.path.join(self.tmp_path, 'copy', ANALYZER_TEST_FILE)
+        os.mkdir(os.path.join(self.tmp_path, 'copy'))
+        with open(file_path, 'rb') as fd, open(copy_path, 'wb') as fc:
+            fc.write(fd.read())
+
+        cache = AnalysisCache()
+        file_analyzer = FileAnalyzer(cache=cache)
+
+        expected = {'ccn': 4, 'loc': 3, 'blanks': 1, 'comments': 2}
+        analysis = file_analyzer.analyze(file_path)
+        self.assertDictEqual(analysis, expected)
+        analysis = file_analyzer.analyze(copy_path)
+        self.assertDictEqual(analysis, expected)
+
+        self.assertEqual(mock_cloc.call_count, 1)
+        self.assertEqual(mock_lizard.call_count, 1)
+        self.assertEqual(cache.hits, 1)
+
+        # details are part of the key
+        file_analyzer = FileAnalyzer(details=True, cache=cache)
+        _ = file_analyzer.analyze(file_path)
+        self.assertEqual(mock_lizard.call_count, 2)
+
+    @unittest.mock.patch('graal.backends.core.cocom.Lizard.analyze')
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_analyze_files(self, mock_cloc, mock_lizard):
+        """Test whether CLOC is executed once for a list of files"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+        mock_lizard.return_value = {'ccn': 4, 'loc': 3}
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_path, 'README.md')
+        with open(other_path, 'w') as fd:
+            fd.write('# Graal\n')
+
+        cache = AnalysisCache()
+        file_analyzer = FileAnalyzer(cache=cache)
+
+        analysis = file_analyzer.analyze_files([file_path, other_path])
+        self.assertListEqual(analysis, [{'ccn': 4, 'loc': 3, 'blanks': 1, 'comments': 2},
+                                        {'blanks': 1, 'comments': 2, 'loc': 3}])
+        self.assertEqual(mock_cloc.call_count, 1)
+        _, kwargs = mock_cloc.call_args
+        self.assertListEqual(kwargs['file_paths'], [file_path, other_path])
+        self.assertEqual(mock_lizard.call_count, 1)
+
+        # the results are taken from the cache
+        cached = file_analyzer.analyze_files([other_path, file_path])
+        self.assertListEqual(cached, [analysis[1], analysis[0]])
+        self.assertEqual(mock_cloc.call_count, 1)
+        self.assertEqual(cache.hits, 2)
+
+        self.assertListEqual(file_analyzer.analyze_files([]), [])
+        self.assertEqual(mock_cloc.call_count, 1)
+
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_analyze_files_contents(self, mock_cloc):
+        """Test whether CLOC is executed once for the contents of a list of files"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        file_path = os.path.join(self.tmp_path, 'missing', ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_path, 'missing', 'README.md')
+        with open(os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE), 'rb') as fd:
+            content = fd.read()
+
+        cache = AnalysisCache()
+        file_analyzer = FileAnalyzer(cache=cache)
+
+        analysis = file_analyzer.analyze_files([file_path, other_path], contents=[content, b'# Graal\n'])
+        self.assertEqual(analysis[0]['blanks'], 1)
+        self.assertEqual(analysis[0]['num_funs'], 9)
+        self.assertDictEqual(analysis[1], {'blanks': 1, 'comments': 2, 'loc': 3})
+
+        self.assertEqual(mock_cloc.call_count, 1)
+        _, kwargs = mock_cloc.call_args
+        self.assertListEqual(kwargs['file_paths'], [file_path, other_path])
+        self.assertListEqual(kwargs['contents'], [content, b'# Graal\n'])
+
+        # the results are taken from the cache
+        cached = file_analyzer.analyze_files([other_path, file_path], contents=[b'# Graal\n', content])
+        self.assertListEqual(cached, [analysis[1], analysis[0]])
+        self.assertEqual(mock_cloc.call_count, 1)
+        self.assertEqual(cache.hits, 2)
+
+    @unittest.mock.patch('graal.backends.core.cocom.Cloc.analyze')
+    def test_analyze_line_counter(self, mock_cloc):
+        """Test whether CLOC is used only for the files not supported by Lizard"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_path, 'README.md')
+        with open(other_path, 'w') as fd:
+            fd.write('# Graal\n')
+
+        file_analyzer = FileAnalyzer(details=True, line_counter=LINE_COUNTER_LIZARD)
+
+        analysis = file_analyzer.analyze(file_path)
+        self.assertFalse(mock_cloc.called)
+        self.assertEqual(analysis['blanks'], 27)
+        self.assertEqual(analysis['comments'], 31)
+        self.assertIn('funs', analysis)
+
+        analysis = file_analyzer.analyze_files([file_path, other_path])
+        self.assertEqual(mock_cloc.call_count, 1)
+        _, kwargs = mock_cloc.call_args
+        self.assertListEqual(kwargs['file_paths'], [other_path])
+        self.assertEqual(analysis[0]['comments'], 31)
+        self.assertDictEqual(analysis[1], {'blanks': 1, 'comments': 2, 'loc': 3})
+
+    @unittest.mock.patch('graal.backends.core.cocom.SCC.analyze')
+    def test_analyze_files_scc(self, mock_scc):
+        """Test whether SCC is executed once for a list of files"""
+
+        mock_scc.side_effect = lambda **kwargs: {f: {'blanks': 1, 'comments': 2, 'loc': 3, 'ccn': 4, 'ext': 'py'}
+                                                 for f in kwargs['file_paths']}
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_path, 'other.py')
+
+        file_analyzer = FileAnalyzer(kind=SCC_FILE)
+        analysis = file_analyzer.analyze_files([file_path, other_path])
+
+        self.assertEqual(len(analysis), 2)
+        self.assertDictEqual(analysis[0], {'blanks': 1, 'comments': 2, 'loc': 3, 'ccn': 4, 'ext': 'py'})
+        self.assertEqual(mock_scc.call_count, 1)
+        _, kwargs = mock_scc.call_args
+        self.assertListEqual(kwargs['file_paths'], [file_path, other_path])
+
+        self.assertListEqual(file_analyzer.analyze_files([]), [])
+        self.assertEqual(mock_scc.call_count, 1)
+
 
 class TestRepositoryAnalyzer(TestCaseAnalyzer):
     """RepositoryAnalyzer tests"""
@@ -318,6 +694,19 @@ class TestRepositoryAnalyzer(TestCaseAnalyzer):
         self.assertIn('blanks', file_analysis)
         self.assertIn('comments', file_analysis)
 
+    @unittest.mock.patch('graal.backends.core.cocom.SCC.analyze')
+    def test_analyze_scc_by_file(self, mock_scc):
+        """Test whether the results of each file are requested to SCC"""
+
+        mock_scc.return_value = []
+
+        repository_analyzer = RepositoryAnalyzer(kind=SCC_REPOSITORY, by_file=True)
+        _ = repository_analyzer.analyze(self.tmp_data_path, files_affected=[ANALYZER_TEST_FILE])
+
+        _, kwargs = mock_scc.call_args
+        self.assertTrue(kwargs['by_file'])
+        self.assertListEqual(kwargs['files_affected'], [ANALYZER_TEST_FILE])
+
 
 class TestCoComCommand(unittest.TestCase):
     """CoComCommand tests"""
@@ -344,6 +733,30 @@ class TestCoComCommand(unittest.TestCase):
         self.assertEqual(parsed_args.git_path, '/tmp/gitpath')
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
+        self.assertEqual(parsed_args.threads, DEFAULT_THREADS)
+
+        args = ['http://example.com/',
+                '--git-path', '/tmp/gitpath',
+                '--threads', '4']
+
+        parsed_args = parser.parse(*args)
+        self.assertEqual(parsed_args.threads, 4)
+        self.assertEqual(parsed_args.line_counter, LINE_COUNTER_CLOC)
+
+        args = ['http://example.com/',
+                '--git-path', '/tmp/gitpath',
+                '--line-counter', 'lizard']
+
+        parsed_args = parser.parse(*args)
+        self.assertEqual(parsed_args.line_counter, LINE_COUNTER_LIZARD)
+        self.assertFalse(parsed_args.by_file)
+
+        args = ['http://example.com/',
+                '--git-path', '/tmp/gitpath',
+                '--by-file']
+
+        parsed_args = parser.parse(*args)
+        self.assertTrue(parsed_args.by_file)
 
 
 if __name__ == "__main__":
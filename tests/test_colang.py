@@ -72,6 +72,20 @@ class TestCoLangBackend(TestCaseRepo):
         result = commit['data']['analysis']
         self.assertNotIn('breakdown', result)
 
+    @unittest.mock.patch('graal.backends.core.colang.RepositoryAnalyzer.analyze')
+    def test_fetch_cache(self, mock_analyze):
+        """Test whether the results of commits with the same tree are reused"""
+
+        mock_analyze.return_value = {'Python': 100.0}
+
+        cl = CoLang('http://example.com', self.git_path, self.worktree_path, cache_path=':memory:')
+        commits = [commit for commit in cl.fetch()]
+
+        self.assertEqual(len(commits), 6)
+        # the last commit has the same tree of the third one
+        self.assertEqual(mock_analyze.call_count, 5)
+        self.assertDictEqual(commits[5]['data']['analysis'], commits[2]['data']['analysis'])
+
     def test_fetch_cloc(self):
         """Test whether commits are properly processed"""
 
@@ -96,6 +110,36 @@ class TestCoLangBackend(TestCaseRepo):
         self.assertIn('total_files', result)
         self.assertTrue(type(result['total_files']), int)
 
+    @unittest.mock.patch('graal.backends.core.colang.Cloc.analyze')
+    def test_fetch_cloc_incremental(self, mock_cloc):
+        """Test whether CLOC is executed only on the directories changed by each commit"""
+
+        def count_files(**kwargs):
+            return {'Python': {'total_files': len(kwargs['file_paths']), 'blanks': 1, 'comments': 1, 'loc': 1}}
+
+        mock_cloc.side_effect = count_files
+
+        cl = CoLang('http://example.com', self.git_path, self.worktree_path, incremental=True)
+        commits = [commit for commit in cl.fetch(category=CATEGORY_COLANG_CLOC)]
+
+        self.assertEqual(len(commits), 6)
+        self.assertEqual(mock_cloc.call_count, 9)
+
+        total_files = [commit['data']['analysis']['Python']['total_files'] for commit in commits]
+        self.assertListEqual(total_files, [12, 13, 15, 16, 16, 15])
+
+        _, kwargs = mock_cloc.call_args
+        self.assertTrue(kwargs['repository_level'])
+        self.assertEqual(kwargs['repository_path'], cl.worktreepath)
+
+    def test_fetch_incremental_not_supported(self):
+        """Test whether an exception is thrown when the category does not support the incremental analysis"""
+
+        cl = CoLang('http://example.com', self.git_path, self.worktree_path, incremental=True)
+
+        with self.assertRaises(GraalError):
+            _ = cl.fetch(category=CATEGORY_COLANG_LINGUIST)
+
     def test_fetch_unknown(self):
         """Test whether commits are properly processed"""
 
@@ -22,8 +22,11 @@
 #
 
 import os
+import shutil
+import tempfile
 import unittest.mock
 
+from graal.cache import AnalysisCache
 from graal.graal import (GraalCommandArgumentParser,
                          GraalError)
 from graal.backends.core.analyzers.nomos import Nomos
@@ -273,11 +276,80 @@ class TestLicenseAnalyzer(TestCaseAnalyzer):
 
         file_paths = [os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)]
         license_analyzer = LicenseAnalyzer(SCANCODE_CLI_PATH, kind=SCANCODE_CLI)
-        analysis = license_analyzer.analyze(file_paths)
+        analysis = list(license_analyzer.analyze(file_paths))
 
         self.assertIn('licenses', analysis[0])
         self.assertIn('copyrights', analysis[0])
 
+    @unittest.mock.patch('graal.backends.core.colic.ScanCode')
+    def test_analyze_cache_scancode_cli(self, mock_scancode):
+        """Test whether scancode_cli only analyzes the files not found in the cache"""
+
+        mock_scancode.return_value.version = '0.2.0'
+        mock_scancode.return_value.analyze.side_effect = lambda file_paths: ({'path': p} for p in file_paths)
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_data_path, 'Dockerfile')
+
+        license_analyzer = LicenseAnalyzer(SCANCODE_CLI_PATH, kind=SCANCODE_CLI, cache=AnalysisCache())
+
+        analysis = list(license_analyzer.analyze([file_path]))
+        self.assertListEqual(analysis, [{'path': file_path}])
+
+        analysis = list(license_analyzer.analyze([other_path, file_path]))
+        self.assertListEqual(analysis, [{'path': other_path}, {'path': file_path}])
+
+        calls = mock_scancode.return_value.analyze.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertListEqual(calls[1][1]['file_paths'], [other_path])
+
+    @unittest.mock.patch('graal.backends.core.colic.ScanCode')
+    def test_analyze_cache_worktrees(self, mock_scancode):
+        """Test whether the results of scancode_cli are shared among worktrees"""
+
+        mock_scancode.return_value.version = '0.2.0'
+        mock_scancode.return_value.analyze.side_effect = lambda file_paths: ({'path': p} for p in file_paths)
+
+        worktrees = [tempfile.mkdtemp(dir=self.tmp_path) for _ in range(2)]
+        file_paths = []
+        for worktree in worktrees:
+            file_path = os.path.join(worktree, ANALYZER_TEST_FILE)
+            shutil.copy2(os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE), file_path)
+            file_paths.append(file_path)
+
+        license_analyzer = LicenseAnalyzer(SCANCODE_CLI_PATH, kind=SCANCODE_CLI, cache=AnalysisCache())
+
+        analysis = list(license_analyzer.analyze([file_paths[0]], worktrees[0]))
+        self.assertListEqual(analysis, [{'path': file_paths[0]}])
+
+        analysis = list(license_analyzer.analyze([file_paths[1]], worktrees[1]))
+        self.assertListEqual(analysis, [{'path': file_paths[1]}])
+
+        self.assertEqual(mock_scancode.return_value.analyze.call_count, 1)
+
+    @unittest.mock.patch('graal.backends.core.colic.ScanCode')
+    def test_analyze_cache_missing_results(self, mock_scancode):
+        """Test whether an exception is thrown when scancode_cli returns less results than files"""
+
+        mock_scancode.return_value.version = '0.2.0'
+        mock_scancode.return_value.analyze.side_effect = lambda file_paths: ({'path': p} for p in file_paths[:1])
+
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        other_path = os.path.join(self.tmp_data_path, 'Dockerfile')
+
+        cache = AnalysisCache()
+        license_analyzer = LicenseAnalyzer(SCANCODE_CLI_PATH, kind=SCANCODE_CLI, cache=cache)
+
+        with self.assertRaisesRegex(GraalError, 'Dockerfile'):
+            _ = list(license_analyzer.analyze([file_path, other_path]))
+
+        # the files without results are not cached
+        analysis = list(license_analyzer.analyze([other_path, file_path]))
+        self.assertListEqual(analysis, [{'path': other_path}, {'path': file_path}])
+
+        calls = mock_scancode.return_value.analyze.call_args_list
+        self.assertListEqual(calls[1][1]['file_paths'], [other_path])
+
 
 class TestCoLicCommand(unittest.TestCase):
     """CoLicCommand tests"""
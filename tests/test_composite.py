@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import unittest
+import unittest.mock
+
+from perceval.utils import DEFAULT_DATETIME
+
+from graal.graal import (GraalCommandArgumentParser,
+                         GraalError,
+                         GraalRepository,
+                         CHECKOUT_FULL,
+                         CHECKOUT_NONE,
+                         CHECKOUT_SPARSE)
+from graal.backends.core.cocom import (CoCom,
+                                       CATEGORY_COCOM_LIZARD_FILE,
+                                       CATEGORY_COCOM_LIZARD_REPOSITORY,
+                                       LINE_COUNTER_LIZARD)
+from graal.backends.core.composite import (CATEGORY_COMPOSITE,
+                                           Composite,
+                                           CompositeCommand,
+                                           parse_analysis)
+from graal.backends.core.coqua import (CoQua,
+                                       CATEGORY_COQUA_FLAKE8)
+from graal.backends.core.covuln import (CoVuln,
+                                        CATEGORY_COVULN)
+from base_repo import TestCaseRepo
+
+ANALYSES = [
+    'cocom:' + CATEGORY_COCOM_LIZARD_REPOSITORY + ':line_counter="lizard"',
+    'covuln:' + CATEGORY_COVULN,
+    'coqua:' + CATEGORY_COQUA_FLAKE8
+]
+
+
+class TestCompositeBackend(TestCaseRepo):
+    """Composite backend tests"""
+
+    def test_initialization(self):
+        """Test whether attributes are initializated"""
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path, analyses=ANALYSES,
+                       entrypoint='perceval', details=True, tag='test')
+        self.assertEqual(cp.uri, 'http://example.com')
+        self.assertEqual(cp.gitpath, self.git_path)
+        self.assertEqual(cp.worktreepath, os.path.join(self.worktree_path, os.path.split(cp.gitpath)[1]))
+        self.assertEqual(cp.origin, 'http://example.com')
+        self.assertEqual(cp.tag, 'test')
+        self.assertListEqual(cp.analyses, ANALYSES)
+        self.assertFalse(cp.split)
+
+        categories = [category for category, _ in cp.delegates]
+        self.assertListEqual(categories, [CATEGORY_COCOM_LIZARD_REPOSITORY, CATEGORY_COVULN, CATEGORY_COQUA_FLAKE8])
+
+        delegates = [delegate for _, delegate in cp.delegates]
+        self.assertIsInstance(delegates[0], CoCom)
+        self.assertIsInstance(delegates[1], CoVuln)
+        self.assertIsInstance(delegates[2], CoQua)
+        self.assertEqual(delegates[0].line_counter, LINE_COUNTER_LIZARD)
+
+        for delegate in delegates:
+            self.assertEqual(delegate.gitpath, self.git_path)
+            self.assertEqual(delegate.entrypoint, 'perceval')
+            self.assertTrue(delegate.details)
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path, analyses=ANALYSES,
+                       entrypoint='perceval', split=True)
+        self.assertTrue(cp.split)
+
+    def test_initialization_invalid(self):
+        """Test whether an exception is thrown when the analyses are not valid"""
+
+        invalid = [
+            [],
+            ['cocom'],
+            ['unknown:' + CATEGORY_COVULN],
+            ['composite:' + CATEGORY_COMPOSITE],
+            ['cocom:' + CATEGORY_COVULN],
+            ['cocom:' + CATEGORY_COCOM_LIZARD_FILE + ':colors=true'],
+            ['cocom:' + CATEGORY_COCOM_LIZARD_FILE + ':line_counter'],
+            ['covuln:' + CATEGORY_COVULN, 'covuln:' + CATEGORY_COVULN + ':details=true']
+        ]
+
+        for analyses in invalid:
+            with self.assertRaises(GraalError):
+                _ = Composite('http://example.com', self.git_path, self.worktree_path,
+                              analyses=analyses, entrypoint='perceval')
+
+    def test_parse_analysis(self):
+        """Test whether the specifications of the analyses are parsed"""
+
+        self.assertTupleEqual(parse_analysis('covuln:' + CATEGORY_COVULN), ('covuln', CATEGORY_COVULN, {}))
+
+        analysis = 'cocom:' + CATEGORY_COCOM_LIZARD_FILE + ':threads=2,by_file=true,exec_path=/usr/bin/cloc'
+        backend, category, params = parse_analysis(analysis)
+        self.assertEqual(backend, 'cocom')
+        self.assertEqual(category, CATEGORY_COCOM_LIZARD_FILE)
+        self.assertDictEqual(params, {'threads': 2, 'by_file': True, 'exec_path': '/usr/bin/cloc'})
+
+        with self.assertRaises(GraalError):
+            _ = parse_analysis(':' + CATEGORY_COVULN)
+
+    def test_checkout_modes(self):
+        """Test whether the checkout modes are the ones supported by all the analyses"""
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=['cocom:' + CATEGORY_COCOM_LIZARD_FILE])
+        self.assertListEqual(cp._checkout_modes(CATEGORY_COMPOSITE), [CHECKOUT_FULL, CHECKOUT_SPARSE, CHECKOUT_NONE])
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=['cocom:' + CATEGORY_COCOM_LIZARD_FILE, 'covuln:' + CATEGORY_COVULN],
+                       entrypoint='perceval')
+        self.assertListEqual(cp._checkout_modes(CATEGORY_COMPOSITE), [CHECKOUT_FULL])
+
+    def test_fetch(self):
+        """Test whether a single item with the results of all the analyses is returned for each commit"""
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=ANALYSES, entrypoint='perceval')
+        commits = [commit for commit in cp.fetch()]
+
+        self.assertEqual(len(commits), 6)
+        self.assertFalse(os.path.exists(cp.worktreepath))
+
+        cv = CoVuln('http://example.com', self.git_path, self.worktree_path, entrypoint='perceval')
+        expected = [commit['data']['analysis'] for commit in cv.fetch()]
+
+        for commit, vulns in zip(commits, expected):
+            self.assertEqual(commit['backend_name'], 'Composite')
+            self.assertEqual(commit['category'], CATEGORY_COMPOSITE)
+
+            analysis = commit['data']['analysis']
+            self.assertListEqual(list(analysis),
+                                 [CATEGORY_COCOM_LIZARD_REPOSITORY, CATEGORY_COVULN, CATEGORY_COQUA_FLAKE8])
+            self.assertDictEqual(analysis[CATEGORY_COVULN], vulns)
+            self.assertNotIn('refs', commit['data'])
+
+    def test_fetch_split(self):
+        """Test whether the items of each category are the ones returned by their backends"""
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=ANALYSES, entrypoint='perceval', split=True)
+
+        with unittest.mock.patch.object(GraalRepository, 'checkout', autospec=True,
+                                        side_effect=GraalRepository.checkout) as mock_checkout:
+            commits = [commit for commit in cp.fetch()]
+            # the working tree is checked out once per commit
+            self.assertEqual(mock_checkout.call_count, 6)
+
+        cc = CoCom('http://example.com', self.git_path, self.worktree_path, line_counter=LINE_COUNTER_LIZARD)
+        cv = CoVuln('http://example.com', self.git_path, self.worktree_path, entrypoint='perceval')
+        cq = CoQua('http://example.com', self.git_path, self.worktree_path, entrypoint='perceval')
+
+        expected = []
+        for items in zip(cc.fetch(category=CATEGORY_COCOM_LIZARD_REPOSITORY), cv.fetch(),
+                         cq.fetch(category=CATEGORY_COQUA_FLAKE8)):
+            expected.extend(items)
+
+        self.assertEqual(len(commits), 18)
+        for commit, item in zip(commits, expected):
+            commit.pop('timestamp')
+            item.pop('timestamp')
+            self.assertDictEqual(commit, item)
+
+    def test_fetch_filtered(self):
+        """Test whether the commits are skipped only when all the analyses filter them"""
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=['cocom:' + CATEGORY_COCOM_LIZARD_FILE + ':line_counter="lizard"'],
+                       in_paths=['perceval/backends/core/github.py'])
+        commits = [commit for commit in cp.fetch()]
+        self.assertEqual(len(commits), 1)
+
+        cp = Composite('http://example.com', self.git_path, self.worktree_path,
+                       analyses=['cocom:' + CATEGORY_COCOM_LIZARD_FILE + ':line_counter="lizard"',
+                                 'covuln:' + CATEGORY_COVULN],
+                       entrypoint='perceval', in_paths=['perceval/backends/core/github.py'], split=True)
+        commits = [commit for commit in cp.fetch()]
+
+        self.assertEqual(len(commits), 7)
+        self.assertEqual(len([c for c in commits if c['category'] == CATEGORY_COCOM_LIZARD_FILE]), 1)
+        self.assertEqual(len([c for c in commits if c['category'] == CATEGORY_COVULN]), 6)
+
+
+class TestCompositeCommand(unittest.TestCase):
+    """CompositeCommand tests"""
+
+    def test_backend_class(self):
+        """Test if the backend class is Composite"""
+
+        self.assertIs(CompositeCommand.BACKEND, Composite)
+
+    def test_setup_cmd_parser(self):
+        """Test setup_cmd_parser"""
+
+        parser = CompositeCommand.setup_cmd_parser()
+
+        self.assertIsInstance(parser, GraalCommandArgumentParser)
+        self.assertEqual(parser._backend, Composite)
+
+        args = ['http://example.com/',
+                '--git-path', '/tmp/gitpath',
+                '--tag', 'test',
+                '--from-date', '1970-01-01',
+                '--analyses', 'cocom:' + CATEGORY_COCOM_LIZARD_FILE, 'covuln:' + CATEGORY_COVULN,
+                '--split']
+
+        parsed_args = parser.parse(*args)
+        self.assertEqual(parsed_args.uri, 'http://example.com/')
+        self.assertEqual(parsed_args.git_path, '/tmp/gitpath')
+        self.assertEqual(parsed_args.tag, 'test')
+        self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
+        self.assertListEqual(parsed_args.analyses, ['cocom:' + CATEGORY_COCOM_LIZARD_FILE, 'covuln:' + CATEGORY_COVULN])
+        self.assertTrue(parsed_args.split)
+
+
+if __name__ == "__main__":
+    unittest.main()
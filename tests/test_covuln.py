@@ -96,6 +96,33 @@ class TestCoVulnBackend(TestCaseRepo):
         self.assertIn('high', result['by_confidence'])
         self.assertTrue(type(result['by_confidence']['high']), int)
 
+    def test_fetch_incremental(self):
+        """Test whether the incremental analysis returns the same results of the full one"""
+
+        cd = CoVuln('http://example.com', self.git_path, self.worktree_path, entrypoint="perceval", details=True)
+        expected = [commit for commit in cd.fetch()]
+
+        cd = CoVuln('http://example.com', self.git_path, self.worktree_path, entrypoint="perceval", details=True,
+                    incremental=True)
+        with unittest.mock.patch.object(Bandit, 'analyze', autospec=True, side_effect=Bandit.analyze) as mock_bandit:
+            commits = [commit for commit in cd.fetch()]
+
+            # the files of all directories are analyzed at the first commit, then
+            # only the ones of the directories changed by the 4th, 5th and 6th commit
+            analyzed = [len(call[1]['file_paths']) for call in mock_bandit.call_args_list]
+            self.assertListEqual(analyzed, [7, 1, 4, 5, 2, 4, 1])
+
+        self.assertEqual(len(commits), len(expected))
+        for commit, expected_commit in zip(commits, expected):
+            analysis = commit['data']['analysis']
+            expected_analysis = expected_commit['data']['analysis']
+
+            self.assertEqual(analysis['loc_analyzed'], expected_analysis['loc_analyzed'])
+            self.assertEqual(analysis['num_vulns'], expected_analysis['num_vulns'])
+            self.assertDictEqual(analysis['by_severity'], expected_analysis['by_severity'])
+            self.assertDictEqual(analysis['by_confidence'], expected_analysis['by_confidence'])
+            self.assertCountEqual(analysis['vulns'], expected_analysis['vulns'])
+
 
 class TestModuleAnalyzer(TestCaseAnalyzer):
     """ModuleAnalyzer tests"""
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from graal.deadletter import (DeadLetter,
+                              DeadLetterFile)
+from graal.stats import (STAGE_ANALYZE,
+                         STAGE_CHECKOUT)
+
+
+class TestDeadLetter(unittest.TestCase):
+    """DeadLetter tests"""
+
+    def test_to_dict(self):
+        """Test whether the failure is converted to a dict"""
+
+        dead_letter = DeadLetter('abc', STAGE_ANALYZE, ValueError('wrong value'), 'Traceback', 1.5)
+        self.assertDictEqual(dead_letter.to_dict(), {
+            'commit': 'abc',
+            'stage': 'analyze',
+            'error': 'ValueError',
+            'message': 'wrong value',
+            'traceback': 'Traceback',
+            'elapsed': 1.5
+        })
+
+        # dead letters can be sent by other processes
+        copy = pickle.loads(pickle.dumps(dead_letter))
+        self.assertDictEqual(copy.to_dict(), dead_letter.to_dict())
+
+
+class TestDeadLetterFile(unittest.TestCase):
+    """DeadLetterFile tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        self.file_path = os.path.join(self.tmp_path, 'dead_letters.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_add_load(self):
+        """Test whether the failures are stored and read"""
+
+        dead_letters = DeadLetterFile(self.file_path)
+        self.assertDictEqual(dead_letters.load(), {})
+
+        dead_letters.add(DeadLetter('abc', STAGE_CHECKOUT, ValueError('first'), '', 1))
+        dead_letters.add(DeadLetter('def', STAGE_ANALYZE, ValueError('second'), '', 2))
+
+        # the failures can be read while the file is open
+        self.assertListEqual(list(dead_letters.load().keys()), ['abc', 'def'])
+
+        dead_letters.add(DeadLetter('abc', STAGE_ANALYZE, ValueError('third'), '', 3))
+        dead_letters.close()
+
+        # only the last failure of each commit is kept
+        loaded = DeadLetterFile(self.file_path).load()
+        self.assertListEqual(list(loaded.keys()), ['abc', 'def'])
+        self.assertEqual(loaded['abc']['message'], 'third')
+        self.assertEqual(loaded['abc']['stage'], 'analyze')
+
+    def test_remove(self):
+        """Test whether the failures of a set of commits are removed"""
+
+        dead_letters = DeadLetterFile(self.file_path)
+        dead_letters.add(DeadLetter('abc', STAGE_CHECKOUT, ValueError('first'), '', 1))
+        dead_letters.add(DeadLetter('def', STAGE_ANALYZE, ValueError('second'), '', 2))
+        dead_letters.add(DeadLetter('abc', STAGE_ANALYZE, ValueError('third'), '', 3))
+
+        dead_letters.remove({'abc'})
+        self.assertListEqual(list(dead_letters.load().keys()), ['def'])
+
+        # new failures are appended after the removal
+        dead_letters.add(DeadLetter('ghi', STAGE_ANALYZE, ValueError('fourth'), '', 4))
+        self.assertListEqual(list(dead_letters.load().keys()), ['def', 'ghi'])
+        dead_letters.close()
+
+        with open(self.file_path) as fd:
+            self.assertEqual(len(fd.readlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
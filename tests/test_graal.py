@@ -22,8 +22,11 @@
 #
 
 import io
+import json
 import os
 import shutil
+import subprocess
+import sys
 import tarfile
 import tempfile
 import unittest
@@ -34,19 +37,32 @@ from perceval.errors import RepositoryError
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
 import graal
-from graal.graal import (DEFAULT_WORKTREE_PATH,
+from graal.graal import (BlobReader,
+                         CHECKPOINT_SUFFIX,
+                         CHECKOUT_FULL,
+                         CHECKOUT_NONE,
+                         CHECKOUT_SPARSE,
+                         DEFAULT_WORKTREE_PATH,
+                         DEFAULT_WORKERS,
                          CATEGORY_GRAAL,
                          GIT_EXEC_PATH,
                          Graal,
                          GraalCommand,
+                         GraalError,
                          GraalRepository,
                          GraalCommandArgumentParser,
+                         STALE_WORKTREE_SUFFIX,
                          logger)
+from graal.deadletter import DeadLetterFile
 from base_repo import TestCaseRepo
 
 
 CATEGORY_MOCKED = 'mocked'
 
+# The gateways must import graal and this module
+GATEWAY_PYTHONPATH = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(graal.graal.__file__))),
+                                      os.path.dirname(os.path.abspath(__file__))])
+
 
 class MockedGraalRepository(GraalRepository):
 
@@ -77,10 +93,14 @@ class MockedGraal(Graal):
 
     def __init__(self, uri, gitpath, worktreepath=DEFAULT_WORKTREE_PATH,
                  entrypoint=None, in_paths=None, out_paths=None, details=False,
-                 tag=None, archive=None, raise_exception=False):
+                 workers=DEFAULT_WORKERS, resume=False, dead_letters_path=None, retry_dead_letters=False,
+                 stats_path=None, timings=False, trace_path=None, gateways=None, tag=None, archive=None,
+                 raise_exception=False):
         super().__init__(uri, gitpath, worktreepath=worktreepath, entrypoint=entrypoint,
                          in_paths=in_paths, out_paths=out_paths, details=details,
-                         tag=tag, archive=archive)
+                         workers=workers, resume=resume, dead_letters_path=dead_letters_path,
+                         retry_dead_letters=retry_dead_letters, stats_path=stats_path, timings=timings,
+                         trace_path=trace_path, gateways=gateways, tag=tag, archive=archive)
         self.raise_exception = raise_exception
 
     def fetch(self, category=CATEGORY_MOCKED, paths=None,
@@ -188,6 +208,19 @@ class TestGraalBackend(TestCaseRepo):
         self.assertIsNone(graal.out_paths)
         self.assertFalse(graal.details)
         self.assertIsNone(graal.exec_path)
+        self.assertEqual(graal.workers, DEFAULT_WORKERS)
+        self.assertIsNone(graal.cache)
+        self.assertEqual(graal.checkout_mode, CHECKOUT_FULL)
+        self.assertFalse(graal.incremental)
+        self.assertFalse(graal.resume)
+        self.assertIsNone(graal.checkpoints)
+        self.assertIsNone(graal.dead_letters)
+        self.assertFalse(graal.retry_dead_letters)
+        self.assertIsNone(graal.stats_path)
+        self.assertFalse(graal.timings)
+        self.assertIsNone(graal.trace_path)
+        self.assertListEqual(graal.gateways, [])
+        self.assertFalse(graal.reuse_worktree)
 
         # When tag is empty or None it will be set to the value in uri
         graal = Graal('http://example.com', self.git_path, self.worktree_path)
@@ -272,6 +305,496 @@ class TestGraalBackend(TestCaseRepo):
         with self.assertRaises(Exception):
             _ = [commit for commit in mocked.fetch()]
 
+    def test_fetch_resume(self):
+        """Test whether the commits analyzed by a previous run are skipped"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path)
+        expected = [commit['data'] for commit in mocked.fetch()]
+
+        # no commit is recorded when the runs cannot be resumed
+        self.assertFalse(os.path.exists(self.git_path + CHECKPOINT_SUFFIX))
+
+        # the run is interrupted by an error at the fourth commit
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, details=True, resume=True)
+        self.assertEqual(mocked.checkpoints.path, self.git_path + CHECKPOINT_SUFFIX)
+        original_analyze = mocked._analyze
+
+        def analyze(commit):
+            if commit['commit'] == expected[3]['commit']:
+                raise Exception
+            return original_analyze(commit)
+
+        mocked._analyze = analyze
+
+        commits = []
+        with self.assertRaises(Exception):
+            for commit in mocked.fetch():
+                commits.append(commit['data'])
+        self.assertListEqual(commits, expected[:3])
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, details=True, resume=True)
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, expected[3:])
+
+        # all the commits were analyzed
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, [])
+
+        # the commits analyzed with other options are not skipped
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, resume=True)
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, expected)
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             in_paths=['perceval'], resume=True)
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, expected)
+
+    def test_fetch_resume_workers(self):
+        """Test whether the commits analyzed are skipped when the analysis runs in parallel"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, details=True)
+        expected = [commit['data'] for commit in mocked.fetch()]
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, resume=True)
+        commits = mocked.fetch()
+        _ = next(commits)
+        _ = next(commits)
+        commits.close()
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             in_paths=['perceval'], workers=2)
+        _ = [commit for commit in mocked.fetch()]
+
+        # only the first commit was consumed before closing the generator
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, workers=2, resume=True)
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, expected[1:])
+
+    def test_fetch_dead_letters(self):
+        """Test whether the commits whose analysis fails are stored in the dead letters"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path)
+        expected = [commit['data'] for commit in mocked.fetch()]
+
+        dead_letters_path = os.path.join(self.tmp_path, 'dead_letters.json')
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             details=True, dead_letters_path=dead_letters_path)
+        original_analyze = mocked._analyze
+
+        def analyze(commit):
+            if commit['commit'] in [expected[1]['commit'], expected[4]['commit']]:
+                raise GraalError(cause="analysis failed")
+            return original_analyze(commit)
+
+        mocked._analyze = analyze
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            commits = [commit['data'] for commit in mocked.fetch()]
+            self.assertRegex(cm.output[0], 'WARNING:graal.graal:Analysis failed at %s' % expected[1]['commit'])
+
+        self.assertListEqual(commits, [expected[0], expected[2], expected[3], expected[5]])
+        self.assertFalse(os.path.exists(mocked.worktreepath))
+
+        dead_letters = mocked.dead_letters.load()
+        self.assertListEqual(list(dead_letters.keys()), [expected[1]['commit'], expected[4]['commit']])
+
+        dead_letter = dead_letters[expected[1]['commit']]
+        self.assertEqual(dead_letter['stage'], 'analyze')
+        self.assertEqual(dead_letter['error'], 'GraalError')
+        self.assertEqual(dead_letter['message'], 'analysis failed')
+        self.assertIn('Traceback', dead_letter['traceback'])
+        self.assertGreaterEqual(dead_letter['elapsed'], 0)
+
+        # only the dead letters are retried, the ones analyzed are removed
+        mocked._analyze = lambda commit: analyze(commit) if commit['commit'] == expected[4]['commit'] \
+            else original_analyze(commit)
+        mocked.retry_dead_letters = True
+
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, [expected[1]])
+        self.assertListEqual(list(mocked.dead_letters.load().keys()), [expected[4]['commit']])
+
+        mocked._analyze = original_analyze
+        commits = [commit['data'] for commit in mocked.fetch()]
+        self.assertListEqual(commits, [expected[4]])
+        self.assertDictEqual(mocked.dead_letters.load(), {})
+
+    def test_fetch_dead_letters_workers(self):
+        """Test whether the failures of the commits analyzed in parallel are stored in the dead letters"""
+
+        dead_letters_path = os.path.join(self.tmp_path, 'dead_letters.json')
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, workers=2,
+                             dead_letters_path=dead_letters_path, raise_exception=True)
+        commits = [commit for commit in mocked.fetch()]
+        self.assertListEqual(commits, [])
+
+        dead_letters = mocked.dead_letters.load()
+        self.assertEqual(len(dead_letters), 6)
+        for dead_letter in dead_letters.values():
+            self.assertEqual(dead_letter['stage'], 'post')
+            self.assertEqual(dead_letter['error'], 'Exception')
+
+    def test_fetch_stats(self):
+        """Test whether the stats of the run are saved"""
+
+        stats_path = os.path.join(self.tmp_path, 'stats.json')
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, stats_path=stats_path)
+        commits = [commit for commit in mocked.fetch()]
+
+        self.assertEqual(len(commits), 6)
+        for commit in commits:
+            self.assertNotIn('timings', commit)
+
+        with open(stats_path) as fd:
+            stats = json.load(fd)
+
+        self.assertEqual(stats['backend_name'], 'MockedGraal')
+        self.assertEqual(stats['category'], CATEGORY_MOCKED)
+        self.assertEqual(stats['commits'], 6)
+        self.assertGreater(stats['wall'], 0)
+        self.assertListEqual(sorted(stats['rusage'].keys()), ['children', 'self'])
+
+        stages = stats['stages']
+        self.assertListEqual(sorted(stages.keys()),
+                             ['analyze', 'checkout', 'commit', 'git', 'log', 'metadata', 'output', 'post'])
+        for stage in ['analyze', 'checkout', 'commit', 'git', 'metadata', 'output', 'post']:
+            self.assertEqual(stages[stage]['count'], 6)
+        # the end of the log is read too
+        self.assertEqual(stages['log']['count'], 7)
+        self.assertGreater(stages['checkout']['children_cpu'], 0)
+
+    def test_fetch_timings(self):
+        """Test whether the stats of each commit are added to its item"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, timings=True)
+        commits = [commit for commit in mocked.fetch()]
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, workers=2, timings=True)
+        commits.extend([commit for commit in mocked.fetch()])
+
+        self.assertEqual(len(commits), 12)
+        for commit in commits:
+            self.assertListEqual(sorted(commit['timings'].keys()), ['analyze', 'checkout', 'commit', 'git', 'post'])
+            self.assertEqual(commit['timings']['checkout']['count'], 1)
+        self.assertDictEqual(mocked.commit_timings, {})
+
+    def test_fetch_trace(self):
+        """Test whether the spans of the analysis are saved in Chrome trace event format"""
+
+        for workers in [1, 2]:
+            trace_path = os.path.join(self.tmp_path, 'trace.json')
+            mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                                 workers=workers, trace_path=trace_path)
+            commits = [commit for commit in mocked.fetch()]
+            self.assertEqual(len(commits), 6)
+            self.assertNotIn('timings', commits[0])
+
+            with open(trace_path) as fd:
+                events = json.load(fd)
+
+            self.assertDictEqual(events[0], {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                                             'args': {'name': 'graal MockedGraal'}})
+
+            spans = [event for event in events[1:] if event['name'] == 'commit']
+            self.assertListEqual([span['args']['commit'] for span in spans],
+                                 [commit['data']['commit'] for commit in commits])
+
+            names = {event['name'] for event in events[1:]}
+            self.assertSetEqual(names, {'analyze', 'checkout', 'commit', 'git', 'log', 'metadata', 'output', 'post'})
+
+            for event in events[1:]:
+                self.assertEqual(event['ph'], 'X')
+                self.assertGreaterEqual(event['dur'], 0)
+
+            # the checkouts are traced within their commits
+            checkouts = [event for event in events if event['name'] == 'checkout']
+            for span, checkout in zip(spans, checkouts):
+                self.assertEqual(span['pid'], checkout['pid'])
+                self.assertGreaterEqual(checkout['ts'], span['ts'])
+                self.assertLessEqual(checkout['ts'] + checkout['dur'], span['ts'] + span['dur'] + 1)
+
+            git = [event for event in events if event['name'] == 'git']
+            self.assertEqual(git[0]['args']['command'], 'checkout -f')
+
+            if workers > 1:
+                self.assertNotIn(os.getpid(), {span['pid'] for span in spans})
+
+    def test_initialization_retry_no_dead_letters(self):
+        """Test whether an exception is thrown when the dead letters to retry are not set"""
+
+        with self.assertRaises(GraalError):
+            _ = Graal('http://example.com', self.git_path, self.worktree_path, retry_dead_letters=True)
+
+    def test_initialization_invalid_workers(self):
+        """Test whether an exception is thrown when the number of workers is not valid"""
+
+        with self.assertRaises(GraalError):
+            _ = Graal('http://example.com', self.git_path, self.worktree_path, workers=0)
+
+    def test_initialization_gateways_and_workers(self):
+        """Test whether an exception is thrown when both workers and gateways are set"""
+
+        with self.assertRaises(GraalError):
+            _ = Graal('http://example.com', self.git_path, self.worktree_path, workers=2, gateways=['popen'])
+
+    def test_initialization_invalid_checkout_mode(self):
+        """Test whether an exception is thrown when the checkout mode is not valid"""
+
+        with self.assertRaises(GraalError):
+            _ = Graal('http://example.com', self.git_path, self.worktree_path, checkout_mode='partial')
+
+    def test_fetch_checkout_mode_not_supported(self):
+        """Test whether an exception is thrown when the checkout mode is not supported by the category"""
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path, checkout_mode=CHECKOUT_NONE)
+
+        with self.assertRaises(GraalError):
+            _ = graal.fetch()
+
+    def test_fetch_incremental_not_supported(self):
+        """Test whether an exception is thrown when the category does not support the incremental analysis"""
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path, incremental=True)
+
+        with self.assertRaises(GraalError):
+            _ = graal.fetch()
+
+    def test_sparse_paths(self):
+        """Test whether the paths to check out are the ones of the commit"""
+
+        commit = {
+            'files': [
+                {'file': 'perceval/backends/core/graal.py', 'newfile': 'perceval/backends/graal.py'},
+                {'file': 'tests/test_graal.py'},
+                {'file': 'README.md'}
+            ]
+        }
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+        self.assertListEqual(graal._sparse_paths(commit),
+                             ['perceval/backends/core/graal.py', 'perceval/backends/graal.py',
+                              'tests/test_graal.py', 'README.md'])
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path, in_paths=['.py'])
+        self.assertListEqual(graal._sparse_paths(commit),
+                             ['perceval/backends/core/graal.py', 'perceval/backends/graal.py',
+                              'tests/test_graal.py'])
+
+        commit = {'files': []}
+        self.assertListEqual(graal._sparse_paths(commit), [])
+
+    def test_analyze_tree(self):
+        """Test whether the results of identical trees are reused"""
+
+        analyze = unittest.mock.Mock(return_value={'lines': 10})
+        analyzer = unittest.mock.Mock(version='0.1.0')
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+        graal.graalRepo = GraalRepository('http://example.com', self.git_path)
+
+        commit = {'commit': '825b4da7ca740f7f2abbae1b3402908a44d130cd'}
+        self.assertDictEqual(graal._analyze_tree(commit, analyze, [analyzer]), {'lines': 10})
+        self.assertDictEqual(graal._analyze_tree(commit, analyze, [analyzer]), {'lines': 10})
+        self.assertEqual(analyze.call_count, 2)
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path, cache_path=':memory:')
+        graal.graalRepo = GraalRepository('http://example.com', self.git_path)
+
+        self.assertDictEqual(graal._analyze_tree(commit, analyze, [analyzer]), {'lines': 10})
+        self.assertEqual(analyze.call_count, 3)
+
+        # the last commit has the same tree of 825b4da
+        commit = {'commit': '68d0757b40c7037356bc94bf2e6b49c131a7e8a8'}
+        self.assertDictEqual(graal._analyze_tree(commit, analyze, [analyzer]), {'lines': 10})
+        self.assertEqual(analyze.call_count, 3)
+
+        _ = graal._analyze_tree(commit, analyze, [analyzer], options=['details'])
+        self.assertEqual(analyze.call_count, 4)
+
+        analyzer.version = '0.2.0'
+        _ = graal._analyze_tree(commit, analyze, [analyzer])
+        self.assertEqual(analyze.call_count, 5)
+
+        # the subtree `perceval` did not change between 075f0c6 and 825b4da
+        commit = {'commit': '075f0c6161db5a3b1c8eca45e08b88469bb148b9'}
+        _ = graal._analyze_tree(commit, analyze, [analyzer], path='perceval')
+        self.assertEqual(analyze.call_count, 6)
+
+        commit = {'commit': '825b4da7ca740f7f2abbae1b3402908a44d130cd'}
+        _ = graal._analyze_tree(commit, analyze, [analyzer], path='perceval')
+        self.assertEqual(analyze.call_count, 6)
+
+        commit = {'commit': 'aa57404bbfcd4c7e4d1f93308cf9299524394adb'}
+        _ = graal._analyze_tree(commit, analyze, [analyzer], path='perceval')
+        self.assertEqual(analyze.call_count, 7)
+
+        # paths not found are always analyzed
+        _ = graal._analyze_tree(commit, analyze, [analyzer], path='tests')
+        _ = graal._analyze_tree(commit, analyze, [analyzer], path='tests')
+        self.assertEqual(analyze.call_count, 9)
+
+    def test_fetch_analysis_workers(self):
+        """Test whether commits analyzed in parallel are returned in order"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path)
+        expected = [commit['data'] for commit in mocked.fetch()]
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path, workers=3)
+        commits = [commit['data'] for commit in mocked.fetch()]
+
+        self.assertEqual(len(commits), 6)
+        self.assertListEqual(commits, expected)
+        self.assertFalse(os.path.exists(mocked.worktreepath))
+        self.assertFalse(os.path.exists(mocked.worktreepath + '-1'))
+        self.assertFalse(os.path.exists(mocked.worktreepath + '-2'))
+
+    def test_fetch_reuse_worktree(self):
+        """Test whether the working tree is kept and reused by the next runs"""
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path, reuse_worktree=True)
+
+        with unittest.mock.patch.object(GraalRepository, 'worktree', autospec=True,
+                                        side_effect=GraalRepository.worktree) as mock_worktree:
+            commits = [commit for commit in graal.fetch()]
+            self.assertEqual(len(commits), 6)
+            self.assertTrue(os.path.exists(graal.worktreepath))
+
+            commits = [commit for commit in graal.fetch()]
+            self.assertEqual(len(commits), 6)
+            self.assertEqual(mock_worktree.call_count, 1)
+
+            # the working tree is no longer registered in the mirror, so it is replaced
+            shutil.rmtree(os.path.join(self.git_path, 'worktrees'))
+            commits = [commit for commit in graal.fetch()]
+            self.assertEqual(len(commits), 6)
+            self.assertEqual(mock_worktree.call_count, 2)
+
+        GraalRepository.wait_for_deletions()
+        self.assertListEqual(os.listdir(self.worktree_path), ['graaltest'])
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+        commits = [commit for commit in graal.fetch()]
+        self.assertEqual(len(commits), 6)
+
+        GraalRepository.wait_for_deletions()
+        self.assertListEqual(os.listdir(self.worktree_path), [])
+
+    def test_fetch_stale_worktrees(self):
+        """Test whether the stale working trees are deleted in background"""
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+        repo = GraalRepository('http://example.com', self.git_path)
+        repo.worktree(graal.worktreepath)
+
+        stale_path = graal.worktreepath + STALE_WORKTREE_SUFFIX + 'interrupted'
+        os.makedirs(os.path.join(stale_path, 'graaltest'))
+
+        with unittest.mock.patch.object(GraalRepository, 'delete_in_background', autospec=True,
+                                        side_effect=GraalRepository.delete_in_background) as mock_delete:
+            commits = [commit for commit in graal.fetch()]
+            self.assertEqual(len(commits), 6)
+
+            deleted = [call.args[0] for call in mock_delete.call_args_list]
+            self.assertListEqual(deleted, [stale_path, graal.worktreepath])
+
+        GraalRepository.wait_for_deletions()
+        self.assertListEqual(os.listdir(self.worktree_path), [])
+
+    def test_fetch_no_wait_for_deletions(self):
+        """Test whether the fetch does not wait for the working trees deleted in background"""
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+
+        with unittest.mock.patch.object(GraalRepository, 'wait_for_deletions') as mock_wait:
+            commits = [commit for commit in graal.fetch()]
+            self.assertEqual(len(commits), 6)
+            self.assertEqual(mock_wait.call_count, 0)
+
+        self.assertFalse(os.path.exists(graal.worktreepath))
+        GraalRepository.wait_for_deletions()
+        self.assertListEqual(os.listdir(self.worktree_path), [])
+
+    def test_fetch_analysis_workers_on_error(self):
+        """Test whether an exception raised in a worker is propagated"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             workers=2, raise_exception=True)
+
+        with self.assertLogs(logger, level='ERROR') as cm:
+            with self.assertRaises(Exception):
+                _ = [commit for commit in mocked.fetch()]
+            self.assertRegex(cm.output[0], 'ERROR:graal.graal:Analysis failed at')
+
+    @unittest.mock.patch.dict(os.environ, {'PYTHONPATH': GATEWAY_PYTHONPATH})
+    def test_fetch_analysis_gateways(self):
+        """Test whether commits analyzed on execnet gateways are returned in order"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path)
+        expected = [commit['data'] for commit in mocked.fetch()]
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             gateways=['popen', 'popen'])
+        with unittest.mock.patch.object(GraalRepository, 'worktree', autospec=True,
+                                        side_effect=GraalRepository.worktree) as mock_worktree:
+            commits = [commit['data'] for commit in mocked.fetch()]
+            # the working trees are only created by the gateways
+            self.assertEqual(mock_worktree.call_count, 0)
+
+        self.assertEqual(len(commits), 6)
+        self.assertListEqual(commits, expected)
+        self.assertFalse(os.path.exists(mocked.worktreepath))
+        self.assertFalse(os.path.exists(mocked.worktreepath + '-gw0'))
+        self.assertFalse(os.path.exists(mocked.worktreepath + '-gw1'))
+
+    def test_open_worktree_update(self):
+        """Test whether the mirror is updated before creating the working tree of a gateway"""
+
+        origin_path = os.path.join(self.tmp_repo_path, 'graaltest')
+        new_commit = subprocess.check_output(['git', '-c', 'user.name=graal', '-c', 'user.email=graal@example.com',
+                                              'commit-tree', 'HEAD^{tree}', '-p', 'HEAD', '-m', 'new'],
+                                             cwd=origin_path).decode('utf-8').strip()
+        subprocess.check_call(['git', 'update-ref', 'refs/heads/master', new_commit], cwd=origin_path)
+
+        graal = Graal('http://example.com', self.git_path, self.worktree_path)
+        graal._open_worktree('-gw0', update=True)
+        graal.graalRepo.checkout(new_commit)
+        graal._close_worktree()
+
+        self.assertFalse(os.path.exists(graal.worktreepath))
+
+    @unittest.mock.patch.dict(os.environ, {'PYTHONPATH': GATEWAY_PYTHONPATH})
+    def test_fetch_analysis_gateways_on_error(self):
+        """Test whether an exception raised on a gateway is propagated"""
+
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             gateways=['popen'], raise_exception=True)
+
+        with self.assertLogs(logger, level='ERROR') as cm:
+            with self.assertRaises(GraalError):
+                _ = [commit for commit in mocked.fetch()]
+            self.assertRegex(cm.output[0], 'ERROR:graal.graal:Analysis failed at')
+
+    @unittest.mock.patch.dict(os.environ, {'PYTHONPATH': GATEWAY_PYTHONPATH})
+    def test_fetch_dead_letters_gateways(self):
+        """Test whether the commits whose analysis fails on a gateway are stored in the dead letters"""
+
+        dead_letters_path = os.path.join(self.tmp_path, 'dead_letters.json')
+        mocked = MockedGraal('http://example.com', self.git_path, self.worktree_path,
+                             dead_letters_path=dead_letters_path, stats_path=os.path.join(self.tmp_path, 'stats.json'),
+                             gateways=['popen', 'popen'], raise_exception=True)
+
+        with self.assertLogs(logger, level='WARNING'):
+            commits = [commit for commit in mocked.fetch()]
+        self.assertListEqual(commits, [])
+
+        dead_letters = DeadLetterFile(dead_letters_path)
+        self.assertEqual(len(dead_letters.load()), 6)
+
+        with open(os.path.join(self.tmp_path, 'stats.json')) as fd:
+            stats = json.load(fd)
+        self.assertEqual(stats['stages']['post']['count'], 6)
+
 
 class TestGraalRepository(TestCaseRepo):
     """GraalRepository tests"""
@@ -381,6 +904,67 @@ class TestGraalRepository(TestCaseRepo):
         repo.prune()
         self.assertFalse(os.path.exists(repo.worktreepath))
 
+    def test_prune_background(self):
+        """Test whether a working tree is deleted in background"""
+
+        new_path = os.path.join(self.tmp_path, 'testworktree')
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        repo.worktree(new_path)
+
+        repo.prune(background=True)
+        self.assertFalse(os.path.exists(repo.worktreepath))
+
+        # the working tree is no longer registered, thus it can be created again
+        repo.worktree(new_path)
+        self.assertTrue(repo.valid_worktree())
+
+        GraalRepository.wait_for_deletions()
+        worktrees = [name for name in os.listdir(self.tmp_path) if name.startswith('testworktree')]
+        self.assertListEqual(worktrees, ['testworktree'])
+
+        repo.prune()
+
+    def test_valid_worktree(self):
+        """Test whether the working trees which can be reused are detected"""
+
+        new_path = os.path.join(self.tmp_path, 'testworktree')
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        repo.worktree(new_path)
+        self.assertTrue(repo.valid_worktree())
+        self.assertTrue(repo.valid_worktree(sparse=True))
+
+        repo.sparse_checkout('075f0c6161db5a3b1c8eca45e08b88469bb148b9', ['perceval/_version.py'])
+        self.assertFalse(repo.valid_worktree())
+        self.assertTrue(repo.valid_worktree(sparse=True))
+
+        shutil.rmtree(os.path.join(self.git_path, 'worktrees'))
+        self.assertFalse(repo.valid_worktree(sparse=True))
+
+        repo.prune()
+
+    def test_delete_in_background(self):
+        """Test whether directories are moved aside and deleted by a thread"""
+
+        target_path = os.path.join(self.tmp_path, 'target')
+        os.makedirs(os.path.join(target_path, 'nested'))
+
+        thread = GraalRepository.delete_in_background(target_path)
+        self.assertFalse(os.path.exists(target_path))
+
+        thread.join()
+        stale = [name for name in os.listdir(self.tmp_path) if name.startswith('target')]
+        self.assertListEqual(stale, [])
+
+        stale_path = target_path + STALE_WORKTREE_SUFFIX + 'interrupted'
+        os.makedirs(stale_path)
+
+        thread = GraalRepository.delete_in_background(stale_path)
+        GraalRepository.wait_for_deletions()
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(stale_path))
+
     def test_prune_on_error(self):
         """Test whether a RepositoryError is thrown in case of error"""
 
@@ -419,6 +1003,126 @@ class TestGraalRepository(TestCaseRepo):
         with self.assertRaises(RepositoryError):
             repo.checkout("825b4da7ca740f7f2abbae1b3402908a44d130cd")
 
+    def test_sparse_checkout(self):
+        """Test whether only the target files are checked out"""
+
+        new_path = os.path.join(self.tmp_path, 'testworktree')
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        repo.worktree(new_path, sparse=True)
+        self.assertListEqual(GraalRepository.files(new_path), [])
+
+        repo.sparse_checkout("825b4da7ca740f7f2abbae1b3402908a44d130cd",
+                             ['perceval/_version.py', '.gitattributes', 'perceval/unknown.py'])
+        self.assertListEqual(GraalRepository.files(new_path), [os.path.join(new_path, 'perceval/_version.py')])
+        self.assertTrue(os.path.exists(os.path.join(new_path, '.gitattributes')))
+
+        repo.sparse_checkout("aa57404bbfcd4c7e4d1f93308cf9299524394adb",
+                             ['perceval/backends/core/graal.py'])
+        self.assertListEqual(GraalRepository.files(new_path),
+                             [os.path.join(new_path, 'perceval/backends/core/graal.py')])
+        self.assertFalse(os.path.exists(os.path.join(new_path, '.gitattributes')))
+
+        repo.sparse_checkout("825b4da7ca740f7f2abbae1b3402908a44d130cd", [])
+        self.assertListEqual(GraalRepository.files(new_path), [])
+
+        repo.prune()
+        self.assertFalse(os.path.exists(repo.worktreepath))
+
+    def test_sparse_checkout_on_error(self):
+        """Test whether a RepositoryError is thrown in case of error"""
+
+        repo = MockedGraalRepository('http://example.git', self.git_path, raise_exception=True)
+        with self.assertRaises(RepositoryError):
+            repo.sparse_checkout("825b4da7ca740f7f2abbae1b3402908a44d130cd", ['perceval/_version.py'])
+
+    def test_sparse_pattern(self):
+        """Test whether file paths are converted to sparse-checkout patterns"""
+
+        self.assertEqual(GraalRepository.sparse_pattern('perceval/_version.py'), '/perceval/_version.py')
+        self.assertEqual(GraalRepository.sparse_pattern('data/f[1]*?.txt'), '/data/f\\[1]\\*\\?.txt')
+        self.assertEqual(GraalRepository.sparse_pattern('a\\b '), '/a\\\\b\\ ')
+
+    def test_read_blob(self):
+        """Test whether files are read from the mirror at a given commit"""
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        self.assertIsNone(repo.blob_reader)
+
+        content = repo.read_blob("825b4da7ca740f7f2abbae1b3402908a44d130cd", "perceval/_version.py")
+        self.assertEqual(content, b'# Versions compliant with PEP 440 https://www.python.org/dev/peps/pep-0440\n'
+                                  b'__version__ = "0.10.2"\n')
+        self.assertIsInstance(repo.blob_reader, BlobReader)
+
+        content = repo.read_blob("825b4da7ca740f7f2abbae1b3402908a44d130cd", ".gitattributes")
+        self.assertEqual(content, b'tests/data/* linguist-vendored\n')
+
+        # the file was added in a later commit
+        content = repo.read_blob("4f3b403d47fb291a9a942a62d62c24faa79244c8", ".gitattributes")
+        self.assertIsNone(content)
+
+        # directories are not files
+        content = repo.read_blob("825b4da7ca740f7f2abbae1b3402908a44d130cd", "perceval")
+        self.assertIsNone(content)
+
+        content = repo.read_blob("0000000000000000000000000000000000000000", ".gitattributes")
+        self.assertIsNone(content)
+
+        repo.close()
+        self.assertIsNone(repo.blob_reader)
+
+    def test_ls_tree(self):
+        """Test whether the files of a commit are listed from the mirror"""
+
+        repo = GraalRepository('http://example.git', self.git_path)
+
+        files = repo.ls_tree("825b4da7ca740f7f2abbae1b3402908a44d130cd")
+        self.assertEqual(len(files), 15)
+        self.assertIn('.gitattributes', files)
+        self.assertIn('perceval/_version.py', files)
+        self.assertNotIn('perceval', files)
+
+        content = repo.read_blob("825b4da7ca740f7f2abbae1b3402908a44d130cd", "perceval/_version.py")
+        self.assertEqual(files['perceval/_version.py'], GraalRepository.blob_hash(None, content))
+
+        files = repo.ls_tree("075f0c6161db5a3b1c8eca45e08b88469bb148b9")
+        self.assertEqual(len(files), 12)
+        self.assertNotIn('.gitattributes', files)
+
+        with self.assertRaises(RepositoryError):
+            repo.ls_tree("0000000000000000000000000000000000000000")
+
+    def test_tree_hash(self):
+        """Test whether the hashes of the trees of a commit are returned"""
+
+        repo = GraalRepository('http://example.git', self.git_path)
+
+        tree_hash = repo.tree_hash("825b4da7ca740f7f2abbae1b3402908a44d130cd")
+        self.assertEqual(tree_hash, "b4a6139e190cabe6e4ee0d9fd75edde0b9fb1e0a")
+
+        tree_hash = repo.tree_hash("68d0757b40c7037356bc94bf2e6b49c131a7e8a8")
+        self.assertEqual(tree_hash, "b4a6139e190cabe6e4ee0d9fd75edde0b9fb1e0a")
+
+        for path in ['perceval', 'perceval/', './perceval', '/perceval']:
+            tree_hash = repo.tree_hash("825b4da7ca740f7f2abbae1b3402908a44d130cd", path)
+            self.assertEqual(tree_hash, "138568537a1bbfe00f3f0a433cd3167e7f8fff07")
+
+        tree_hash = repo.tree_hash("aa57404bbfcd4c7e4d1f93308cf9299524394adb", "perceval")
+        self.assertEqual(tree_hash, "811c78e66e710adf9a2c6a2ad80d074830932159")
+
+        self.assertIsNone(repo.tree_hash("825b4da7ca740f7f2abbae1b3402908a44d130cd", "tests"))
+        self.assertIsNone(repo.tree_hash("0000000000000000000000000000000000000000"))
+
+    def test_blob_reader_closed(self):
+        """Test whether an exception is thrown when the reader has been closed"""
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        reader = BlobReader(repo.dirpath, env=repo.gitenv)
+        reader.close()
+
+        with self.assertRaises(RepositoryError):
+            reader.read("825b4da7ca740f7f2abbae1b3402908a44d130cd", ".gitattributes")
+
     def test_archive(self):
         """Test whether a Git archive command is correctly executed"""
 
@@ -523,6 +1227,19 @@ class TestGraalRepository(TestCaseRepo):
         self.assertEqual(GraalRepository.extension('tests/requirements.txt'), 'txt')
         self.assertEqual(GraalRepository.extension('LICENSE'), 'LICENSE')
 
+    def test_blob_hash(self):
+        """Test whether the hash of a file is the one calculated by Git"""
+
+        file_path = os.path.join(self.tmp_path, 'blob.txt')
+        with open(file_path, 'w') as fd:
+            fd.write('graal\n')
+
+        repo = GraalRepository('http://example.git', self.git_path)
+        expected = repo._exec([GIT_EXEC_PATH, 'hash-object', file_path],
+                              cwd=self.tmp_path, env=repo.gitenv).decode('utf-8').strip()
+
+        self.assertEqual(GraalRepository.blob_hash(file_path), expected)
+
     def test_files(self):
         """Test whether all files in a directory and its sub-directories are shown"""
 
@@ -629,6 +1346,15 @@ class TestGraalCommand(unittest.TestCase):
         cmd = MockedGraalCommand(*args)
         self.assertEqual(cmd.parsed_args.git_path, '/tmp/gitpath')
 
+    @unittest.mock.patch('os.path.expanduser')
+    def test_default_git_path(self, mock_expanduser):
+        """Test whether the default path of the mirror is built from the backend and the URI"""
+
+        mock_expanduser.side_effect = lambda path: path.replace('~', self.tmp_path)
+
+        git_path = MockedGraalCommand.default_git_path('/tmp/repo')
+        self.assertEqual(git_path, os.path.join(self.tmp_path, '.graal/repositories/MockedGraal/tmp/repo-git'))
+
     def test_setup_cmd_parser(self):
         """Test if it parser object is correctly initialized"""
 
@@ -652,6 +1378,18 @@ class TestGraalCommand(unittest.TestCase):
         self.assertEqual(parsed_args.out_paths, None)
         self.assertEqual(parsed_args.entrypoint, None)
         self.assertFalse(parsed_args.details)
+        self.assertEqual(parsed_args.workers, DEFAULT_WORKERS)
+        self.assertIsNone(parsed_args.cache_path)
+        self.assertEqual(parsed_args.checkout_mode, CHECKOUT_FULL)
+        self.assertFalse(parsed_args.incremental)
+        self.assertFalse(parsed_args.resume)
+        self.assertIsNone(parsed_args.dead_letters_path)
+        self.assertFalse(parsed_args.retry_dead_letters)
+        self.assertIsNone(parsed_args.stats_path)
+        self.assertFalse(parsed_args.timings)
+        self.assertIsNone(parsed_args.trace_path)
+        self.assertIsNone(parsed_args.gateways)
+        self.assertFalse(parsed_args.reuse_worktree)
         self.assertEqual(parser._backend, Graal)
 
         args = ['http://example.com/',
@@ -665,7 +1403,20 @@ class TestGraalCommand(unittest.TestCase):
                 '--in-paths', '*.py', '*.java',
                 '--out-paths', '*.c',
                 '--entrypoint', 'module',
-                '--details']
+                '--details',
+                '--workers', '4',
+                '--cache-path', '/tmp/cache.db',
+                '--checkout-mode', 'sparse',
+                '--incremental',
+                '--resume',
+                '--dead-letters-path', '/tmp/dead_letters.json',
+                '--retry-dead-letters',
+                '--stats', '/tmp/stats.json',
+                '--timings',
+                '--trace', '/tmp/trace.json',
+                '--gateway', 'popen',
+                '--gateway', 'ssh=graal@example.com',
+                '--reuse-worktree']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.uri, 'http://example.com/')
@@ -680,6 +1431,18 @@ class TestGraalCommand(unittest.TestCase):
         self.assertEqual(parsed_args.out_paths, ['*.c'])
         self.assertEqual(parsed_args.entrypoint, 'module')
         self.assertTrue(parsed_args.details)
+        self.assertEqual(parsed_args.workers, 4)
+        self.assertEqual(parsed_args.cache_path, '/tmp/cache.db')
+        self.assertEqual(parsed_args.checkout_mode, CHECKOUT_SPARSE)
+        self.assertTrue(parsed_args.incremental)
+        self.assertTrue(parsed_args.resume)
+        self.assertEqual(parsed_args.dead_letters_path, '/tmp/dead_letters.json')
+        self.assertTrue(parsed_args.retry_dead_letters)
+        self.assertEqual(parsed_args.stats_path, '/tmp/stats.json')
+        self.assertTrue(parsed_args.timings)
+        self.assertEqual(parsed_args.trace_path, '/tmp/trace.json')
+        self.assertListEqual(parsed_args.gateways, ['popen', 'ssh=graal@example.com'])
+        self.assertTrue(parsed_args.reuse_worktree)
 
         parser = GraalCommand.setup_cmd_parser(Graal)
         self.assertIsInstance(parser, GraalCommandArgumentParser)
@@ -714,6 +1477,30 @@ class TesGraalFunctions(unittest.TestCase):
         for b in backends.keys():
             self.assertTrue(issubclass(backends.get(b), Graal))
 
+    def test_find_backend(self):
+        """Test whether a backend is found by name"""
+
+        import graal.backends
+        from graal.backends.core.cocom import CoCom, CoComCommand
+
+        backend, command = graal.graal.find_backend(graal.backends, 'cocom')
+        self.assertEqual(backend, CoCom)
+        self.assertEqual(command, CoComCommand)
+
+        backend, command = graal.graal.find_backend(graal.backends, 'unknown')
+        self.assertIsNone(backend)
+        self.assertIsNone(command)
+
+    def test_find_backend_imports(self):
+        """Test whether only the module of the backend found and its light dependencies are imported"""
+
+        code = "import sys, graal.graal, graal.backends; " \
+               "graal.graal.find_backend(graal.backends, 'cocom'); " \
+               "print(sorted(m for m in ['graal.backends.core.codep', 'lizard', 'networkx', 'execnet'] if m in sys.modules))"
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(graal.graal.__file__)))
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=cwd).decode('utf-8')
+        self.assertEqual(output.strip(), '[]')
+
 
 class TestFetch(TestCaseRepo):
     """Unit tests for fetch function"""
@@ -733,25 +1520,82 @@ class TestFetch(TestCaseRepo):
         self.assertEqual(len(items), 6)
         for i in items:
             self.assertEqual(i['category'], CATEGORY_MOCKED)
+            self.assertNotIn('branches', i['data'])
+
+    def test_items_branch(self):
+        """Test whether the branch is added to the items when a single branch is fetched"""
+
+        args = {
+            'uri': 'http://example.com/',
+            'gitpath': self.git_path,
+            'worktreepath': self.worktree_path,
+            'tag': 'test',
+            'branches': ['master']
+        }
+
+        items = graal.graal.fetch(CommandBackend, args, CATEGORY_MOCKED)
+        items = [item for item in items]
+
+        self.assertEqual(len(items), 6)
+        for i in items:
+            self.assertListEqual(i['data']['branches'], ['master'])
 
     def test_items_multiple_branches(self):
-        """Test whether the working tree is created from the first branch in `branches`"""
+        """Test whether the commits shared by several branches are analyzed once"""
+
+        # v1 is behind master, while v2 has a commit which is not in master
+        origin_path = os.path.join(self.tmp_repo_path, 'graaltest')
+        subprocess.check_call(['git', 'branch', 'v1', '4f3b403'], cwd=origin_path)
+        v2_commit = subprocess.check_output(['git', '-c', 'user.name=graal', '-c', 'user.email=graal@example.com',
+                                             'commit-tree', '825b4da^{tree}', '-p', '825b4da', '-m', 'v2'],
+                                            cwd=origin_path).decode('utf-8').strip()
+        subprocess.check_call(['git', 'branch', 'v2', v2_commit], cwd=origin_path)
 
         args = {
             'uri': 'http://example.com/',
             'gitpath': self.git_path,
+            'worktreepath': self.worktree_path,
             'tag': 'test',
             'branches': ['master', 'v1', 'v2']
         }
 
-        with self.assertLogs(logger, level='WARNING') as cm:
+        worktrees = {}
+
+        def record_checkout(repo, hash):
+            worktrees[hash] = repo.worktreepath
+            return checkout(repo, hash)
+
+        checkout = GraalRepository.checkout
+        with unittest.mock.patch.object(GraalRepository, 'checkout', autospec=True, side_effect=record_checkout):
             items = graal.graal.fetch(CommandBackend, args, CATEGORY_MOCKED)
             items = [item for item in items]
-            self.assertEqual(cm.output[0], 'WARNING:graal.graal:Only the branch master will be analyzed')
 
-        self.assertEqual(len(items), 6)
-        for i in items:
-            self.assertEqual(i['category'], CATEGORY_MOCKED)
+        expected = [
+            ('075f0c6', ['master', 'v1', 'v2']),
+            ('4f3b403', ['master', 'v1', 'v2']),
+            ('825b4da', ['master', 'v2']),
+            ('aa57404', ['master']),
+            ('d256c97', ['master']),
+            ('68d0757', ['master']),
+            (v2_commit[:7], ['v2'])
+        ]
+
+        self.assertEqual(len(items), len(expected))
+        for item, (hash, branches) in zip(items, expected):
+            self.assertEqual(item['category'], CATEGORY_MOCKED)
+            self.assertEqual(item['data']['commit'][:7], hash)
+            self.assertListEqual(item['data']['branches'], branches)
+
+        # the commits are checked out in the working tree of their first branch
+        worktree_path = os.path.join(self.worktree_path, 'graaltest')
+        self.assertEqual(len(worktrees), len(expected))
+        for hash, path in worktrees.items():
+            if hash == v2_commit:
+                self.assertEqual(path, worktree_path + '-br2')
+            else:
+                self.assertEqual(path, worktree_path)
+
+        self.assertListEqual(os.listdir(self.worktree_path), [])
 
     def test_items_no_category(self):
         """Test whether a set of items is returned"""
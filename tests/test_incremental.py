@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import unittest
+
+from graal.graal import GraalRepository
+from graal.incremental import (SubtreeAnalyzer,
+                               merge_analyses)
+from base_repo import TestCaseRepo
+
+
+COMMITS = [
+    '075f0c6161db5a3b1c8eca45e08b88469bb148b9',
+    '4f3b403d47fb291a9a942a62d62c24faa79244c8',
+    '825b4da7ca740f7f2abbae1b3402908a44d130cd',
+    'aa57404bbfcd4c7e4d1f93308cf9299524394adb',
+    'd256c971afce9e2ddca0b34d74a4d3ce7f57dd4d',
+    '68d0757b40c7037356bc94bf2e6b49c131a7e8a8'
+]
+
+
+class TestSubtreeAnalyzer(TestCaseRepo):
+    """SubtreeAnalyzer tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.repo = GraalRepository('http://example.com', self.git_path)
+        self.calls = []
+
+    def analyze_files(self, root_path, file_paths):
+        """Count the files and record their paths, relative to `root_path`"""
+
+        paths = [os.path.relpath(file_path, root_path) for file_path in file_paths]
+        self.calls.append(paths)
+
+        return {'files': len(paths), 'paths': paths}
+
+    def test_analyze(self):
+        """Test whether only the directories changed by each commit are analyzed"""
+
+        subtree_analyzer = SubtreeAnalyzer(self.analyze_files, merge_analyses)
+
+        expected_calls = [
+            # all directories with files are analyzed at the first commit
+            [
+                ['perceval/__init__.py', 'perceval/_version.py', 'perceval/archive.py', 'perceval/backend.py',
+                 'perceval/client.py', 'perceval/errors.py', 'perceval/utils.py'],
+                ['perceval/backends/__init__.py'],
+                ['perceval/backends/core/__init__.py', 'perceval/backends/core/git.py',
+                 'perceval/backends/core/github.py', 'perceval/backends/core/mbox.py']
+            ],
+            [['.travis.yml']],
+            [['.gitattributes', '.gitignore', '.travis.yml']],
+            [
+                ['perceval/backends/core/__init__.py', 'perceval/backends/core/git.py',
+                 'perceval/backends/core/github.py', 'perceval/backends/core/graal.py',
+                 'perceval/backends/core/mbox.py']
+            ],
+            [
+                ['perceval/backends/__init__.py', 'perceval/backends/graal.py'],
+                ['perceval/backends/core/__init__.py', 'perceval/backends/core/git.py',
+                 'perceval/backends/core/github.py', 'perceval/backends/core/mbox.py']
+            ],
+            [['perceval/backends/__init__.py']]
+        ]
+
+        for commit, commit_calls in zip(COMMITS, expected_calls):
+            self.calls = []
+            result = subtree_analyzer.analyze(self.repo, commit, '/tmp/worktree')
+
+            self.assertListEqual(self.calls, commit_calls)
+
+            files = self.repo.ls_tree(commit)
+            self.assertEqual(result['files'], len(files))
+            self.assertListEqual(sorted(result['paths']), sorted(files.keys()))
+
+        # the results of the last commit are reused
+        self.calls = []
+        result = subtree_analyzer.analyze(self.repo, COMMITS[-1], '/tmp/worktree')
+        self.assertListEqual(self.calls, [])
+        self.assertEqual(result['files'], 15)
+
+        # the results returned can be modified
+        result['files'] = 0
+        result = subtree_analyzer.analyze(self.repo, COMMITS[-1], '/tmp/worktree')
+        self.assertEqual(result['files'], 15)
+
+    def test_analyze_path(self):
+        """Test whether a subtree is analyzed"""
+
+        subtree_analyzer = SubtreeAnalyzer(self.analyze_files, merge_analyses,
+                                           file_filter=lambda file_path: file_path.endswith('git.py'))
+
+        result = subtree_analyzer.analyze(self.repo, COMMITS[0], '/tmp/worktree', path='perceval/backends')
+        self.assertListEqual(self.calls, [['core/git.py']])
+        self.assertDictEqual(result, {'files': 1, 'paths': ['core/git.py']})
+
+        # the subtree did not change
+        result = subtree_analyzer.analyze(self.repo, COMMITS[2], '/tmp/worktree', path='perceval/backends/')
+        self.assertEqual(len(self.calls), 1)
+        self.assertDictEqual(result, {'files': 1, 'paths': ['core/git.py']})
+
+        result = subtree_analyzer.analyze(self.repo, COMMITS[0], '/tmp/worktree', path='perceval/backends/core/git.py')
+        self.assertListEqual(self.calls[-1], ['.'])
+        self.assertEqual(result['files'], 1)
+
+        result = subtree_analyzer.analyze(self.repo, COMMITS[0], '/tmp/worktree', path='tests')
+        self.assertIsNone(result)
+
+    def test_analyze_no_files(self):
+        """Test whether the result of a tree without files is the one of an empty list"""
+
+        subtree_analyzer = SubtreeAnalyzer(self.analyze_files, lambda analyses: merge_analyses(analyses) or {},
+                                           file_filter=lambda file_path: file_path.endswith('.java'))
+
+        result = subtree_analyzer.analyze(self.repo, COMMITS[0], '/tmp/worktree')
+        self.assertListEqual(self.calls, [])
+        self.assertDictEqual(result, {})
+
+
+class TestMergeAnalyses(unittest.TestCase):
+    """merge_analyses tests"""
+
+    def test_merge_analyses(self):
+        """Test whether partial results are merged"""
+
+        analyses = [
+            {'Python': {'loc': 10, 'blanks': 2}, 'vulns': [{'file': 'a.py'}], 'loc_analyzed': None},
+            None,
+            {'Python': {'loc': 5, 'blanks': 1}, 'Java': {'loc': 3}, 'vulns': [{'file': 'b.py'}], 'loc_analyzed': 7}
+        ]
+
+        result = merge_analyses(analyses)
+        self.assertDictEqual(result, {
+            'Python': {'loc': 15, 'blanks': 3},
+            'Java': {'loc': 3},
+            'vulns': [{'file': 'a.py'}, {'file': 'b.py'}],
+            'loc_analyzed': 7
+        })
+
+        # the partial results are not modified
+        self.assertDictEqual(analyses[0]['Python'], {'loc': 10, 'blanks': 2})
+        self.assertEqual(len(analyses[0]['vulns']), 1)
+
+        result['vulns'][0]['file'] = 'c.py'
+        self.assertEqual(analyses[0]['vulns'][0]['file'], 'a.py')
+
+        self.assertListEqual(merge_analyses([[1], [2, 3]]), [1, 2, 3])
+        self.assertIsNone(merge_analyses([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
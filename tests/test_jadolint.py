@@ -23,11 +23,14 @@
 import os
 import shutil
 import subprocess
+import tempfile
 import unittest.mock
 
 from graal.backends.core.analyzers.jadolint import (Jadolint,
                                                     DEPENDENCIES,
-                                                    SMELLS)
+                                                    SMELLS,
+                                                    analyze_cached)
+from graal.cache import AnalysisCache
 from graal.graal import GraalError
 from base_analyzer import (ANALYZER_TEST_FOLDER,
                            ANALYZER_TEST_FILE,
@@ -164,6 +167,29 @@ class TestJadolint(TestCaseAnalyzer):
         with self.assertRaises(GraalError):
             _ = jadolint.analyze(**kwargs)
 
+    def test_analyze_cached(self):
+        """Test whether the results of identical files are shared among worktrees"""
+
+        jadolint = unittest.mock.Mock(version='0.2.0', analysis=SMELLS)
+        jadolint.analyze.side_effect = lambda file_path: {SMELLS: [file_path + ':1 DL3000']}
+
+        cache = AnalysisCache()
+        worktrees = [tempfile.mkdtemp(dir=self.tmp_path) for _ in range(2)]
+
+        results = []
+        for worktree in worktrees:
+            file_path = os.path.join(worktree, DOCKERFILE_TEST)
+            shutil.copy2(get_file_path(ANALYZER_TEST_FOLDER + DOCKERFILE_TEST), file_path)
+            results.append(analyze_cached(jadolint, file_path, cache=cache, worktree_path=worktree))
+
+        self.assertEqual(jadolint.analyze.call_count, 1)
+        for worktree, result in zip(worktrees, results):
+            self.assertDictEqual(result, {SMELLS: [os.path.join(worktree, DOCKERFILE_TEST) + ':1 DL3000']})
+
+        # without the cache, the file is always analyzed
+        _ = analyze_cached(jadolint, file_path)
+        self.assertEqual(jadolint.analyze.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -21,13 +21,16 @@
 #     inishchith <inishchith@gmail.com>
 #
 
+import multiprocessing
 import os
 import unittest
+import unittest.mock
 
 from base_analyzer import (TestCaseAnalyzer,
                            ANALYZER_TEST_FILE)
 
 from graal.backends.core.analyzers.lizard import Lizard
+from utils import mock_cloc_analysis
 
 
 class TestLizard(TestCaseAnalyzer):
@@ -100,6 +103,75 @@ class TestLizard(TestCaseAnalyzer):
             self.assertIn('end', fd)
             self.assertTrue(type(fd['end']), int)
 
+    def test_analyze_file_content(self):
+        """Test whether lizard returns the same data when analyzing the content of a file"""
+
+        lizard = Lizard()
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        with open(file_path, 'rb') as fd:
+            content = fd.read()
+
+        expected = lizard.analyze(file_path=file_path, details=True)
+
+        result = lizard.analyze(file_path='/nowhere/' + ANALYZER_TEST_FILE, details=True, content=content)
+        self.assertDictEqual(result, expected)
+
+        # Windows line endings
+        result = lizard.analyze(file_path='/nowhere/' + ANALYZER_TEST_FILE, details=True,
+                                content=content.replace(b'\n', b'\r\n'))
+        self.assertDictEqual(result, expected)
+
+        # contents that cannot be decoded are not analyzed
+        result = lizard.analyze(file_path=ANALYZER_TEST_FILE, details=False, content=b'\xff\xfe\xfa')
+        self.assertEqual(result['loc'], 0)
+        self.assertEqual(result['num_funs'], 0)
+
+    def test_analyze_file_count_lines(self):
+        """Test whether lizard counts blank and comment lines as CLOC does"""
+
+        lizard = Lizard()
+        file_path = os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)
+        expected = lizard.analyze(file_path=file_path, details=True)
+
+        result = lizard.analyze(file_path=file_path, details=True, count_lines=True)
+        self.assertEqual(result['blanks'], 27)
+        self.assertEqual(result['comments'], 31)
+        self.assertEqual(result['loc'], 67)
+        self.assertListEqual(list(result.keys()), list(expected.keys()) + ['blanks', 'comments'])
+
+        with open(file_path, 'rb') as fd:
+            content = fd.read()
+
+        result_content = lizard.analyze(file_path=file_path, details=True, count_lines=True, content=content)
+        self.assertDictEqual(result_content, result)
+
+        result = lizard.analyze(file_path=ANALYZER_TEST_FILE, details=False, count_lines=True, content=b'\xff\xfe')
+        self.assertEqual(result['blanks'], 0)
+        self.assertEqual(result['comments'], 0)
+
+    def test_analyze_file_count_lines_c(self):
+        """Test whether lines with code and comments are code lines and blank lines in comments are blanks"""
+
+        code = (b'/* header\n'
+                b'\n'
+                b' * comment\n'
+                b' */\n'
+                b'#include <stdio.h>\n'
+                b'\n'
+                b'int main(int argc, char **argv) {  // main\n'
+                b'    char *s = "a /* not a comment */ b";\n'
+                b'    return 0;\n'
+                b'}\n'
+                b'   \n'
+                b'// end')
+
+        lizard = Lizard()
+        result = lizard.analyze(file_path='main.c', details=False, count_lines=True, content=code)
+
+        self.assertEqual(result['blanks'], 3)
+        self.assertEqual(result['comments'], 4)
+        self.assertEqual(result['loc'], 5)
+
     def test_analyze_repository(self):
         """Test whether lizard returns the expected fields data for repository"""
 
@@ -126,6 +198,98 @@ class TestLizard(TestCaseAnalyzer):
         self.assertIn('comments', result)
         self.assertTrue(type(result['comments']), int)
 
+    @unittest.mock.patch('graal.backends.core.analyzers.lizard.Cloc.analyze')
+    def test_analyze_repository_incremental(self, mock_cloc):
+        """Test whether the results of unchanged files are reused"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        repository_path = self.origin_path
+        file_hashes = {
+            'perceval/backends/core/git.py': 'a' * 40,
+            'perceval/backends/core/github.py': 'b' * 40
+        }
+
+        lizard = Lizard()
+        kwargs = {'repository_path': repository_path,
+                  'repository_level': True,
+                  'files_affected': [],
+                  'file_hashes': file_hashes,
+                  'details': False}
+        expected = lizard.analyze(**kwargs)
+        self.assertEqual(mock_cloc.call_count, 1)
+        _, cloc_kwargs = mock_cloc.call_args
+        self.assertEqual(len(cloc_kwargs['file_paths']), len(expected))
+
+        kwargs['files_affected'] = ['perceval/backends/core/git.py']
+        result = lizard.analyze(**kwargs)
+        self.assertEqual(mock_cloc.call_count, 2)
+        _, cloc_kwargs = mock_cloc.call_args
+
+        # only the files without hash are analyzed again
+        self.assertEqual(len(cloc_kwargs['file_paths']), len(expected) - 2)
+        self.assertNotIn(os.path.join(repository_path, 'perceval/backends/core/git.py'), cloc_kwargs['file_paths'])
+
+        self.assertEqual(len(result), len(expected))
+        for r, e in zip(result, expected):
+            self.assertEqual(r['in_commit'], r['file_path'] == 'perceval/backends/core/git.py')
+            e['in_commit'] = r['in_commit']
+            self.assertDictEqual(r, e)
+
+        # the hash of a file changed
+        file_hashes['perceval/backends/core/git.py'] = 'c' * 40
+        _ = lizard.analyze(**kwargs)
+        _, cloc_kwargs = mock_cloc.call_args
+        self.assertIn(os.path.join(repository_path, 'perceval/backends/core/git.py'), cloc_kwargs['file_paths'])
+        self.assertNotIn(os.path.join(repository_path, 'perceval/backends/core/github.py'), cloc_kwargs['file_paths'])
+
+    @unittest.mock.patch('graal.backends.core.analyzers.lizard.Cloc.analyze')
+    def test_analyze_repository_count_lines(self, mock_cloc):
+        """Test whether blank and comment lines are counted without CLOC"""
+
+        kwargs = {'repository_path': self.tmp_data_path,
+                  'repository_level': True,
+                  'files_affected': [],
+                  'count_lines': True,
+                  'details': False}
+        result = Lizard().analyze(**kwargs)
+
+        self.assertFalse(mock_cloc.called)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['file_path'], ANALYZER_TEST_FILE)
+        self.assertEqual(result[0]['blanks'], 27)
+        self.assertEqual(result[0]['comments'], 31)
+
+        kwargs['threads'] = 2
+        self.assertListEqual(Lizard().analyze(**kwargs), result)
+
+    @unittest.mock.patch('graal.backends.core.analyzers.lizard.Cloc.analyze')
+    def test_analyze_repository_threads(self, mock_cloc):
+        """Test whether the results are the same when using many processes"""
+
+        mock_cloc.side_effect = mock_cloc_analysis
+
+        kwargs = {'repository_path': self.origin_path,
+                  'repository_level': True,
+                  'files_affected': ['perceval/backends/core/git.py'],
+                  'details': False}
+        expected = Lizard().analyze(**kwargs)
+
+        # few files are analyzed in the same process
+        kwargs['threads'] = 3
+        with unittest.mock.patch('multiprocessing.Pool', side_effect=multiprocessing.Pool) as mock_pool:
+            result = Lizard().analyze(**kwargs)
+            self.assertFalse(mock_pool.called)
+
+        self.assertListEqual(result, expected)
+
+        with unittest.mock.patch('graal.backends.core.analyzers.lizard.MIN_FILES_PER_PROCESS', 1), \
+                unittest.mock.patch('multiprocessing.Pool', side_effect=multiprocessing.Pool) as mock_pool:
+            result = Lizard().analyze(**kwargs)
+            mock_pool.assert_called_once_with(processes=3)
+
+        self.assertListEqual(result, expected)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -22,17 +22,57 @@
 #
 
 import os
+import shutil
+import stat
 import subprocess
+import tempfile
+import types
 import unittest
 import unittest.mock
 
 from base_analyzer import (TestCaseAnalyzer,
                            ANALYZER_TEST_FILE)
 
-from graal.backends.core.analyzers.scancode import ScanCode
+from graal.backends.core.analyzers.scancode import (ScanCode,
+                                                    CONFIGURE_EXEC,
+                                                    SCANCODE_CLI_EXEC)
 from graal.graal import GraalError
+from graal.stats import (Stats,
+                         activate)
 from utils import SCANCODE_PATH, SCANCODE_CLI_PATH
 
+FAKE_SCANCODE_CLI = """
+import json
+import sys
+import time
+
+for path in sys.argv[1:]:
+    if path == 'error':
+        sys.stderr.write('scancode error')
+        sys.exit(1)
+    if path == 'slow':
+        time.sleep(0.2)
+    file_info = {'path': path, 'licenses': [{'key': 'gpl-3.0-plus'}], 'copyrights': []}
+    print(json.dumps([{'headers': []}, {'files': [file_info]}], indent=2))
+    print()
+"""
+
+
+def create_fake_scancode_cli(path):
+    """Create a scancode-toolkit whose scancode-cli writes the expected output for any file"""
+
+    exec_path = os.path.join(path, SCANCODE_CLI_EXEC)
+    os.makedirs(os.path.dirname(exec_path))
+    with open(exec_path, 'w') as fd:
+        fd.write(FAKE_SCANCODE_CLI)
+
+    configure_path = os.path.join(path, CONFIGURE_EXEC)
+    with open(configure_path, 'w') as fd:
+        fd.write('#!/bin/sh\nexit 0\n')
+    os.chmod(configure_path, os.stat(configure_path).st_mode | stat.S_IXUSR)
+
+    return exec_path
+
 
 class TestScanCode(TestCaseAnalyzer):
     """ScanCode tests"""
@@ -85,7 +125,7 @@ class TestScanCodeCli(TestCaseAnalyzer):
 
         scancode_cli = ScanCode(exec_path=SCANCODE_CLI_PATH, cli=True)
         kwargs = {'file_paths': [os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)]}
-        result = scancode_cli.analyze(**kwargs)
+        result = list(scancode_cli.analyze(**kwargs))
 
         self.assertIn('licenses', result[0])
         self.assertIn('copyrights', result[0])
@@ -96,7 +136,65 @@ class TestScanCodeCli(TestCaseAnalyzer):
         scancode_cli = ScanCode(exec_path=SCANCODE_CLI_PATH, cli=True)
         kwargs = {'file_paths': os.path.join(self.tmp_data_path, ANALYZER_TEST_FILE)}
         with self.assertRaises(GraalError):
-            _ = scancode_cli.analyze(**kwargs)
+            _ = list(scancode_cli.analyze(**kwargs))
+
+
+class TestScanCodeCliStream(unittest.TestCase):
+    """Tests of the parsing of the output of scancode_cli"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        self.exec_path = create_fake_scancode_cli(self.tmp_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_analyze(self):
+        """Test whether the results of each file are read from the output"""
+
+        file_paths = ['file%s.py' % i for i in range(500)]
+
+        scancode_cli = ScanCode(exec_path=self.exec_path, cli=True)
+        result = scancode_cli.analyze(file_paths=file_paths)
+        self.assertIsInstance(result, types.GeneratorType)
+
+        result = list(result)
+        self.assertEqual(len(result), 500)
+        self.assertListEqual([r['path'] for r in result], file_paths)
+        self.assertDictEqual(result[0], {'path': 'file0.py', 'licenses': [{'key': 'gpl-3.0-plus'}], 'copyrights': []})
+
+    def test_analyze_no_files(self):
+        """Test whether an empty list is returned when there are no files"""
+
+        scancode_cli = ScanCode(exec_path=self.exec_path, cli=True)
+        result = list(scancode_cli.analyze(file_paths=[]))
+
+        self.assertListEqual(result, [])
+
+    def test_analyze_error(self):
+        """Test whether an exception is thrown when scancode_cli fails"""
+
+        scancode_cli = ScanCode(exec_path=self.exec_path, cli=True)
+        with self.assertRaisesRegex(GraalError, 'scancode error'):
+            _ = list(scancode_cli.analyze(file_paths=['file0.py', 'error']))
+
+    def test_analyze_stats(self):
+        """Test whether the stage of scancode_cli lasts until its results are read"""
+
+        scancode_cli = ScanCode(exec_path=self.exec_path, cli=True)
+
+        stats = Stats()
+        previous = activate(stats)
+        try:
+            result = list(scancode_cli.analyze(file_paths=['file0.py', 'slow']))
+        finally:
+            activate(previous)
+
+        self.assertEqual(len(result), 2)
+
+        stage = stats.to_dict()['analyzer:ScanCode']
+        self.assertEqual(stage['count'], 1)
+        self.assertGreaterEqual(stage['wall'], 0.2)
 
 
 if __name__ == "__main__":
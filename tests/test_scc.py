@@ -21,6 +21,7 @@
 #     Valerio Cosentino <valcos@bitergia.com>
 #
 
+import json
 import os
 import subprocess
 import unittest.mock
@@ -32,6 +33,36 @@ from base_analyzer import (TestCaseAnalyzer,
 from graal.backends.core.analyzers.scc import SCC
 
 
+SCC_OUTPUT = [
+    {
+        "Name": "Python",
+        "Count": 2,
+        "Blank": 30,
+        "Comment": 35,
+        "Code": 80,
+        "Complexity": 12,
+        "Files": [
+            {"Language": "Python", "Location": "repo/sample_code.py", "Filename": "sample_code.py",
+             "Blank": 27, "Comment": 31, "Code": 67, "Complexity": 10},
+            {"Language": "Python", "Location": "repo/lib/util.py", "Filename": "util.py",
+             "Blank": 3, "Comment": 4, "Code": 13, "Complexity": 2}
+        ]
+    },
+    {
+        "Name": "Markdown",
+        "Count": 1,
+        "Blank": 1,
+        "Comment": 0,
+        "Code": 2,
+        "Complexity": 0,
+        "Files": [
+            {"Language": "Markdown", "Location": "repo/README.md", "Filename": "README.md",
+             "Blank": 1, "Comment": 0, "Code": 2, "Complexity": 0}
+        ]
+    }
+]
+
+
 class TestSCC(TestCaseAnalyzer):
     """SCC tests"""
 
@@ -92,6 +123,97 @@ class TestSCC(TestCaseAnalyzer):
             self.assertIn('total_files', language_result)
             self.assertTrue(type(language_result['total_files']), int)
 
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files(self, check_output_mock):
+        """Test whether SCC is executed once for a list of files"""
+
+        check_output_mock.return_value = json.dumps(SCC_OUTPUT).encode('utf-8')
+
+        scc = SCC()
+        file_paths = ['repo/sample_code.py', './repo/README.md', 'repo/data.bin']
+        result = scc.analyze(file_paths=file_paths)
+
+        self.assertEqual(check_output_mock.call_count, 1)
+        args, _ = check_output_mock.call_args
+        self.assertListEqual(args[0], ['scc', '--format', 'json', '--by-file'] + file_paths)
+
+        self.assertDictEqual(result['repo/sample_code.py'],
+                             {'blanks': 27, 'comments': 31, 'loc': 67, 'ccn': 10, 'ext': 'py'})
+        self.assertDictEqual(result['./repo/README.md'],
+                             {'blanks': 1, 'comments': 0, 'loc': 2, 'ccn': 0, 'ext': 'md'})
+        self.assertDictEqual(result['repo/data.bin'],
+                             {'blanks': 0, 'comments': 0, 'loc': 0, 'ccn': 0, 'ext': 'bin'})
+
+    @unittest.mock.patch('graal.backends.core.analyzers.scc.MAX_FILES_PER_RUN', 2)
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files_chunks(self, check_output_mock):
+        """Test whether long lists of files are split among several executions of SCC"""
+
+        check_output_mock.return_value = b'[]'
+
+        scc = SCC()
+        file_paths = ['a.py', 'b.py', 'c.py']
+        result = scc.analyze(file_paths=file_paths)
+
+        self.assertEqual(check_output_mock.call_count, 2)
+        self.assertListEqual(list(result.keys()), file_paths)
+
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_repository_output(self, check_output_mock):
+        """Test whether the results of a repository are obtained per language and per file"""
+
+        check_output_mock.return_value = json.dumps(SCC_OUTPUT).encode('utf-8')
+
+        scc = SCC()
+        kwargs = {'repository_path': 'repo',
+                  'repository_level': True,
+                  'files_affected': ['lib/util.py'],
+                  'details': False}
+        result = scc.analyze(**kwargs)
+
+        args, _ = check_output_mock.call_args
+        self.assertListEqual(args[0], ['scc', '--format', 'json', 'repo'])
+        self.assertDictEqual(result, {
+            'Python': {'total_files': 2, 'blanks': 30, 'comments': 35, 'loc': 80, 'ccn': 12},
+            'Markdown': {'total_files': 1, 'blanks': 1, 'comments': 0, 'loc': 2, 'ccn': 0}
+        })
+
+        kwargs['by_file'] = True
+        result = scc.analyze(**kwargs)
+
+        args, _ = check_output_mock.call_args
+        self.assertListEqual(args[0], ['scc', '--format', 'json', '--by-file', 'repo'])
+        self.assertListEqual([r['file_path'] for r in result], ['README.md', 'lib/util.py', 'sample_code.py'])
+        self.assertDictEqual(result[1], {'blanks': 3, 'comments': 4, 'loc': 13, 'ccn': 2, 'language': 'Python',
+                                         'file_path': 'lib/util.py', 'in_commit': True})
+        self.assertFalse(result[2]['in_commit'])
+
+    @unittest.mock.patch('graal.backends.core.analyzers.scc.MAX_FILES_PER_RUN', 2)
+    @unittest.mock.patch('subprocess.check_output')
+    def test_analyze_files_repository_level(self, check_output_mock):
+        """Test whether the results of a list of files are obtained as the ones of a repository"""
+
+        check_output_mock.return_value = json.dumps(SCC_OUTPUT[:1]).encode('utf-8')
+
+        scc = SCC()
+        kwargs = {'repository_path': 'repo',
+                  'repository_level': True,
+                  'file_paths': ['repo/sample_code.py', 'repo/lib/util.py', 'repo/lib/other.py'],
+                  'details': False}
+        result = scc.analyze(**kwargs)
+
+        # the results of the two executions are added
+        self.assertEqual(check_output_mock.call_count, 2)
+        self.assertDictEqual(result, {
+            'Python': {'total_files': 4, 'blanks': 60, 'comments': 70, 'loc': 160, 'ccn': 24}
+        })
+
+        kwargs['by_file'] = True
+        kwargs['file_paths'] = ['repo/sample_code.py', 'repo/lib/util.py']
+        result = scc.analyze(**kwargs)
+
+        self.assertListEqual([r['file_path'] for r in result], ['lib/util.py', 'sample_code.py'])
+
     @unittest.mock.patch('subprocess.check_output')
     def test_analyze_error(self, check_output_mock):
         """Test whether an exception is thrown in case of errors"""
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import subprocess
+import sys
+import unittest
+
+from graal.stats import (STAGE_ANALYZE,
+                         STAGE_ANALYZER,
+                         STAGE_CHECKOUT,
+                         Stats,
+                         activate,
+                         measure,
+                         rusage)
+
+
+class TestStats(unittest.TestCase):
+    """Stats tests"""
+
+    def test_add(self):
+        """Test whether the executions of the stages are added up"""
+
+        stats = Stats()
+        stats.add(STAGE_CHECKOUT, 1.0, cpu=0.5)
+        stats.add(STAGE_CHECKOUT, 2.0, cpu=0.5, children_cpu=1.0)
+        stats.add(STAGE_ANALYZE, 3.0)
+
+        self.assertDictEqual(stats.to_dict(), {
+            'checkout': {'count': 2, 'wall': 3.0, 'cpu': 1.0, 'children_cpu': 1.0},
+            'analyze': {'count': 1, 'wall': 3.0, 'cpu': 0.0, 'children_cpu': 0.0}
+        })
+
+        # the dict returned is a copy
+        stats.to_dict()['checkout']['count'] = 0
+        self.assertEqual(stats.to_dict()['checkout']['count'], 2)
+
+    def test_update(self):
+        """Test whether the stages of other stats are added"""
+
+        stats = Stats()
+        stats.add(STAGE_CHECKOUT, 1.0)
+
+        other = Stats()
+        other.add(STAGE_CHECKOUT, 2.0, cpu=1.0)
+        other.add(STAGE_ANALYZE, 3.0)
+
+        stats.update(other.to_dict())
+        self.assertDictEqual(stats.to_dict(), {
+            'checkout': {'count': 2, 'wall': 3.0, 'cpu': 1.0, 'children_cpu': 0.0},
+            'analyze': {'count': 1, 'wall': 3.0, 'cpu': 0.0, 'children_cpu': 0.0}
+        })
+
+    def test_measure(self):
+        """Test whether the time of the child processes is measured"""
+
+        stats = Stats()
+        with stats.measure(STAGE_ANALYZE):
+            subprocess.check_output([sys.executable, '-c', 'sum(range(10 ** 6))'])
+
+        timer = stats.to_dict()[STAGE_ANALYZE]
+        self.assertEqual(timer['count'], 1)
+        self.assertGreater(timer['wall'], 0)
+        self.assertGreater(timer['children_cpu'], 0)
+
+        # the stage is recorded on errors too
+        with self.assertRaises(ValueError):
+            with stats.measure(STAGE_ANALYZE):
+                raise ValueError
+
+        self.assertEqual(stats.to_dict()[STAGE_ANALYZE]['count'], 2)
+
+    def test_measure_trace(self):
+        """Test whether the spans of the stages are saved when tracing"""
+
+        stats = Stats()
+        with stats.measure(STAGE_ANALYZE):
+            pass
+        self.assertListEqual(stats.events, [])
+
+        stats = Stats(trace=True)
+        with stats.measure(STAGE_CHECKOUT, commit='abc'):
+            with stats.measure(STAGE_ANALYZER + 'Lizard'):
+                pass
+
+        events = stats.pop_events()
+        self.assertListEqual(stats.events, [])
+        self.assertEqual(len(events), 2)
+
+        analyzer, checkout = events
+        self.assertEqual(analyzer['name'], 'Lizard')
+        self.assertEqual(analyzer['cat'], 'analyzer')
+        self.assertNotIn('args', analyzer)
+        self.assertEqual(checkout['name'], STAGE_CHECKOUT)
+        self.assertEqual(checkout['cat'], 'graal')
+        self.assertDictEqual(checkout['args'], {'commit': 'abc'})
+
+        for event in events:
+            self.assertEqual(event['ph'], 'X')
+            self.assertEqual(event['pid'], os.getpid())
+            self.assertIsInstance(event['ts'], int)
+            self.assertIsInstance(event['dur'], int)
+
+    def test_activate(self):
+        """Test whether the stages are recorded in the stats active"""
+
+        # nothing is recorded without stats
+        with measure(STAGE_CHECKOUT):
+            pass
+
+        stats = Stats()
+        previous = activate(stats)
+        self.assertIsNone(previous)
+
+        try:
+            with measure(STAGE_CHECKOUT):
+                pass
+
+            # the stats given are used instead of the active ones
+            other = Stats()
+            with measure(STAGE_ANALYZE, other):
+                pass
+        finally:
+            self.assertEqual(activate(previous), stats)
+
+        self.assertListEqual(list(stats.to_dict().keys()), [STAGE_CHECKOUT])
+        self.assertListEqual(list(other.to_dict().keys()), [STAGE_ANALYZE])
+
+    def test_rusage(self):
+        """Test whether the resources used are returned"""
+
+        usage = rusage()
+        self.assertListEqual(sorted(usage.keys()), ['children', 'self'])
+        self.assertListEqual(sorted(usage['self'].keys()), ['maxrss', 'stime', 'utime'])
+        self.assertGreater(usage['self']['maxrss'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
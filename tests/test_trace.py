@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from graal.trace import TraceFile
+
+
+class TestTraceFile(unittest.TestCase):
+    """TraceFile tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='graal_')
+        self.trace_path = os.path.join(self.tmp_path, 'trace.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_write(self):
+        """Test whether the events are written as a JSON array"""
+
+        trace_file = TraceFile(self.trace_path, process_name='graal CoCom')
+        trace_file.write([{'name': 'commit', 'ph': 'X', 'ts': 1, 'dur': 2, 'pid': 1, 'tid': 1}])
+        trace_file.write([])
+        trace_file.write([{'name': 'checkout', 'ph': 'X', 'ts': 1, 'dur': 1, 'pid': 1, 'tid': 1},
+                          {'name': 'analyze', 'ph': 'X', 'ts': 2, 'dur': 1, 'pid': 1, 'tid': 1}])
+
+        # the events are written as they arrive
+        with open(self.trace_path) as fd:
+            self.assertEqual(len(fd.readlines()), 5)
+
+        trace_file.close()
+
+        with open(self.trace_path) as fd:
+            events = json.load(fd)
+
+        self.assertListEqual([event['name'] for event in events],
+                             ['process_name', 'commit', 'checkout', 'analyze'])
+        self.assertDictEqual(events[0], {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                                         'args': {'name': 'graal CoCom'}})
+
+    def test_close_no_events(self):
+        """Test whether a trace without events is valid"""
+
+        trace_file = TraceFile(self.trace_path)
+        trace_file.close()
+
+        with open(self.trace_path) as fd:
+            events = json.load(fd)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['args']['name'], 'graal')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,3 +25,14 @@ NOMOS_PATH = "/usr/share/fossology/nomos/agent/nomossa"
 SCANCODE_PATH = "/home/runner/work/grimoirelab-graal/grimoirelab-graal/exec/scancode-toolkit/scancode"
 SCANCODE_CLI_PATH = "/home/runner/work/grimoirelab-graal/grimoirelab-graal/exec/scancode-toolkit/etc/scripts/scancli.py"
 JADOLINT_PATH = "//home/runner/work/grimoirelab-graal/grimoirelab-graal/exec/jadolint.jar"
+
+
+def mock_cloc_analysis(**kwargs):
+    """Return fixed results of CLOC for a file or, when `file_paths` is set, for each file"""
+
+    result = {'blanks': 1, 'comments': 2, 'loc': 3}
+
+    if 'file_paths' in kwargs:
+        return {file_path: dict(result) for file_path in kwargs['file_paths']}
+
+    return result